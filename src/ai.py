@@ -1,10 +1,126 @@
 from player import Player
 from piece import PieceColor, PieceCode
 from game_board_controller import GameBoardController
+from bitboard import BitboardPosition, CODE_KINDS, KIND_CODES, SQUARE_POS
+from bitboard import COLOR_INDEXES, PAWN, KING
+from transposition_table import (
+        TranspositionTable,
+        SharedTranspositionTable,
+        EXACT,
+        LOWER,
+        UPPER)
+from move_ordering import MoveOrderer
+from polyglot import OpeningBook
+from tablebase import Tablebases, value_plies
+from search_stats import SearchStats, long_algebraic
+from search_limits import SearchLimits
 
 import random
+import threading
 import time
 from abc import abstractmethod
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import closing
+from multiprocessing import RawValue, Value
+
+# larger than any material score. Being mated 'ply' plies from the root
+# scores -(INFINITE - ply), so the shortest mate is preferred
+INFINITE = 1000000
+DEFAULT_HASH_MB = 16
+# search depth when there is no clock to stop the search
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 64
+# the remaining clock is spread over this many moves, minus the moves
+# already played, but never less than MIN_MOVES_TO_GO
+MOVES_TO_GO = 40
+MIN_MOVES_TO_GO = 10
+# a capture that can't bring the score within this margin of alpha (or
+# beta) even after winning the captured piece isn't searched
+DELTA_MARGIN = 200
+# a tablebase win, minus the plies to mate from the root: above any
+# evaluation, below a mate found by the search itself
+TABLEBASE_WIN = INFINITE // 2
+# scores above this are mates and tablebase wins, counted from the root
+WIN_SCORE = TABLEBASE_WIN // 2
+# null-move pruning from this depth, the null move being searched
+# NULL_MOVE_REDUCTION (plus one every 6 plies) shallower, and checked by
+# a reduced normal search from NULL_MOVE_VERIFY_DEPTH
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_VERIFY_DEPTH = 7
+# quiet moves after the first LMR_MIN_MOVES are reduced by a ply from
+# LMR_MIN_DEPTH, by two after LMR_DEEP_MOVES
+LMR_MIN_MOVES = 3
+LMR_DEEP_MOVES = 8
+LMR_MIN_DEPTH = 3
+# how far below alpha the static score must be to skip quiet moves at
+# depth 1 and 2
+FUTILITY_MARGINS = [0, 200, 500]
+# root window around the last depth's score, widened on a fail
+ASPIRATION_WINDOW = 50
+ASPIRATION_MIN_DEPTH = 3
+# the stop signal, the clock and the node limit are looked at once every
+# this many nodes
+STOP_CHECK_NODES = 256
+# switches of the selective search techniques
+SEARCH_TECHNIQUES = (
+        'pvs',
+        'null_move',
+        'late_move_reductions',
+        'futility_pruning',
+        'aspiration_windows')
+# settings the search worker processes need
+WORKER_SETTINGS = ('quiescence_evasions', 'tablebases') + SEARCH_TECHNIQUES
+
+
+# seconds to spend on a move with 'time_left' milliseconds on the clock
+def time_budget(time_left: int, move_number: int) -> float:
+    moves_to_go = max(MOVES_TO_GO - move_number, MIN_MOVES_TO_GO)
+    return max(time_left, 0) / 1000 / moves_to_go
+
+
+# (old, new, promotion) as the 16 bit move stored in the transposition
+# table, 0 for no move
+def encode_move(move) -> int:
+    if move is None:
+        return 0
+    (old_row, old_col), (new_row, new_col), promotion = move
+    kind = CODE_KINDS[promotion] if promotion is not None else 0
+    return old_row * 8 + old_col | (new_row * 8 + new_col) << 6 | kind << 12
+
+
+def decode_move(move: int):
+    if not move:
+        return None
+    kind = move >> 12
+    return (
+        SQUARE_POS[move & 63],
+        SQUARE_POS[(move >> 6) & 63],
+        KIND_CODES[kind] if kind else None)
+
+
+# whether 'score' is a mate found by the search
+def is_mate_score(score: int) -> bool:
+    return abs(score) >= INFINITE - MAX_DEPTH
+
+
+# mate and tablebase win scores count the plies from the root, the
+# transposition table counts them from the stored node, which other
+# searches reach at other plies
+def score_to_table(score: int, ply: int) -> int:
+    if score > WIN_SCORE:
+        return score + ply
+    if score < -WIN_SCORE:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    if score > WIN_SCORE:
+        return score - ply
+    if score < -WIN_SCORE:
+        return score + ply
+    return score
 
 
 class AI(Player):
@@ -41,6 +157,9 @@ class AI(Player):
 
 
 class RandomAI(AI):
+    def __init__(self, color: PieceColor, settings: dict()):
+        super(RandomAI, self).__init__(color, settings)
+        self.controller = GameBoardController()
 
     def make_move(
             self,
@@ -53,27 +172,107 @@ class RandomAI(AI):
         if not self.playing:
             return None
 
-        legal_moves = set()
-        for i in range(8):
-            for j in range(8):
-                piece_info = piece_info_func((i, j))
-                if piece_info is not None and piece_info[1] == self.color:
-                    for move in get_legal_moves_func((i, j)):
-                        legal_moves.add(((i, j), move))
-        choosen_move = random.sample(sorted(legal_moves), 1)[0]
-        random_promotion = [
-                PieceCode.QUEEN,
-                PieceCode.KNIGHT,
-                PieceCode.BISHOP,
-                PieceCode.ROOK][random.randint(0, 3)]
-        choosen_move = (choosen_move[0], choosen_move[1], random_promotion)
-        return choosen_move
+        # every (old, new, promotion) available, promotions included
+        self.controller.fen = fen_code
+        legal_moves = self.controller.generate_legal_moves(self.color)
+        return random.choice(legal_moves)
 
 
 class MinMaxAI(AI):
-    def __init__(self, color: PieceColor, settings: dict()):
+    def __init__(
+            self,
+            color: PieceColor,
+            settings: dict(),
+            transposition_table: TranspositionTable = None):
         super(MinMaxAI, self).__init__(color, settings)
         self.controller = GameBoardController()
+        # processes the root moves are split between, 1 searches in the
+        # game thread only. The pool is created on the first search
+        self.workers = settings.get('search_workers', 1)
+        # kept between moves, the positions of the last search are
+        # often searched again. Worker processes share it with the game
+        # thread
+        if transposition_table is None:
+            if self.workers > 1:
+                transposition_table = SharedTranspositionTable(
+                        settings.get('hash_mb', DEFAULT_HASH_MB))
+            else:
+                transposition_table = TranspositionTable(
+                        settings.get('hash_mb', DEFAULT_HASH_MB))
+        self.transposition_table = transposition_table
+        self.move_orderer = MoveOrderer()
+        # Polyglot book played from before searching
+        self.opening_book = None
+        if settings.get('opening_book'):
+            self.opening_book = OpeningBook(settings['opening_book'])
+        # endgame tables played from at the root and probed in the search
+        self.tablebases = None
+        if settings.get('tablebases'):
+            self.tablebases = Tablebases(settings['tablebases'])
+        # search is stopped past this time.perf_counter() value, or
+        # after this many nodes
+        self._deadline = None
+        self._node_limit = None
+        # set by stop() from any thread, and seen by the search within
+        # STOP_CHECK_NODES nodes
+        self._stop_event = threading.Event()
+        self._stopped = False
+        self._countdown = STOP_CHECK_NODES
+        # limits of the running iterative deepening, changed by a ponder
+        # hit: the move time (seconds) counted from '_move_start', and
+        # the last depth searched
+        self._move_start = 0.0
+        self._move_time = None
+        self._max_depth = MAX_DEPTH
+        self._root_depth = 0
+        self.completed_depth = 0
+        self.nodes = 0
+        # positions seen by the quiescence search and the time spent
+        # there, counted apart from the main search
+        self.qnodes = 0
+        self.search_time = 0.0
+        self.qsearch_time = 0.0
+        # the quiescence search also tries every move out of check
+        self.quiescence_evasions = settings.get('quiescence_evasions', True)
+        # the search techniques are all on unless switched off, to
+        # measure what each one brings
+        for technique in SEARCH_TECHNIQUES:
+            setattr(self, technique, settings.get(technique, True))
+        self.root_move = None
+        # beta cutoffs, and those made by the first move searched
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # SearchStats of the last search, passed to 'stats_callback' (if
+        # set) and appended to the 'search_log' JSON lines file after
+        # each searched move
+        self.stats = SearchStats()
+        self.stats_callback = None
+        # called with the SearchStats so far after each completed depth
+        self.iteration_callback = None
+        self.search_log = settings.get('search_log')
+        # depth searched when there is no clock
+        self.search_depth = settings.get('search_depth', DEFAULT_DEPTH)
+        self._executor = None
+        # best root score found so far, read by the workers as their alpha
+        self._shared_alpha = None
+        # set to make the workers give up their search
+        self._stop_flag = None
+        # workers start a new search (table age, killers) when it changes
+        self._search_id = 0
+        # after moving, search the position the opponent's expected reply
+        # leads to until the opponent moves
+        self.ponder = settings.get('ponder', False)
+        self.ponder_move = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._ponder_key = None
+        self._ponder_thread = None
+        self._ponder_result = None
+        # hashes of the positions of the game so far, both sides to
+        # move, so the search sees repetitions of the game's positions,
+        # and the position after the last move played
+        self.game_hashes = []
+        self._game_fen = None
 
     def piece_score(self, piece_type: PieceCode):
         if piece_type == PieceCode.PAWN:
@@ -89,45 +288,40 @@ class MinMaxAI(AI):
         elif piece_type == PieceCode.KING:
             return 20000
 
-    def board_state_score(
-            self,
-            fen: str):
-        self.controller.fen = fen
-        score = 0
-        enemy_color = self.controller.opposite_color(self.color)
-        for enemy in self.controller.pieces_by_color[enemy_color]:
-            score -= self.piece_score(self.controller.piece_info(enemy)[0])
-        for my_piece in self.controller.pieces_by_color[self.color]:
-            score += self.piece_score(self.controller.piece_info(my_piece)[0])
-        return score
+    def board_state_score(self):
+        return self.controller.evaluate(self.color)
 
-    def get_child_states(self, fen, parent_is_max):
+    # plays each child move on 'self.controller' while it is being
+    # visited, and takes it back before the next one. Yields the move
+    # and whether it is quiet, best looking moves first with 'first'
+    # before all of them
+    def get_child_states(self, parent_is_max, ply, first=None):
 
-        controller = GameBoardController()
-        controller.fen = fen
+        controller = self.controller
         node_color = [controller.opposite_color(self.color), self.color][parent_is_max]
-        for piece_pos in controller.pieces_by_color[node_color]:
-            piece_type, piece_color = controller.piece_info(piece_pos)
-            # iterate over all possible moves for this piece
-            for move in controller.get_legal_moves(piece_pos):
-                # iterate over all possible promotions
-                # (ignore rook and bishop: queen is already a megazord of them)
-                for promotion in "QN":
-                    # check if we should skip the first promotion
-                    if promotion == "Q":
-                        # if this piece is not a pawn, not reason to iterate twice
-                        if piece_type != PieceCode.PAWN:
-                            continue
-                        # if this piece is a pawn, not reason to go over promotion
-                        # if not reaching edge of board
-                        if piece_type == PieceCode.PAWN and ((move[1] != 7 and node_color == PieceColor.WHITE) or (move[1] != 0 and node_color == PieceColor.BLACK)):
-                            continue
-
-                    # create child with copy of board where move is made
-                    copy = controller.copy()
-                    copy.move_piece(piece_pos, move, promotion)
-                    copy.finish_turn()
-                    yield ((piece_pos, move, promotion), copy.fen)
+        moves = [
+            move
+            for move in controller.generate_legal_moves(node_color)
+            # ignore rook and bishop promotions: queen is already a
+            # megazord of them
+            if move[2] not in (PieceCode.ROOK, PieceCode.BISHOP)]
+        ordered = self.move_orderer.order(
+                controller,
+                moves,
+                node_color,
+                ply,
+                first)
+        for child_move, quiet in ordered:
+            controller.make_move(*child_move)
+            try:
+                yield child_move, quiet
+            finally:
+                controller.unmake_move()
+
+    # remembers a quiet move that caused a beta cutoff
+    def refutation(self, move, is_max, ply, depth):
+        color = [self.controller.opposite_color(self.color), self.color][is_max]
+        self.move_orderer.cutoff(move, color, ply, depth)
 
     def make_move(
             self,
@@ -137,52 +331,761 @@ class MinMaxAI(AI):
             is_promotion_valid_func,
             fen_code) -> ((int, int), (int, int), PieceCode):
 
-        result = self.minimax(fen_code, 3, float('-inf'), float('inf'), None, True)
-        if not self.playing:
+        result = None
+        if self._ponder_thread is not None:
+            result = self.finish_pondering(fen_code)
+        self.follow_game(fen_code)
+        if result is None:
+            if self.opening_book is not None:
+                move = self.opening_book.choose(self.controller)
+                if move is not None:
+                    return self.played(move)
+            if self.tablebases is not None:
+                move = self.tablebases.best_move(self.controller)
+                if move is not None:
+                    return self.played(move)
+
+            self.transposition_table.new_search()
+            self.move_orderer.new_search()
+            result = self.iterative_deepening(SearchLimits(
+                    move_time=self.move_time(self.controller.fullmoves)))
+        if not self.playing or result is None:
             return None
 
         set_of_solutions = result[0]
-        return random.sample(sorted(set_of_solutions), k=1)[0]
+        move = self.played(random.sample(sorted(set_of_solutions), k=1)[0])
+        self.report_stats(fen_code, move)
+        if self.ponder:
+            self.start_pondering(move)
+        return move
+
+    # sets the controller to 'fen_code', continuing the game's history
+    # if it is a reply to the last move played and starting it over
+    # otherwise
+    def follow_game(self, fen_code: str):
+        controller = self.controller
+        controller.fen = fen_code
+        key = controller.zobrist_hash
+        replied = False
+        if self._game_fen is not None:
+            controller.fen = self._game_fen
+            for move in controller.generate_legal_moves(controller.turn):
+                controller.make_move(*move)
+                replied = controller.zobrist_hash == key
+                controller.unmake_move()
+                if replied:
+                    break
+            controller.fen = fen_code
+        if not replied:
+            self.game_hashes = []
+        controller.set_game_history(self.game_hashes)
+        self.game_hashes.append(key)
+
+    # records the position 'move' leads to in the game's history
+    def played(self, move):
+        self.controller.make_move(*move)
+        self.game_hashes.append(self.controller.zobrist_hash)
+        self._game_fen = self.controller.sync_position().fen
+        self.controller.unmake_move()
+        return move
+
+    def report_stats(self, fen_code: str, move):
+        if self.stats_callback is not None:
+            self.stats_callback(self.stats)
+        if self.search_log:
+            self.stats.write(
+                    self.search_log,
+                    fen=fen_code,
+                    color=self.color.name.lower(),
+                    move=long_algebraic(move))
+
+    # the best line from the controller's position, following the moves
+    # stored in the transposition table
+    def principal_variation(self, length: int) -> [((int, int), (int, int), PieceCode)]:
+        controller = self.controller
+        pv = []
+        seen = set()
+        try:
+            while len(pv) < length:
+                key = controller.zobrist_hash
+                entry = self.transposition_table.probe(key)
+                if entry is None or key in seen:
+                    break
+                seen.add(key)
+                move = decode_move(entry[3])
+                if move not in controller.generate_legal_moves(controller.turn):
+                    break
+                controller.make_move(*move)
+                pv.append(move)
+        finally:
+            for _ in pv:
+                controller.unmake_move()
+        return pv
+
+    # seconds to search the next move for, None without a clock
+    def move_time(self, move_number: int) -> float:
+        if self.time_left_func is None:
+            return None
+        return time_budget(self.time_left_func(self.color), move_number)
 
+    # searches, in a background thread, the position after 'move' and the
+    # reply the transposition table expects. 'self.controller' must be
+    # at the position 'move' is played from
+    def start_pondering(self, move):
+        controller = self.controller
+        controller.make_move(*move)
+        entry = self.transposition_table.probe(controller.zobrist_hash)
+        reply = decode_move(entry[3]) if entry is not None else None
+        if reply not in controller.generate_legal_moves(
+                controller.opposite_color(self.color)):
+            self.ponder_move = None
+            return
+        controller.make_move(*reply)
+        controller.fen = controller.sync_position().fen
+        controller.set_game_history(self.game_hashes)
+        self.ponder_move = reply
+        self._ponder_key = controller.zobrist_hash
+        self._ponder_result = None
+        self.transposition_table.new_search()
+        self.move_orderer.new_search()
+        self._ponder_thread = threading.Thread(target=self._ponder, daemon=True)
+        self._ponder_thread.start()
+
+    def _ponder(self):
+        self._ponder_result = self.iterative_deepening(SearchLimits(infinite=True))
+
+    # ends the ponder search once the opponent moved to 'fen_code'. On a
+    # ponder hit the search goes on within this move's limits, and its
+    # result is returned; otherwise it is stopped and None returned. A
+    # ponder search stopped before the opponent moved (by a pause) ended
+    # at some depth of its own, so it counts as a miss too. The
+    # transposition table keeps what was searched either way
+    def finish_pondering(self, fen_code: str):
+        position = BitboardPosition()
+        position.fen = fen_code
+        if position.hash != self._ponder_key \
+                or self._stop_event.is_set() or self._stopped:
+            self.ponder_misses += 1
+            self.stop_pondering()
+            return None
+        self.ponder_hits += 1
+        move_time = self.move_time(position.fullmoves)
+        # the time spent pondering comes for free
+        now = time.perf_counter()
+        self._move_start = now
+        self._move_time = move_time
+        if move_time is None:
+            self._max_depth = self.search_depth
+            if self.completed_depth >= self.search_depth:
+                self._deadline = now
+        elif self.completed_depth > 0:
+            self._deadline = now + move_time
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        return self._ponder_result
+
+    def stop_pondering(self):
+        if self._ponder_thread is None:
+            return
+        self.stop()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+
+    # ends the running search from any thread. It returns the best move
+    # of the last depth it finished
+    def stop(self):
+        self._stop_event.set()
+
+    def pause(self):
+        super(MinMaxAI, self).pause()
+        self.stop()
+
+    # looked at every STOP_CHECK_NODES nodes, instead of at every node
+    def check_stop(self) -> bool:
+        self._countdown = STOP_CHECK_NODES
+        if self._stop_event.is_set() or (
+                self._deadline is not None
+                and time.perf_counter() > self._deadline) or (
+                self._node_limit is not None
+                and self.nodes + self.qnodes >= self._node_limit) or (
+                self._stop_flag is not None
+                and self._stop_flag.value):
+            self._stopped = True
+        return self._stopped
+
+    # counts a node, and looks at the limits when it is time to
+    def _count_node(self) -> bool:
+        self._countdown -= 1
+        if self._countdown <= 0:
+            return self.check_stop()
+        return self._stopped
+
+    # searches depth 1, 2, ... trying the best move of each depth first
+    # in the next one, until one of the limits is reached or the search
+    # is stopped. An unfinished depth is thrown away, unless no depth
+    # finished: the best move found so far is taken then
+    def iterative_deepening(self, limits: SearchLimits = None):
+        start = time.perf_counter()
+        if limits is None:
+            limits = SearchLimits()
+        max_depth = limits.depth
+        if max_depth is None:
+            unlimited = limits.move_time is None and limits.nodes is None \
+                and not limits.infinite
+            max_depth = self.search_depth if unlimited else MAX_DEPTH
+        self._move_start = start
+        self._move_time = limits.move_time
+        self._max_depth = max_depth
+        self._node_limit = limits.nodes
+        self._search_id += 1
+        if self._stop_flag is not None:
+            self._stop_flag.value = 0
+        self._deadline = None
+        self._stop_event.clear()
+        # a pause before the search started
+        self._stopped = not self.playing
+        self._countdown = STOP_CHECK_NODES
+        self.root_move = None
+        self.completed_depth = 0
+        self.nodes = 0
+        self.qnodes = 0
+        self.qsearch_time = 0.0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.transposition_table.reset_stats()
+        iteration_nodes = []
+        result = None
+        best_move = None
+        for depth in range(1, MAX_DEPTH + 1):
+            if depth > self._max_depth:
+                break
+            self._root_depth = depth
+            if self.workers > 1 and depth > 1:
+                score = self.parallel_root_search(depth, best_move)
+            elif self.aspiration_windows and depth >= ASPIRATION_MIN_DEPTH:
+                score = self.aspiration_search(depth, result[1], best_move)
+            else:
+                score = self.minimax(
+                        depth,
+                        -INFINITE,
+                        INFINITE,
+                        None,
+                        True,
+                        best_move)
+            if self.stopped or score is None:
+                break
+            result = score
+            self.completed_depth = depth
+            iteration_nodes.append(
+                    self.nodes + self.qnodes - sum(iteration_nodes))
+            if self.iteration_callback is not None:
+                self.search_time = time.perf_counter() - start
+                self.iteration_callback(self.search_stats(result, iteration_nodes))
+            if result[0] is None or is_mate_score(result[1]):
+                # no legal moves, or a forced mate found: deeper
+                # searches only find it again
+                break
+            best_move = next(iter(result[0]))
+            move_time = self._move_time
+            if move_time is not None:
+                # the next depth takes several times longer than this one
+                if time.perf_counter() - self._move_start > move_time / 2:
+                    break
+                # the first depth runs without the clock, so there is a move
+                self._deadline = self._move_start + move_time
+        if result is None:
+            moves = self.controller.generate_legal_moves(self.color)
+            if moves:
+                result = (
+                        {self.root_move or moves[0]},
+                        self.board_state_score())
+        self._deadline = None
+        self._node_limit = None
+        self.search_time = time.perf_counter() - start
+        self.stats = self.search_stats(result, iteration_nodes)
+        return result
+
+    def search_stats(self, result, iteration_nodes: [int]) -> SearchStats:
+        stats = SearchStats()
+        stats.depth = self.completed_depth
+        stats.nodes = self.nodes
+        stats.qnodes = self.qnodes
+        stats.time = self.search_time
+        stats.qsearch_time = self.qsearch_time
+        stats.iteration_nodes = iteration_nodes
+        stats.cutoffs = self.cutoffs
+        stats.first_move_cutoffs = self.first_move_cutoffs
+        stats.table_hit_rate = self.transposition_table.hit_rate
+        if result is not None:
+            stats.score = result[1]
+            stats.pv = self.principal_variation(self.completed_depth)
+        return stats
+
+    # searches the root with a window around the score of the last
+    # depth, widening the side it falls out of until the score is inside
+    def aspiration_search(self, depth, previous, first=None):
+        window = ASPIRATION_WINDOW
+        alpha = max(previous - window, -INFINITE)
+        beta = min(previous + window, INFINITE)
+        while True:
+            score = self.minimax(depth, alpha, beta, None, True, first)
+            if self.stopped:
+                return score
+            if score[1] <= alpha and alpha > -INFINITE:
+                window *= 4
+                alpha = max(previous - window, -INFINITE)
+            elif score[1] >= beta and beta < INFINITE:
+                window *= 4
+                beta = min(previous + window, INFINITE)
+            else:
+                return score
+            if window > ASPIRATION_WINDOW * 64:
+                alpha = -INFINITE
+                beta = INFINITE
+
+    # nodes per second of the whole search, quiescence included
+    @property
+    def nps(self) -> float:
+        return (self.nodes + self.qnodes) / max(self.search_time, 1e-9)
+
+    # nodes per second of the quiescence search alone
+    @property
+    def qnps(self) -> float:
+        return self.qnodes / max(self.qsearch_time, 1e-9)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def _worker_pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._shared_alpha = Value('i', -INFINITE)
+            self._stop_flag = RawValue('b', 0)
+            settings = {
+                key: self.settings[key]
+                for key in WORKER_SETTINGS
+                if key in self.settings}
+            self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_search_worker,
+                    initargs=(
+                        self.color,
+                        settings,
+                        self.transposition_table.size_mb,
+                        self.transposition_table.name,
+                        self._shared_alpha,
+                        self._stop_flag))
+        return self._executor
+
+    # stops pondering and the worker processes of the parallel search,
+    # frees the shared transposition table and closes the opening book
+    # and the tablebases
+    def close(self):
+        self.stop_pondering()
+        if self.opening_book is not None:
+            self.opening_book.close()
+            self.opening_book = None
+        if self.tablebases is not None:
+            self.tablebases.close()
+            self.tablebases = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if isinstance(self.transposition_table, SharedTranspositionTable) \
+                and self.transposition_table.memory is not None:
+            self.transposition_table.close()
+
+    # searches the first root move here to get a bound (young brothers
+    # wait), then the other root moves in the worker processes. Each
+    # worker starts from the best score found so far as its alpha, and
+    # raises it when it finds a better move. None if the search stopped
+    def parallel_root_search(self, depth, first=None):
+        controller = self.controller
+        executor = self._worker_pool()
+        with closing(self.get_child_states(True, 0, first)) as children:
+            moves = [child_move for child_move, _ in children]
+        if not moves:
+            return (None, -INFINITE)
+
+        with closing(self.get_child_states(True, 0, moves[0])) as children:
+            for child_move, _ in children:
+                score = self.minimax(depth - 1, -INFINITE, INFINITE, child_move, False)
+                break
+        if self.stopped:
+            return None
+        best = score
+        self._shared_alpha.value = best[1]
+
+        position = controller.to_bytes()
+        pending = {
+            executor.submit(
+                _search_root_move,
+                position,
+                child_move,
+                depth,
+                self._deadline,
+                self._search_id,
+                self.transposition_table.age)
+            for child_move in moves[1:]}
+        finished = True
+        while pending:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            if self.check_stop():
+                self._stop_flag.value = 1
+            for future in done:
+                child_move, score, alpha, nodes, qnodes = future.result()
+                self.nodes += nodes
+                self.qnodes += qnodes
+                if score is None:
+                    finished = False
+                # a score not above the worker's alpha is only a bound
+                elif score > alpha and score > best[1]:
+                    best = ({child_move}, score)
+        if not finished or self.stopped:
+            return None
+
+        self.transposition_table.store(
+                controller.zobrist_hash,
+                depth,
+                best[1],
+                EXACT,
+                encode_move(next(iter(best[0]))))
+        return best
+
+    # the negamax search seen from this AI's point of view: 'is_max' if
+    # it is to move. Returns ({best root move}, score) at the root (no
+    # 'move'), ({move}, score) below it
     def minimax(
             self,
-            fen,
             depth,
             alpha,
             beta,
             move,
-            is_max) -> (((int, int), (int, int), str), float):
-
-        if depth == 0 or not self.playing:
-            return ({move}, self.board_state_score(fen))
+            is_max,
+            first=None) -> (((int, int), (int, int), PieceCode), int):
 
+        ply = self._root_depth - depth
         if is_max:
-            max_score = (None, float('-inf'))
-            for child_move, child_fen in self.get_child_states(fen, is_max):
-                if not self.playing:
-                    return None
-                score = self.minimax(child_fen, depth - 1, alpha, beta, child_move, False)
-                if not self.playing:
-                    return score
-                if max_score[1] < score[1]:
-                    max_score = ({child_move}, score[1])
-                # alpha-beta
-                alpha = max(alpha, score[1])
-                if beta <= alpha:
-                    break
-            return max_score
+            score = self.negamax(depth, alpha, beta, ply, first)
         else:
-            min_score = (None, float('inf'))
-            for child_move, child_fen in self.get_child_states(fen, is_max):
-                if not self.playing:
-                    return None
-                score = self.minimax(child_fen, depth - 1, alpha, beta, child_move, True)
-                if not self.playing:
-                    return score
-                if score[1] < min_score[1]:
-                    min_score = ({child_move}, score[1])
-                # alpha-beta
-                beta = min(beta, score[1])
-                if beta <= alpha:
+            score = -self.negamax(depth, -beta, -alpha, ply, first)
+        if move is None:
+            return ({self.root_move} if self.root_move else None, score)
+        return ({move}, score)
+
+    # principal variation search: the first move gets the full window,
+    # the others a null window that only proves them worse, and are
+    # searched again when they aren't. Scores are for the side to move
+    def negamax(self, depth, alpha, beta, ply, first=None, null_allowed=True) -> int:
+        controller = self.controller
+        color = controller.turn
+        is_max = color == self.color
+        self.nodes += 1
+        if self._count_node():
+            return controller.evaluate(color)
+        # a position repeated since the root is a draw: the side that
+        # repeats it can repeat it again
+        if ply > 0 and controller.repetitions() >= 2:
+            return 0
+        if self.tablebases is not None and ply > 0:
+            score = self.tablebase_score(is_max, ply)
+            if score is not None:
+                return score if is_max else -score
+        if depth <= 0:
+            start = time.perf_counter()
+            if is_max:
+                score = self.quiescence(alpha, beta, True, ply)
+            else:
+                score = -self.quiescence(-beta, -alpha, False, ply)
+            self.qsearch_time += time.perf_counter() - start
+            return score
+        if ply == 0:
+            self.root_move = None
+
+        key = controller.zobrist_hash
+        entry = self.transposition_table.probe(key)
+        best_move = first
+        if entry is not None:
+            entry_depth, score, bound, entry_move = entry
+            score = score_from_table(score, ply)
+            if best_move is None:
+                best_move = decode_move(entry_move)
+            # the root always searches, it must return a move
+            if ply > 0 and entry_depth >= depth and (
+                    bound == EXACT
+                    or bound == LOWER and score >= beta
+                    or bound == UPPER and score <= alpha):
+                return score
+        pv_node = beta - alpha > 1
+        in_check = controller.in_check(color)
+        static = None
+        if not in_check and not pv_node:
+            static = controller.evaluate(color)
+
+        # null-move pruning: if passing still fails high, a real move
+        # will too. Not in zugzwang prone positions: no pieces besides
+        # pawns, or just after a null move
+        if self.null_move and null_allowed and static is not None \
+                and depth >= NULL_MOVE_MIN_DEPTH and static >= beta \
+                and abs(beta) < TABLEBASE_WIN - MAX_DEPTH \
+                and self.has_pieces(color):
+            reduction = NULL_MOVE_REDUCTION + depth // 6
+            controller.make_null_move()
+            try:
+                score = -self.negamax(
+                        depth - 1 - reduction,
+                        -beta,
+                        -beta + 1,
+                        ply + 1,
+                        null_allowed=False)
+            finally:
+                controller.unmake_null_move()
+            if self.stopped:
+                return score
+            # deep enough, the cutoff is checked by a reduced search
+            # without null moves
+            if score >= beta and depth >= NULL_MOVE_VERIFY_DEPTH:
+                score = self.negamax(
+                        depth - 1 - reduction,
+                        beta - 1,
+                        beta,
+                        ply,
+                        best_move,
+                        null_allowed=False)
+            if score >= beta:
+                return beta
+
+        # futility pruning: near the leaves, quiet moves can't bring a
+        # score this far below alpha back up
+        futile = self.futility_pruning and static is not None \
+            and depth < len(FUTILITY_MARGINS) \
+            and static + FUTILITY_MARGINS[depth] <= alpha
+
+        original_alpha = alpha
+        opponent = controller.opposite_color(color)
+        best_score = -INFINITE
+        best = None
+        searched = 0
+        with closing(self.get_child_states(is_max, ply, best_move)) as children:
+            for child_move, quiet in children:
+                gives_check = controller.in_check(opponent)
+                if futile and quiet and searched and not gives_check:
+                    best_score = max(best_score, static + FUTILITY_MARGINS[depth])
+                    continue
+                # late move reductions: quiet moves ordered late rarely
+                # turn out best, they are searched shallower first
+                reduction = 0
+                if self.late_move_reductions and quiet \
+                        and searched >= LMR_MIN_MOVES and depth >= LMR_MIN_DEPTH \
+                        and not in_check and not gives_check:
+                    reduction = 1 if searched < LMR_DEEP_MOVES else 2
+                if searched == 0:
+                    score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+                elif self.pvs:
+                    score = -self.negamax(
+                            depth - 1 - reduction,
+                            -alpha - 1,
+                            -alpha,
+                            ply + 1)
+                    if reduction and score > alpha:
+                        score = -self.negamax(depth - 1, -alpha - 1, -alpha, ply + 1)
+                    if alpha < score < beta:
+                        score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+                else:
+                    score = -self.negamax(
+                            depth - 1 - reduction,
+                            -beta,
+                            -alpha,
+                            ply + 1)
+                    if reduction and score > alpha:
+                        score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+                searched += 1
+                if self.stopped:
+                    return max(best_score, score)
+                if best is None or score > best_score:
+                    best_score = score
+                    best = child_move
+                    if ply == 0:
+                        self.root_move = child_move
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    self.cutoffs += 1
+                    if searched == 1:
+                        self.first_move_cutoffs += 1
+                    if quiet:
+                        self.refutation(child_move, is_max, ply, depth)
                     break
-            return min_score
+
+        if best is None:
+            # no legal moves: mated, or a stalemate
+            return -(INFINITE - ply) if in_check else 0
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transposition_table.store(
+                key,
+                depth,
+                score_to_table(best_score, ply),
+                bound,
+                encode_move(best))
+        return best_score
+
+    # whether 'color' has pieces besides its king and pawns
+    def has_pieces(self, color: PieceColor) -> bool:
+        position = self.controller.sync_position()
+        side = COLOR_INDEXES[color]
+        return bool(position.occupancy[side] & ~(
+                position.bitboards[side * 6 + PAWN]
+                | position.bitboards[side * 6 + KING]))
+
+    # the tablebase value of the position, None if it isn't in the tables
+    def tablebase_score(self, is_max, ply) -> int:
+        value = self.tablebases.probe(self.controller.sync_position())
+        if value is None:
+            return None
+        if value == 0:
+            return 0
+        score = TABLEBASE_WIN - ply - value_plies(value)
+        # the value is for the side to move
+        if (value > 0) != is_max:
+            score = -score
+        return score
+
+    # material won by a capture or promotion, None for a quiet move
+    def capture_gain(self, move) -> int:
+        old, new, promotion = move
+        victim = self.controller.piece_info(new)
+        if victim is not None:
+            gain = self.piece_score(victim[0])
+        elif old[1] != new[1] \
+                and self.controller.piece_info(old)[0] == PieceCode.PAWN:
+            # en passant
+            gain = self.piece_score(PieceCode.PAWN)
+        elif promotion is None:
+            return None
+        else:
+            gain = 0
+        if promotion is not None:
+            gain += self.piece_score(promotion) - self.piece_score(PieceCode.PAWN)
+        return gain
+
+    # searches captures only until the position is quiet, so the
+    # evaluation never happens in the middle of an exchange. The side to
+    # move can stand pat on the static score instead of capturing.
+    # When in check every move is searched and standing pat is not an
+    # option
+    def quiescence(self, alpha, beta, is_max, ply=0) -> int:
+        self.qnodes += 1
+        self._count_node()
+        controller = self.controller
+        node_color = [controller.opposite_color(self.color), self.color][is_max]
+        evading = self.quiescence_evasions and controller.in_check(node_color)
+        if evading:
+            stand_pat = None
+            # mated unless a move gets out of check
+            best = -(INFINITE - ply) if is_max else INFINITE - ply
+        else:
+            stand_pat = self.board_state_score()
+            if self.stopped:
+                return stand_pat
+            if is_max:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            best = stand_pat
+
+        moves = []
+        for child_move in controller.generate_legal_moves(node_color):
+            if child_move[2] in (PieceCode.ROOK, PieceCode.BISHOP):
+                continue
+            gain = self.capture_gain(child_move)
+            if gain is None:
+                if not evading:
+                    continue
+                order = -1
+            else:
+                order = self.move_orderer.noisy_score(controller, child_move)
+            moves.append((order, gain, child_move))
+        moves.sort(key=lambda scored: scored[0], reverse=True)
+
+        for _, gain, child_move in moves:
+            # delta pruning
+            if stand_pat is not None and (
+                    is_max and stand_pat + gain + DELTA_MARGIN <= alpha
+                    or not is_max and stand_pat - gain - DELTA_MARGIN >= beta):
+                continue
+            controller.make_move(*child_move)
+            try:
+                score = self.quiescence(alpha, beta, not is_max, ply + 1)
+            finally:
+                controller.unmake_move()
+            if self.stopped:
+                return score
+            if is_max:
+                best = max(best, score)
+                alpha = max(alpha, score)
+            else:
+                best = min(best, score)
+                beta = min(beta, score)
+            if beta <= alpha:
+                break
+        return best
+
+
+# the MinMaxAI of a parallel search worker process
+_worker_ai = None
+
+
+def _init_search_worker(
+        color,
+        settings,
+        table_size_mb,
+        table_name,
+        shared_alpha,
+        stop_flag):
+    global _worker_ai
+    _worker_ai = MinMaxAI(
+            color,
+            settings,
+            SharedTranspositionTable(table_size_mb, table_name))
+    _worker_ai._shared_alpha = shared_alpha
+    _worker_ai._stop_flag = stop_flag
+
+
+# searches one root move with the shared alpha as the lower bound, and
+# raises it when the move is better. Returns (move, score, alpha used,
+# nodes, quiescence nodes), the score being None if the search stopped
+def _search_root_move(position, move, depth, deadline, search_id, age):
+    ai = _worker_ai
+    if ai._search_id != search_id:
+        ai._search_id = search_id
+        ai.move_orderer.new_search()
+    # the table is shared, its age is the game thread's
+    ai.transposition_table.age = age
+    ai.controller.from_bytes(position)
+    # the side to move at the root searches, whatever color the pool
+    # was made for
+    ai.color = ai.controller.turn
+    ai.controller.make_move(*move)
+    ai._deadline = deadline
+    ai._root_depth = depth
+    ai.nodes = 0
+    ai.qnodes = 0
+    ai._stopped = False
+    ai.check_stop()
+    alpha = ai._shared_alpha.value
+    score = ai.minimax(depth - 1, alpha, INFINITE, move, False)
+    if ai.stopped:
+        return move, None, alpha, ai.nodes, ai.qnodes
+    score = score[1]
+    with ai._shared_alpha.get_lock():
+        if score > ai._shared_alpha.value:
+            ai._shared_alpha.value = score
+    return move, score, alpha, ai.nodes, ai.qnodes
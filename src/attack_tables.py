@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+# attack tables computed once at import. Squares follow the controller's
+# (row, column) tuples and bitboards use square = row * 8 + column, so a8
+# is square 0 and h1 is square 63
+
+# (row, column) deltas. The first four are the rook directions and
+# the last four the bishop directions
+DIRECTIONS = [
+        (-1, 0),
+        (0, 1),
+        (1, 0),
+        (0, -1),
+        (-1, 1),
+        (1, 1),
+        (1, -1),
+        (-1, -1)]
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+# rays going to higher square numbers find their first blocker with the
+# lowest set bit, the others with the highest one
+POSITIVE_DIRECTIONS = [dr * 8 + dc > 0 for dr, dc in DIRECTIONS]
+
+KNIGHT_DELTAS = [
+        (2, 1), (2, -1), (-2, -1), (-2, 1),
+        (1, 2), (-1, 2), (1, -2), (-1, -2)]
+
+POSITIONS = [divmod(sq, 8) for sq in range(64)]
+
+
+# squares reached from each square by a piece jumping by one of the
+# deltas, as a list of (row, column) tuples
+def _leaper_targets(deltas):
+    targets = {}
+    for row, column in POSITIONS:
+        targets[(row, column)] = tuple(
+                (row + dr, column + dc)
+                for dr, dc in deltas
+                if 0 <= row + dr <= 7 and 0 <= column + dc <= 7)
+    return targets
+
+
+# squares a slider crosses from each square in one direction, closest
+# first
+def _ray_targets(dr, dc):
+    targets = {}
+    for row, column in POSITIONS:
+        ray = []
+        r, c = row + dr, column + dc
+        while 0 <= r <= 7 and 0 <= c <= 7:
+            ray.append((r, c))
+            r, c = r + dr, c + dc
+        targets[(row, column)] = tuple(ray)
+    return targets
+
+
+def _to_bitboards(targets):
+    table = []
+    for pos in POSITIONS:
+        bb = 0
+        for r, c in targets[pos]:
+            bb |= 1 << (r * 8 + c)
+        table.append(bb)
+    return table
+
+
+KNIGHT_TARGETS = _leaper_targets(KNIGHT_DELTAS)
+KING_TARGETS = _leaper_targets(DIRECTIONS)
+# squares a pawn captures on, by the row direction it moves in
+PAWN_CAPTURE_TARGETS = {
+        -1: _leaper_targets([(-1, -1), (-1, 1)]),
+        1: _leaper_targets([(1, -1), (1, 1)])}
+RAY_TARGETS = [_ray_targets(dr, dc) for dr, dc in DIRECTIONS]
+
+
+# the rays of the given directions from each square, skipping empty ones
+def _slider_targets(directions):
+    return {
+        pos: tuple(
+            RAY_TARGETS[direction][pos]
+            for direction in directions
+            if RAY_TARGETS[direction][pos])
+        for pos in POSITIONS}
+
+
+ROOK_TARGETS = _slider_targets(ROOK_DIRECTIONS)
+BISHOP_TARGETS = _slider_targets(BISHOP_DIRECTIONS)
+QUEEN_TARGETS = _slider_targets(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+
+KNIGHT_ATTACKS = _to_bitboards(KNIGHT_TARGETS)
+KING_ATTACKS = _to_bitboards(KING_TARGETS)
+# squares attacked by a pawn of the given color (white, black) standing on
+# a square
+PAWN_ATTACKS = [
+        _to_bitboards(PAWN_CAPTURE_TARGETS[-1]),
+        _to_bitboards(PAWN_CAPTURE_TARGETS[1])]
+RAYS = [_to_bitboards(targets) for targets in RAY_TARGETS]
+
+
+# BETWEEN[a][b]: squares strictly between two squares on a common line.
+# LINES[a][b]: the whole board line going through both squares
+def _between_and_lines():
+    between = [[0] * 64 for _ in range(64)]
+    lines = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for direction, (dr, dc) in enumerate(DIRECTIONS):
+            opposite = (direction + 2) % 4 + direction // 4 * 4
+            line = RAYS[direction][sq] | RAYS[opposite][sq] | (1 << sq)
+            r, c = POSITIONS[sq]
+            r, c = r + dr, c + dc
+            bb = 0
+            while 0 <= r <= 7 and 0 <= c <= 7:
+                between[sq][r * 8 + c] = bb
+                lines[sq][r * 8 + c] = line
+                bb |= 1 << (r * 8 + c)
+                r, c = r + dr, c + dc
+    return between, lines
+
+
+BETWEEN, LINES = _between_and_lines()
+
+
+# attacks found by walking each ray up to its first blocker. Only used to
+# fill the lookup tables below
+def slider_attacks(sq: int, occupied: int, directions) -> int:
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE_DIRECTIONS[direction]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= RAYS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+
+# for every square and every line through it (file, rank and the two
+# diagonals): the squares whose occupancy matters (the line without the
+# square itself and the board edges) and the attacks along the line for
+# each of their possible occupancies. A slider's attacks are then one
+# lookup per line, indexed by the masked occupancy
+def _line_tables(directions):
+    tables = []
+    for sq in range(64):
+        lines = []
+        for line in directions:
+            mask = 0
+            for direction in line:
+                ray = RAYS[direction][sq]
+                if not ray:
+                    continue
+                if POSITIVE_DIRECTIONS[direction]:
+                    edge = ray.bit_length() - 1
+                else:
+                    edge = (ray & -ray).bit_length() - 1
+                mask |= ray ^ (1 << edge)
+            attacks = {}
+            occupancy = 0
+            while True:
+                attacks[occupancy] = slider_attacks(sq, occupancy, line)
+                occupancy = (occupancy - mask) & mask
+                if occupancy == 0:
+                    break
+            lines.append((mask, attacks))
+        tables.append(tuple(lines))
+    return tables
+
+
+ROOK_LINES = _line_tables([(0, 2), (1, 3)])
+BISHOP_LINES = _line_tables([(4, 6), (5, 7)])
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    (mask_1, attacks_1), (mask_2, attacks_2) = BISHOP_LINES[sq]
+    return attacks_1[occupied & mask_1] | attacks_2[occupied & mask_2]
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    (mask_1, attacks_1), (mask_2, attacks_2) = ROOK_LINES[sq]
+    return attacks_1[occupied & mask_1] | attacks_2[occupied & mask_2]
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
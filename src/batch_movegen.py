@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+import numpy as np
+
+from attack_tables import DIRECTIONS, KNIGHT_DELTAS
+from bitboard import PIECE_CHARS, KIND_CODES, CASTLING_MOVES, POSITION_BYTES
+from bitboard import NO_EN_PASSANT, SQUARE_POS, WHITE, BLACK
+from bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from bitboard import PROMOTION_KINDS, castling_to_bits
+
+# legal move generation for many positions at once. Instead of looping
+# over pieces, moves are generated set-wise: for every direction and
+# distance, one shift of a whole piece bitboard gives the destinations of
+# all those pieces, and every position of the batch is shifted with the
+# same numpy operation. A move is then a (destination bit, square delta)
+# pair, so 'from' is 'to - delta'. The results match 'legal_moves' of
+# 'BitboardPosition' (and so the controller's 'get_legal_moves')
+
+U64 = np.uint64
+FULL = U64((1 << 64) - 1)
+ZERO = U64(0)
+# square -> bit, with NO_EN_PASSANT mapping to an empty bitboard
+BITS = np.array([1 << sq for sq in range(64)] + [0], dtype=U64)
+ROWS = [U64(0xFF << (row * 8)) for row in range(8)]
+
+
+def _file(column: int) -> int:
+    return sum(1 << (row * 8 + column) for row in range(8))
+
+
+# shifting sideways moves bits across the board edge into the next row,
+# so the columns they would wrap into are cleared after the shift
+COLUMN_MASKS = {
+        -2: U64(((1 << 64) - 1) ^ _file(6) ^ _file(7)),
+        -1: U64(((1 << 64) - 1) ^ _file(7)),
+        0: FULL,
+        1: U64(((1 << 64) - 1) ^ _file(0)),
+        2: U64(((1 << 64) - 1) ^ _file(0) ^ _file(1))}
+
+# the four lines a piece can be pinned on: file, rank and both diagonals
+LINE_OF_DIRECTION = [d % 2 + d // 4 * 2 for d in range(len(DIRECTIONS))]
+FILE_LINE = 0
+
+# positions are generated in chunks, bounding the memory used to unpack
+# the destination bitboards of every position
+CHUNK_SIZE = 4096
+
+
+def _shift(bb, dr: int, dc: int):
+    delta = dr * 8 + dc
+    if delta > 0:
+        bb = bb << U64(delta)
+    else:
+        bb = bb >> U64(-delta)
+    return bb & COLUMN_MASKS[dc]
+
+
+def _leaper_attacks(bb, deltas):
+    attacks = np.zeros_like(bb)
+    for dr, dc in deltas:
+        attacks |= _shift(bb, dr, dc)
+    return attacks
+
+
+def _pawn_attacks(bb, color: int):
+    dr = [-1, 1][color]
+    return _shift(bb, dr, -1) | _shift(bb, dr, 1)
+
+
+# squares reached sliding from 'sources' in one direction, up to and
+# including the first square that isn't empty
+def _fill(sources, dr: int, dc: int, empty):
+    attacks = np.zeros_like(sources)
+    bb = sources
+    for _ in range(7):
+        bb = _shift(bb, dr, dc)
+        attacks |= bb
+        bb = bb & empty
+        if not bb.any():
+            break
+    return attacks
+
+
+# a batch of positions as stacked bitboards, one column per position
+class PositionBatch():
+    def __init__(self, bitboards, side, castling, en_passant):
+        # (12, n) piece bitboards, indexed like BitboardPosition's
+        self.bitboards = bitboards
+        # (n,) side to move, castling bits and en passant square (64 for
+        # none)
+        self.side = side
+        self.castling = castling
+        self.en_passant = en_passant
+
+    def __len__(self):
+        return len(self.side)
+
+    # 'board' is an (n, 64) array of piece indexes, -1 for empty squares
+    @classmethod
+    def from_boards(cls, board, side, castling, en_passant):
+        bitboards = np.empty((12, len(board)), dtype=U64)
+        for piece in range(12):
+            bits = np.packbits(board == piece, axis=1, bitorder='little')
+            bitboards[piece] = bits.view('<u8')[:, 0]
+        return cls(
+                bitboards,
+                np.asarray(side, dtype=np.uint8),
+                np.asarray(castling, dtype=np.uint8),
+                np.asarray(en_passant, dtype=np.uint8))
+
+    @classmethod
+    def from_fens(cls, fens):
+        fens = list(fens)
+        board = np.full((len(fens), 64), -1, dtype=np.int8)
+        side = []
+        castling = []
+        en_passant = []
+        for i, fen in enumerate(fens):
+            placement, turn, rights, ep, _ = fen.split(' ', 4)
+            sq = 0
+            for c in placement:
+                if c.isdigit():
+                    sq += int(c)
+                elif c != '/':
+                    board[i, sq] = PIECE_CHARS.index(c)
+                    sq += 1
+            side.append(WHITE if turn == 'w' else BLACK)
+            castling.append(castling_to_bits(rights))
+            if ep == '-':
+                en_passant.append(NO_EN_PASSANT)
+            else:
+                en_passant.append((8 - int(ep[1])) * 8 + ord(ep[0]) - ord('a'))
+        return cls.from_boards(board, side, castling, en_passant)
+
+    # positions packed by 'BitboardPosition.to_bytes', either as a list
+    # of bytes or as an (n, POSITION_BYTES) uint8 array
+    @classmethod
+    def from_bytes(cls, packed):
+        if not isinstance(packed, np.ndarray):
+            packed = np.frombuffer(b"".join(packed), dtype=np.uint8)
+        packed = packed.reshape(-1, POSITION_BYTES)
+        occupied = np.unpackbits(packed[:, :8], axis=1, bitorder='little')
+        nibbles = np.empty((len(packed), 32), dtype=np.int8)
+        nibbles[:, 0::2] = packed[:, 8:24] & 15
+        nibbles[:, 1::2] = packed[:, 8:24] >> 4
+        # the k-th occupied square holds the k-th nibble
+        order = np.clip(np.cumsum(occupied, axis=1) - 1, 0, 31)
+        board = np.where(
+                occupied == 1,
+                np.take_along_axis(nibbles, order, axis=1),
+                -1)
+        return cls.from_boards(
+                board,
+                packed[:, 24] & 1,
+                packed[:, 24] >> 1,
+                packed[:, 25])
+
+    def take(self, indexes):
+        return PositionBatch(
+                self.bitboards[:, indexes],
+                self.side[indexes],
+                self.castling[indexes],
+                self.en_passant[indexes])
+
+
+def _as_batch(positions) -> PositionBatch:
+    if isinstance(positions, PositionBatch):
+        return positions
+    if isinstance(positions, np.ndarray):
+        return PositionBatch.from_bytes(positions)
+    positions = list(positions)
+    if positions and isinstance(positions[0], str):
+        return PositionBatch.from_fens(positions)
+    return PositionBatch.from_bytes(positions)
+
+
+# destination bitboards of the legal moves of 'color', for a batch where
+# that color is to move in every position. Appends (destinations, delta,
+# promotion kind) to 'moves'
+def _color_moves(batch: PositionBatch, color: int, moves: list):
+    bbs = batch.bitboards
+    base = color * 6
+    enemy = color ^ 1
+    enemy_base = enemy * 6
+    us = np.bitwise_or.reduce(bbs[base:base + 6])
+    them = np.bitwise_or.reduce(bbs[enemy_base:enemy_base + 6])
+    occupied = us | them
+    empty = ~occupied
+    king = bbs[base + KING]
+    enemy_lines = bbs[enemy_base + ROOK] | bbs[enemy_base + QUEEN]
+    enemy_diagonals = bbs[enemy_base + BISHOP] | bbs[enemy_base + QUEEN]
+
+    # squares attacked by the enemy, seeing through our king so it can't
+    # step back along a checking line
+    danger = _pawn_attacks(bbs[enemy_base + PAWN], enemy) \
+        | _leaper_attacks(bbs[enemy_base + KNIGHT], KNIGHT_DELTAS) \
+        | _leaper_attacks(bbs[enemy_base + KING], DIRECTIONS)
+    for direction, (dr, dc) in enumerate(DIRECTIONS):
+        sliders = enemy_lines if direction < 4 else enemy_diagonals
+        danger |= _fill(sliders, dr, dc, empty | king)
+
+    # looking out from the king: checking sliders and the squares that
+    # block them, and our pieces pinned to one of the four lines
+    checkers = _leaper_attacks(king, KNIGHT_DELTAS) & bbs[enemy_base + KNIGHT]
+    checkers |= _pawn_attacks(king, color) & bbs[enemy_base + PAWN]
+    blocks = np.zeros_like(king)
+    pinned = [np.zeros_like(king) for _ in range(4)]
+    for direction, (dr, dc) in enumerate(DIRECTIONS):
+        sliders = enemy_lines if direction < 4 else enemy_diagonals
+        ray = _fill(king, dr, dc, empty)
+        hits = ray & sliders
+        checkers |= hits
+        blocks |= np.where(hits != ZERO, ray, ZERO)
+        blocker = ray & us
+        pinner = _fill(blocker, dr, dc, empty) & sliders
+        pinned[LINE_OF_DIRECTION[direction]] |= \
+            np.where(pinner != ZERO, blocker, ZERO)
+    all_pinned = pinned[0] | pinned[1] | pinned[2] | pinned[3]
+
+    # without a check every destination is fine, otherwise moves must
+    # capture the checker or block its line. In double check only the
+    # king can move
+    evasions = np.where(checkers == ZERO, FULL, checkers | blocks)
+    evasions = np.where(checkers & (checkers - U64(1)) != ZERO, ZERO, evasions)
+    targets = ~us & evasions
+
+    # king steps and castling
+    for dr, dc in DIRECTIONS:
+        moves.append((
+            _shift(king, dr, dc) & ~us & ~danger,
+            dr * 8 + dc,
+            0))
+    for right, king_sq, to, corner, _, between, crossed in CASTLING_MOVES:
+        if king_sq // 8 != [7, 0][color]:
+            continue
+        between_bb = U64(sum(1 << sq for sq in between))
+        safe_bb = U64((1 << king_sq) | (1 << crossed) | (1 << to))
+        allowed = (batch.castling & right != 0) \
+            & (king & U64(1 << king_sq) != ZERO) \
+            & (bbs[base + ROOK] & U64(1 << corner) != ZERO) \
+            & (occupied & between_bb == ZERO) \
+            & (danger & safe_bb == ZERO) \
+            & (checkers == ZERO)
+        moves.append((
+            np.where(allowed, U64(1 << to), ZERO),
+            to - king_sq,
+            0))
+
+    knights = bbs[base + KNIGHT] & ~all_pinned
+    for dr, dc in KNIGHT_DELTAS:
+        moves.append((_shift(knights, dr, dc) & targets, dr * 8 + dc, 0))
+
+    # a pinned slider may only move along the line it is pinned on
+    lines = bbs[base + ROOK] | bbs[base + QUEEN]
+    diagonals = bbs[base + BISHOP] | bbs[base + QUEEN]
+    for direction, (dr, dc) in enumerate(DIRECTIONS):
+        sliders = lines if direction < 4 else diagonals
+        bb = sliders & (~all_pinned | pinned[LINE_OF_DIRECTION[direction]])
+        for distance in range(1, 8):
+            bb = _shift(bb, dr, dc)
+            moves.append((bb & targets, (dr * 8 + dc) * distance, 0))
+            bb = bb & empty
+            if not bb.any():
+                break
+
+    _pawn_moves(batch, color, us, them, king, all_pinned, pinned,
+                evasions, moves)
+
+
+def _pawn_moves(batch, color, us, them, king, all_pinned, pinned,
+                evasions, moves):
+    bbs = batch.bitboards
+    enemy = color ^ 1
+    enemy_base = enemy * 6
+    pawns = bbs[color * 6 + PAWN]
+    occupied = us | them
+    empty = ~occupied
+    forward = [-1, 1][color]
+    promotion_row = ROWS[[0, 7][color]]
+    # row a pawn reaches with a single step from its start row
+    third_row = ROWS[[5, 2][color]]
+
+    def add(destinations, delta):
+        promotions = destinations & promotion_row
+        moves.append((destinations ^ promotions, delta, 0))
+        if promotions.any():
+            for kind in PROMOTION_KINDS:
+                moves.append((promotions, delta, kind))
+
+    pushers = pawns & (~all_pinned | pinned[FILE_LINE])
+    one = _shift(pushers, forward, 0) & empty
+    two = _shift(one & third_row, forward, 0) & empty
+    add(one & evasions, forward * 8)
+    add(two & evasions, forward * 16)
+
+    for dc in (-1, 1):
+        line = LINE_OF_DIRECTION[DIRECTIONS.index((forward, dc))]
+        capturers = pawns & (~all_pinned | pinned[line])
+        add(_shift(capturers, forward, dc) & them & evasions,
+            forward * 8 + dc)
+
+    # en passant also removes the captured pawn, which may open a line to
+    # the king, so each one is checked by looking at the king's
+    # attackers after the capture
+    en_passant = BITS[batch.en_passant] & empty
+    captured = _shift(en_passant, -forward, 0) & bbs[enemy_base + PAWN]
+    en_passant = np.where(captured != ZERO, en_passant, ZERO)
+    if not en_passant.any():
+        return
+    enemy_lines = bbs[enemy_base + ROOK] | bbs[enemy_base + QUEEN]
+    enemy_diagonals = bbs[enemy_base + BISHOP] | bbs[enemy_base + QUEEN]
+    for dc in (-1, 1):
+        to = _shift(pawns, forward, dc) & en_passant
+        if not to.any():
+            continue
+        frm = _shift(to, -forward, -dc)
+        taken = _shift(to, -forward, 0)
+        empty_after = ~((occupied ^ frm ^ taken) | to)
+        attackers = _leaper_attacks(king, KNIGHT_DELTAS) \
+            & bbs[enemy_base + KNIGHT]
+        attackers |= _pawn_attacks(king, color) \
+            & (bbs[enemy_base + PAWN] ^ taken)
+        attackers |= _leaper_attacks(king, DIRECTIONS) \
+            & bbs[enemy_base + KING]
+        for direction, (dr, dc_) in enumerate(DIRECTIONS):
+            sliders = enemy_lines if direction < 4 else enemy_diagonals
+            attackers |= _fill(king, dr, dc_, empty_after) & sliders
+        moves.append((
+            np.where(attackers == ZERO, to, ZERO),
+            forward * 8 + dc,
+            0))
+
+
+def _chunk_moves(batch: PositionBatch):
+    indexes = []
+    frms = []
+    tos = []
+    promotions = []
+    for color in (WHITE, BLACK):
+        positions = np.flatnonzero(batch.side == color)
+        if not len(positions):
+            continue
+        moves = []
+        _color_moves(batch.take(positions), color, moves)
+        moves = [move for move in moves if move[0].any()]
+        if not moves:
+            continue
+        destinations = np.stack([move[0] for move in moves])
+        deltas = np.array([move[1] for move in moves], dtype=np.int16)
+        kinds = np.array([move[2] for move in moves], dtype=np.int8)
+        # only the destination bitboards that aren't empty are unpacked
+        move, position = np.nonzero(destinations)
+        words = destinations[move, position].astype('<u8')
+        bits = np.unpackbits(
+                words.view(np.uint8).reshape(-1, 8),
+                axis=1,
+                bitorder='little')
+        word, to = np.nonzero(bits)
+        move = move[word]
+        position = position[word]
+        indexes.append(positions[position])
+        tos.append(to.astype(np.int16))
+        frms.append(to - deltas[move])
+        promotions.append(kinds[move])
+    return indexes, frms, tos, promotions
+
+
+# for every position of the batch, whether the king of 'color' is
+# attacked
+def batch_in_check(positions, color: int):
+    batch = _as_batch(positions)
+    bbs = batch.bitboards
+    enemy_base = (color ^ 1) * 6
+    king = bbs[color * 6 + KING]
+    empty = ~np.bitwise_or.reduce(bbs)
+    enemy_lines = bbs[enemy_base + ROOK] | bbs[enemy_base + QUEEN]
+    enemy_diagonals = bbs[enemy_base + BISHOP] | bbs[enemy_base + QUEEN]
+    attackers = _leaper_attacks(king, KNIGHT_DELTAS) & bbs[enemy_base + KNIGHT]
+    attackers |= _pawn_attacks(king, color) & bbs[enemy_base + PAWN]
+    attackers |= _leaper_attacks(king, DIRECTIONS) & bbs[enemy_base + KING]
+    for direction, (dr, dc) in enumerate(DIRECTIONS):
+        sliders = enemy_lines if direction < 4 else enemy_diagonals
+        attackers |= _fill(king, dr, dc, empty) & sliders
+    return attackers != ZERO
+
+
+# legal moves of the side to move in every position, as four arrays:
+# position index, from square, to square and promotion kind (0 for none),
+# sorted by position, from and to square
+def batch_legal_moves(positions):
+    batch = _as_batch(positions)
+    indexes = []
+    frms = []
+    tos = []
+    promotions = []
+    for start in range(0, len(batch), CHUNK_SIZE):
+        chunk = batch.take(slice(start, start + CHUNK_SIZE))
+        i, f, t, p = _chunk_moves(chunk)
+        indexes.extend(index + start for index in i)
+        frms.extend(f)
+        tos.extend(t)
+        promotions.extend(p)
+    if not indexes:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    indexes = np.concatenate(indexes)
+    frms = np.concatenate(frms).astype(np.int64)
+    tos = np.concatenate(tos).astype(np.int64)
+    promotions = np.concatenate(promotions).astype(np.int64)
+    order = np.lexsort((promotions, tos, frms, indexes))
+    return indexes[order], frms[order], tos[order], promotions[order]
+
+
+# same moves as 'generate_legal_moves' of the controller: a list of
+# (old, new, promotion) tuples for every position
+def legal_move_lists(positions) -> [[((int, int), (int, int), any)]]:
+    batch = _as_batch(positions)
+    indexes, frms, tos, promotions = batch_legal_moves(batch)
+    codes = [None] + KIND_CODES[1:]
+    result = [[] for _ in range(len(batch))]
+    for index, frm, to, promotion in zip(
+            indexes.tolist(),
+            frms.tolist(),
+            tos.tolist(),
+            promotions.tolist()):
+        result[index].append(
+                (SQUARE_POS[frm], SQUARE_POS[to], codes[promotion]))
+    return result
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+
+from ai import MinMaxAI, SEARCH_TECHNIQUES
+from search_limits import SearchLimits
+from perft import REFERENCE_POSITIONS
+from piece import PieceColor
+
+
+def _color(fen: str) -> PieceColor:
+    return PieceColor.WHITE if fen.split(' ')[1] == 'w' else PieceColor.BLACK
+
+
+# searches every position to a fixed depth with a fresh MinMaxAI and
+# returns the total (nodes, seconds). The worker pool is started before
+# the clock so only the search is timed
+def run(fens: [str], depth: int, workers: int, settings: dict = None) -> (int, float):
+    nodes = 0
+    elapsed = 0.0
+    for fen in fens:
+        ai = MinMaxAI(_color(fen), dict(
+            settings or {},
+            search_depth=depth,
+            search_workers=workers))
+        try:
+            if workers > 1:
+                ai._worker_pool()
+            start = time.perf_counter()
+            ai.make_move(None, None, None, None, fen)
+            elapsed += time.perf_counter() - start
+            nodes += ai.nodes + ai.qnodes
+        finally:
+            ai.close()
+    return nodes, elapsed
+
+
+# the average depth completed on every position in 'move_time' seconds
+def reached_depth(fens: [str], move_time: float, settings: dict = None) -> float:
+    depths = 0
+    for fen in fens:
+        ai = MinMaxAI(_color(fen), dict(settings or {}))
+        try:
+            ai.controller.fen = fen
+            ai.iterative_deepening(SearchLimits(move_time=move_time))
+            depths += ai.completed_depth
+        finally:
+            ai.close()
+    return depths / len(fens)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description="Time the search on the perft reference positions.")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument(
+            "--workers",
+            default="1,2,4",
+            help="comma separated worker counts to compare")
+    parser.add_argument(
+            "--techniques",
+            action="store_true",
+            help="compare the search with each technique switched off")
+    parser.add_argument(
+            "--movetime",
+            type=float,
+            help="with --techniques, compare the depth reached in this many "
+            "seconds instead")
+    args = parser.parse_args(argv)
+
+    fens = [fen for _, fen, _ in REFERENCE_POSITIONS]
+    if args.techniques:
+        configurations = [("all", {})]
+        configurations += [
+            ("no " + technique, {technique: False})
+            for technique in SEARCH_TECHNIQUES]
+        configurations.append((
+            "none",
+            {technique: False for technique in SEARCH_TECHNIQUES}))
+        for name, settings in configurations:
+            if args.movetime:
+                depth = reached_depth(fens, args.movetime, settings)
+                print("{}: depth {:.2f}".format(name, depth))
+            else:
+                nodes, elapsed = run(fens, args.depth, 1, settings)
+                print("{}: {} nodes {:.3f}s".format(name, nodes, elapsed))
+        return 0
+
+    base = None
+    for workers in [int(count) for count in args.workers.split(',')]:
+        nodes, elapsed = run(fens, args.depth, workers)
+        base = base or elapsed
+        print("workers {}: {} nodes {:.3f}s {:.0f} nps speedup {:.2f}".format(
+            workers,
+            nodes,
+            elapsed,
+            nodes / max(elapsed, 1e-9),
+            base / max(elapsed, 1e-9)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+import random
+import struct
+
+from piece import PieceColor, PieceCode
+from attack_tables import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS
+from attack_tables import BETWEEN, LINES
+from attack_tables import bishop_attacks, rook_attacks, queen_attacks
+from evaluation import MIDDLEGAME_SCORES, ENDGAME_SCORES, PIECE_PHASES
+from evaluation import tapered
+
+# squares follow the controller's (row, column) tuples:
+# square = row * 8 + column, so a8 is square 0 and h1 is square 63.
+# bit n of a bitboard is set when square n is part of the set
+WHITE = 0
+BLACK = 1
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+
+# a piece is stored as color * 6 + kind, so there are 12 piece bitboards
+KIND_CODES = [
+        PieceCode.PAWN,
+        PieceCode.KNIGHT,
+        PieceCode.BISHOP,
+        PieceCode.ROOK,
+        PieceCode.QUEEN,
+        PieceCode.KING]
+CODE_KINDS = {code: kind for kind, code in enumerate(KIND_CODES)}
+COLORS = [PieceColor.WHITE, PieceColor.BLACK]
+COLOR_INDEXES = {PieceColor.WHITE: WHITE, PieceColor.BLACK: BLACK}
+PIECE_INFO = [(code, color) for color in COLORS for code in KIND_CODES]
+PIECE_CHARS = "PNBRQKpnbrqk"
+
+# castling rights, one bit for each character of "KQkq"
+WHITE_KING_SIDE = 1
+WHITE_QUEEN_SIDE = 2
+BLACK_KING_SIDE = 4
+BLACK_QUEEN_SIDE = 8
+CASTLING_CHARS = "KQkq"
+
+FULL = (1 << 64) - 1
+SQUARE_POS = [divmod(sq, 8) for sq in range(64)]
+SQUARE_BITS = [1 << sq for sq in range(64)]
+
+# binary position: occupancy bitboard, the piece index of each occupied
+# square (4 bits each, in square order), side and castling bits, en
+# passant square (64 for none), halfmoves and fullmoves
+POSITION_STRUCT = struct.Struct("<Q16sBBHH")
+POSITION_BYTES = POSITION_STRUCT.size
+NO_EN_PASSANT = 64
+
+
+def square(pos: (int, int)) -> int:
+    return pos[0] * 8 + pos[1]
+
+
+def move_from(move: int) -> int:
+    return move & 63
+
+
+def move_to(move: int) -> int:
+    return (move >> 6) & 63
+
+
+def move_promotion(move: int) -> int:
+    return move >> 12
+
+
+def encode_move(frm: int, to: int, promotion: int = 0) -> int:
+    return frm | (to << 6) | (promotion << 12)
+
+
+def lsb(bb: int) -> int:
+    return (bb & -bb).bit_length() - 1
+
+
+# zobrist keys: a position's hash is the xor of the keys of its pieces,
+# its castling rights, the en passant file (only when a pawn can actually
+# take en passant) and the side key when black is to move
+def _zobrist_keys():
+    rng = random.Random(0x5eed)
+    pieces = [[rng.getrandbits(64) for _ in range(64)] for _ in range(12)]
+    rights = [rng.getrandbits(64) for _ in range(4)]
+    castling = []
+    for bits in range(16):
+        key = 0
+        for i in range(4):
+            if bits & (1 << i):
+                key ^= rights[i]
+        castling.append(key)
+    en_passant = [rng.getrandbits(64) for _ in range(8)]
+    return pieces, castling, en_passant, rng.getrandbits(64)
+
+
+ZOBRIST_PIECES, ZOBRIST_CASTLING, ZOBRIST_EN_PASSANT, ZOBRIST_SIDE = \
+    _zobrist_keys()
+
+# how a pawn of each color moves through square numbers
+PAWN_FORWARD = [-8, 8]
+PAWN_START_ROWS = [6, 1]
+PAWN_PROMOTION_ROWS = [0, 7]
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# king start square and, for each side, the rook corner, the squares that
+# must be empty and the square the king crosses
+CASTLING_MOVES = [
+        (WHITE_KING_SIDE, 60, 62, 63, 61, (61, 62), 61),
+        (WHITE_QUEEN_SIDE, 60, 58, 56, 59, (57, 58, 59), 59),
+        (BLACK_KING_SIDE, 4, 6, 7, 5, (5, 6), 5),
+        (BLACK_QUEEN_SIDE, 4, 2, 0, 3, (1, 2, 3), 3)]
+
+# rights lost when a piece moves from or to a square
+CASTLING_MASKS = [FULL] * 64
+CASTLING_MASKS[60] &= ~(WHITE_KING_SIDE | WHITE_QUEEN_SIDE)
+CASTLING_MASKS[63] &= ~WHITE_KING_SIDE
+CASTLING_MASKS[56] &= ~WHITE_QUEEN_SIDE
+CASTLING_MASKS[4] &= ~(BLACK_KING_SIDE | BLACK_QUEEN_SIDE)
+CASTLING_MASKS[7] &= ~BLACK_KING_SIDE
+CASTLING_MASKS[0] &= ~BLACK_QUEEN_SIDE
+
+
+def castling_to_bits(castling: str) -> int:
+    bits = 0
+    for i, c in enumerate(CASTLING_CHARS):
+        if c in castling:
+            bits |= 1 << i
+    return bits
+
+
+def castling_to_str(bits: int) -> str:
+    castling = "".join(
+            c for i, c in enumerate(CASTLING_CHARS) if bits & (1 << i))
+    return castling or "-"
+
+
+# position core made of twelve piece bitboards, the occupancy of each color
+# and a square -> piece lookup table, so both "what attacks this square?"
+# and "what is on this square?" are a handful of integer operations
+class BitboardPosition():
+    def __init__(self):
+        self.side = WHITE
+        self.castling = 0
+        self.en_passant = None
+        self.halfmoves = 0
+        self.fullmoves = 0
+        self.clear()
+
+    def clear(self):
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        self.board = [None] * 64
+        self.history = []
+        self.hash = 0
+        self.en_passant_hash = 0
+        self.hash = self.compute_hash()
+        # piece-square sums kept up to date by put_piece and remove_piece
+        self.middlegame = 0
+        self.endgame = 0
+        self.phase = 0
+
+    def copy(self):
+        position = BitboardPosition.__new__(BitboardPosition)
+        position.bitboards = self.bitboards.copy()
+        position.occupancy = self.occupancy.copy()
+        position.occupied = self.occupied
+        position.board = self.board.copy()
+        position.history = []
+        position.side = self.side
+        position.castling = self.castling
+        position.en_passant = self.en_passant
+        position.halfmoves = self.halfmoves
+        position.fullmoves = self.fullmoves
+        position.hash = self.hash
+        position.en_passant_hash = self.en_passant_hash
+        position.middlegame = self.middlegame
+        position.endgame = self.endgame
+        position.phase = self.phase
+        return position
+
+    def put_piece(self, sq: int, piece: int):
+        bit = SQUARE_BITS[sq]
+        self.bitboards[piece] |= bit
+        self.occupancy[piece // 6] |= bit
+        self.occupied |= bit
+        self.board[sq] = piece
+        self.hash ^= ZOBRIST_PIECES[piece][sq]
+        self.middlegame += MIDDLEGAME_SCORES[piece][sq]
+        self.endgame += ENDGAME_SCORES[piece][sq]
+        self.phase += PIECE_PHASES[piece]
+
+    def remove_piece(self, sq: int):
+        piece = self.board[sq]
+        if piece is None:
+            return None
+        bit = SQUARE_BITS[sq]
+        self.bitboards[piece] ^= bit
+        self.occupancy[piece // 6] ^= bit
+        self.occupied ^= bit
+        self.board[sq] = None
+        self.hash ^= ZOBRIST_PIECES[piece][sq]
+        self.middlegame -= MIDDLEGAME_SCORES[piece][sq]
+        self.endgame -= ENDGAME_SCORES[piece][sq]
+        self.phase -= PIECE_PHASES[piece]
+        return piece
+
+    # tapered material and piece-square score, from white's point of view
+    def evaluate(self) -> int:
+        return tapered(self.middlegame, self.endgame, self.phase)
+
+    # the same score computed from scratch
+    def compute_evaluation(self) -> int:
+        middlegame = 0
+        endgame = 0
+        phase = 0
+        for sq, piece in enumerate(self.board):
+            if piece is not None:
+                middlegame += MIDDLEGAME_SCORES[piece][sq]
+                endgame += ENDGAME_SCORES[piece][sq]
+                phase += PIECE_PHASES[piece]
+        return tapered(middlegame, endgame, phase)
+
+    # the en passant file only counts when the side to move has a pawn
+    # that can take it, so positions that only differ by an unusable en
+    # passant square are the same position
+    def _en_passant_hash(self) -> int:
+        ep = self.en_passant
+        if ep is None:
+            return 0
+        side = self.side
+        if PAWN_ATTACKS[side ^ 1][ep] & self.bitboards[side * 6 + PAWN]:
+            return ZOBRIST_EN_PASSANT[ep & 7]
+        return 0
+
+    def compute_hash(self) -> int:
+        h = 0
+        board = self.board
+        for sq in range(64):
+            piece = board[sq]
+            if piece is not None:
+                h ^= ZOBRIST_PIECES[piece][sq]
+        h ^= ZOBRIST_CASTLING[self.castling]
+        self.en_passant_hash = self._en_passant_hash()
+        h ^= self.en_passant_hash
+        if self.side == BLACK:
+            h ^= ZOBRIST_SIDE
+        return h
+
+    # changes the non-piece part of the position, updating the hash
+    def set_state(self, side: int, castling: int, en_passant: int):
+        h = self.hash ^ self.en_passant_hash
+        if side != self.side:
+            h ^= ZOBRIST_SIDE
+        h ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+        self.side = side
+        self.castling = castling
+        self.en_passant = en_passant
+        self.en_passant_hash = self._en_passant_hash()
+        self.hash = h ^ self.en_passant_hash
+
+    def piece_info(self, pos: (int, int)):
+        piece = self.board[pos[0] * 8 + pos[1]]
+        if piece is None:
+            return None
+        return PIECE_INFO[piece]
+
+    def king_square(self, color: int):
+        king = self.bitboards[color * 6 + KING]
+        if not king:
+            return None
+        return (king & -king).bit_length() - 1
+
+    def attackers(self, sq: int, by_color: int, occupied: int = None) -> int:
+        if occupied is None:
+            occupied = self.occupied
+        bbs = self.bitboards
+        base = by_color * 6
+        attackers = PAWN_ATTACKS[by_color ^ 1][sq] & bbs[base + PAWN]
+        attackers |= KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT]
+        attackers |= KING_ATTACKS[sq] & bbs[base + KING]
+        queens = bbs[base + QUEEN]
+        diagonal = bbs[base + BISHOP] | queens
+        if diagonal:
+            attackers |= bishop_attacks(sq, occupied) & diagonal
+        straight = bbs[base + ROOK] | queens
+        if straight:
+            attackers |= rook_attacks(sq, occupied) & straight
+        return attackers
+
+    # "keep" masks out pieces that were just captured in a trial move
+    def is_square_attacked(
+            self,
+            sq: int,
+            by_color: int,
+            occupied: int = None,
+            keep: int = FULL) -> bool:
+        if occupied is None:
+            occupied = self.occupied
+        bbs = self.bitboards
+        base = by_color * 6
+        if KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT] & keep:
+            return True
+        if PAWN_ATTACKS[by_color ^ 1][sq] & bbs[base + PAWN] & keep:
+            return True
+        if KING_ATTACKS[sq] & bbs[base + KING]:
+            return True
+        queens = bbs[base + QUEEN]
+        diagonal = (bbs[base + BISHOP] | queens) & keep
+        if diagonal and bishop_attacks(sq, occupied) & diagonal:
+            return True
+        straight = (bbs[base + ROOK] | queens) & keep
+        if straight and rook_attacks(sq, occupied) & straight:
+            return True
+        return False
+
+    def attacks_by(self, color: int, occupied: int = None) -> int:
+        if occupied is None:
+            occupied = self.occupied
+        bbs = self.bitboards
+        base = color * 6
+        attacks = 0
+        for kind, table in (
+                (PAWN, PAWN_ATTACKS[color]),
+                (KNIGHT, KNIGHT_ATTACKS),
+                (KING, KING_ATTACKS)):
+            bb = bbs[base + kind]
+            while bb:
+                bit = bb & -bb
+                attacks |= table[bit.bit_length() - 1]
+                bb ^= bit
+        for kind, slider in (
+                (BISHOP, bishop_attacks),
+                (ROOK, rook_attacks),
+                (QUEEN, queen_attacks)):
+            bb = bbs[base + kind]
+            while bb:
+                bit = bb & -bb
+                attacks |= slider(bit.bit_length() - 1, occupied)
+                bb ^= bit
+        return attacks
+
+    def in_check(self, color: int) -> bool:
+        king = self.king_square(color)
+        if king is None:
+            return False
+        return self.is_square_attacked(king, color ^ 1)
+
+    def _piece_moves(self, frm: int, piece: int, moves: list):
+        color = piece // 6
+        kind = piece - color * 6
+        occupied = self.occupied
+        targets = ~self.occupancy[color] & FULL
+
+        if kind == PAWN:
+            self._pawn_moves(frm, color, moves)
+            return
+        if kind == KNIGHT:
+            attacks = KNIGHT_ATTACKS[frm]
+        elif kind == BISHOP:
+            attacks = bishop_attacks(frm, occupied)
+        elif kind == ROOK:
+            attacks = rook_attacks(frm, occupied)
+        elif kind == QUEEN:
+            attacks = queen_attacks(frm, occupied)
+        else:
+            attacks = KING_ATTACKS[frm]
+            self._castling_moves(frm, color, moves)
+
+        attacks &= targets
+        while attacks:
+            bit = attacks & -attacks
+            moves.append(frm | ((bit.bit_length() - 1) << 6))
+            attacks ^= bit
+
+    def _pawn_moves(self, frm: int, color: int, moves: list):
+        occupied = self.occupied
+        forward = PAWN_FORWARD[color]
+        row = frm >> 3
+        promotion_row = PAWN_PROMOTION_ROWS[color]
+        destinations = []
+
+        one = frm + forward
+        if not occupied & SQUARE_BITS[one]:
+            destinations.append(one)
+            two = one + forward
+            if row == PAWN_START_ROWS[color] and \
+                    not occupied & SQUARE_BITS[two]:
+                destinations.append(two)
+
+        captures = PAWN_ATTACKS[color][frm] & self.occupancy[color ^ 1]
+        while captures:
+            bit = captures & -captures
+            destinations.append(bit.bit_length() - 1)
+            captures ^= bit
+
+        ep = self.en_passant
+        if ep is not None and PAWN_ATTACKS[color][frm] & SQUARE_BITS[ep]:
+            captured = self.board[ep - forward]
+            if captured == (color ^ 1) * 6 + PAWN and self.board[ep] is None:
+                destinations.append(ep)
+
+        for to in destinations:
+            if to >> 3 == promotion_row:
+                for promotion in PROMOTION_KINDS:
+                    moves.append(frm | (to << 6) | (promotion << 12))
+            else:
+                moves.append(frm | (to << 6))
+
+    # 'danger' are the squares attacked by the enemy, if already known
+    def _castling_moves(
+            self,
+            frm: int,
+            color: int,
+            moves: list,
+            danger: int = None):
+        castling = self.castling
+        if not castling:
+            return
+        base = color * 6
+        enemy = color ^ 1
+        for right, king, to, corner, _, between, crossed in CASTLING_MOVES:
+            if not castling & right or frm != king:
+                continue
+            if self.board[corner] != base + ROOK:
+                continue
+            if any(self.board[sq] is not None for sq in between):
+                continue
+            # you can't castle out of check or through check
+            if danger is not None:
+                if danger & (SQUARE_BITS[king] | SQUARE_BITS[crossed]
+                             | SQUARE_BITS[to]):
+                    continue
+            elif self.is_square_attacked(king, enemy) or \
+                    self.is_square_attacked(crossed, enemy):
+                continue
+            moves.append(frm | (to << 6))
+
+    def pseudo_legal_moves(self, color: int) -> list:
+        moves = []
+        board = self.board
+        bb = self.occupancy[color]
+        while bb:
+            bit = bb & -bb
+            frm = bit.bit_length() - 1
+            self._piece_moves(frm, board[frm], moves)
+            bb ^= bit
+        return moves
+
+    # checks if the king of the moving side is safe after the move,
+    # without actually making it
+    def is_legal(self, move: int) -> bool:
+        frm = move & 63
+        to = (move >> 6) & 63
+        piece = self.board[frm]
+        color = piece // 6
+        kind = piece - color * 6
+        if kind == KING:
+            king = to
+        else:
+            king = self.king_square(color)
+            if king is None:
+                return True
+
+        to_bit = SQUARE_BITS[to]
+        keep = ~to_bit
+        occupied = self.occupied
+        if kind == PAWN and to == self.en_passant and \
+                self.board[to] is None:
+            captured_bit = SQUARE_BITS[to - PAWN_FORWARD[color]]
+            occupied ^= captured_bit
+            keep = ~captured_bit
+        occupied = (occupied & ~SQUARE_BITS[frm]) | to_bit
+        return not self.is_square_attacked(king, color ^ 1, occupied, keep)
+
+    # every legal move of a side in one pass: checkers, pinned pieces and
+    # the squares the king can't step on are computed once, so only
+    # en passant captures need a trial check
+    def legal_moves(self, color: int) -> list:
+        bbs = self.bitboards
+        base = color * 6
+        king_bb = bbs[base + KING]
+        if not king_bb:
+            # nothing to protect
+            return self.pseudo_legal_moves(color)
+        king = (king_bb & -king_bb).bit_length() - 1
+        enemy = color ^ 1
+        enemy_base = enemy * 6
+        us = self.occupancy[color]
+        them = self.occupancy[enemy]
+        occupied = self.occupied
+        board = self.board
+        moves = []
+
+        checkers = self.attackers(king, enemy)
+        danger = self.attacks_by(enemy, occupied ^ king_bb)
+
+        # king steps
+        targets = KING_ATTACKS[king] & ~us & ~danger
+        while targets:
+            bit = targets & -targets
+            moves.append(king | ((bit.bit_length() - 1) << 6))
+            targets ^= bit
+        if checkers & (checkers - 1):
+            # double check, only the king can move
+            return moves
+
+        # without a check every destination is fine, otherwise moves
+        # must capture the checker or block its line
+        evasions = FULL
+        if checkers:
+            checker = (checkers & -checkers).bit_length() - 1
+            evasions = checkers | BETWEEN[king][checker]
+        else:
+            self._castling_moves(king, color, moves, danger)
+
+        # an enemy slider lined up with the king through exactly one of
+        # our pieces pins it to that line
+        pins = {}
+        queens = bbs[enemy_base + QUEEN]
+        snipers = rook_attacks(king, them) & (bbs[enemy_base + ROOK] | queens)
+        snipers |= bishop_attacks(king, them) \
+            & (bbs[enemy_base + BISHOP] | queens)
+        while snipers:
+            bit = snipers & -snipers
+            sniper = bit.bit_length() - 1
+            snipers ^= bit
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & us:
+                pins[blockers.bit_length() - 1] = LINES[king][sniper]
+
+        pieces = us ^ king_bb
+        while pieces:
+            bit = pieces & -pieces
+            frm = bit.bit_length() - 1
+            pieces ^= bit
+            allowed = evasions
+            if frm in pins:
+                allowed &= pins[frm]
+            kind = board[frm] - base
+            if kind == PAWN:
+                self._legal_pawn_moves(frm, color, allowed, moves)
+                continue
+            if kind == KNIGHT:
+                targets = KNIGHT_ATTACKS[frm]
+            elif kind == BISHOP:
+                targets = bishop_attacks(frm, occupied)
+            elif kind == ROOK:
+                targets = rook_attacks(frm, occupied)
+            else:
+                targets = queen_attacks(frm, occupied)
+            targets &= allowed & ~us
+            while targets:
+                bit = targets & -targets
+                moves.append(frm | ((bit.bit_length() - 1) << 6))
+                targets ^= bit
+        return moves
+
+    def _legal_pawn_moves(self, frm: int, color: int, allowed: int, moves):
+        pawn_moves = []
+        self._pawn_moves(frm, color, pawn_moves)
+        ep = self.en_passant
+        for move in pawn_moves:
+            to = (move >> 6) & 63
+            if to == ep and self.board[to] is None:
+                # the captured pawn leaves the board too, which may open
+                # a line to the king, so this one is tried for real
+                if self.is_legal(move):
+                    moves.append(move)
+            elif allowed & SQUARE_BITS[to]:
+                moves.append(move)
+
+    def legal_moves_from(self, sq: int) -> list:
+        piece = self.board[sq]
+        if piece is None:
+            return []
+        return [m for m in self.legal_moves(piece // 6) if m & 63 == sq]
+
+    # plays a move on this position, saving what unmake() needs to take
+    # it back on the undo stack
+    def make(self, move: int):
+        frm = move & 63
+        to = (move >> 6) & 63
+        promotion = move >> 12
+        old_hash = self.hash
+        piece = self.remove_piece(frm)
+        color = piece // 6
+        kind = piece - color * 6
+        captured_sq = to
+        captured = self.remove_piece(to)
+
+        if kind == PAWN:
+            if to == self.en_passant and captured is None:
+                captured_sq = to - PAWN_FORWARD[color]
+                captured = self.remove_piece(captured_sq)
+            if promotion:
+                self.put_piece(to, color * 6 + promotion)
+            else:
+                self.put_piece(to, piece)
+        else:
+            self.put_piece(to, piece)
+            if kind == KING and (to - frm == 2 or frm - to == 2):
+                for _, king, king_to, corner, rook_to, _, _ in \
+                        CASTLING_MOVES:
+                    if king == frm and king_to == to:
+                        self.put_piece(rook_to, self.remove_piece(corner))
+
+        self.history.append((
+            move,
+            piece,
+            captured,
+            captured_sq,
+            self.castling,
+            self.en_passant,
+            self.halfmoves,
+            old_hash,
+            self.en_passant_hash))
+
+        castling = self.castling
+        self.castling = castling & CASTLING_MASKS[frm] & CASTLING_MASKS[to]
+        self.en_passant = None
+        if kind == PAWN and (to - frm == 16 or frm - to == 16):
+            self.en_passant = (frm + to) >> 1
+        self.halfmoves += 1
+        if color == BLACK:
+            self.fullmoves += 1
+        self.side = color ^ 1
+
+        h = self.hash ^ ZOBRIST_SIDE ^ self.en_passant_hash
+        h ^= ZOBRIST_CASTLING[castling] ^ ZOBRIST_CASTLING[self.castling]
+        self.en_passant_hash = self._en_passant_hash()
+        self.hash = h ^ self.en_passant_hash
+
+    def unmake(self):
+        move, piece, captured, captured_sq, castling, en_passant, \
+            halfmoves, old_hash, en_passant_hash = self.history.pop()
+        frm = move & 63
+        to = (move >> 6) & 63
+        color = piece // 6
+
+        self.remove_piece(to)
+        self.put_piece(frm, piece)
+        if captured is not None:
+            self.put_piece(captured_sq, captured)
+        if piece - color * 6 == KING and (to - frm == 2 or frm - to == 2):
+            for _, king, king_to, corner, rook_to, _, _ in CASTLING_MOVES:
+                if king == frm and king_to == to:
+                    self.put_piece(corner, self.remove_piece(rook_to))
+
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmoves = halfmoves
+        if color == BLACK:
+            self.fullmoves -= 1
+        self.side = color
+        self.hash = old_hash
+        self.en_passant_hash = en_passant_hash
+
+    # passes the turn without moving, for null-move pruning
+    def make_null(self):
+        self.history.append((
+            None,
+            self.en_passant,
+            self.hash,
+            self.en_passant_hash))
+        self.en_passant = None
+        self.side ^= 1
+        self.hash ^= ZOBRIST_SIDE ^ self.en_passant_hash
+        self.en_passant_hash = 0
+
+    def unmake_null(self):
+        _, self.en_passant, self.hash, self.en_passant_hash = \
+            self.history.pop()
+        self.side ^= 1
+
+    @property
+    def fen(self):
+        rows = []
+        board = self.board
+        for row in range(8):
+            fen_row = ""
+            empty = 0
+            for sq in range(row * 8, row * 8 + 8):
+                piece = board[sq]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    fen_row += str(empty)
+                    empty = 0
+                fen_row += PIECE_CHARS[piece]
+            if empty:
+                fen_row += str(empty)
+            rows.append(fen_row)
+        ep = "-"
+        if self.en_passant is not None:
+            row, column = SQUARE_POS[self.en_passant]
+            ep = chr(column + ord('a')) + str(8 - row)
+        return " ".join([
+            "/".join(rows),
+            COLORS[self.side].value,
+            castling_to_str(self.castling),
+            ep,
+            str(self.halfmoves),
+            str(self.fullmoves)])
+
+    @fen.setter
+    def fen(self, fen_code: str):
+        placement, turn, castling, ep, halfmoves, fullmoves = \
+            fen_code.split(' ')
+        self.clear()
+        for row, fen_row in enumerate(placement.split('/')):
+            column = 0
+            for c in fen_row:
+                if c.isdigit():
+                    column += int(c)
+                else:
+                    self.put_piece(row * 8 + column, PIECE_CHARS.index(c))
+                    column += 1
+        self.side = COLOR_INDEXES[PieceColor(turn)]
+        self.castling = castling_to_bits(castling)
+        self.en_passant = None
+        if ep != "-":
+            self.en_passant = (8 - int(ep[1])) * 8 + ord(ep[0]) - ord('a')
+        self.halfmoves = int(halfmoves)
+        self.fullmoves = int(fullmoves)
+        self.hash = self.compute_hash()
+
+    def to_bytes(self) -> bytes:
+        pieces = bytearray(16)
+        board = self.board
+        occupied = self.occupied
+        i = 0
+        bb = occupied
+        while bb:
+            sq = (bb & -bb).bit_length() - 1
+            bb &= bb - 1
+            if i == 32:
+                raise Exception("Too many pieces to pack:", self.fen)
+            pieces[i >> 1] |= board[sq] << ((i & 1) << 2)
+            i += 1
+        en_passant = self.en_passant
+        if en_passant is None:
+            en_passant = NO_EN_PASSANT
+        return POSITION_STRUCT.pack(
+                occupied,
+                bytes(pieces),
+                self.side | self.castling << 1,
+                en_passant,
+                self.halfmoves,
+                self.fullmoves)
+
+    def from_bytes(self, data: bytes):
+        occupied, pieces, flags, en_passant, halfmoves, fullmoves = \
+            POSITION_STRUCT.unpack(data)
+        self.clear()
+        i = 0
+        while occupied:
+            sq = (occupied & -occupied).bit_length() - 1
+            occupied &= occupied - 1
+            self.put_piece(sq, (pieces[i >> 1] >> ((i & 1) << 2)) & 15)
+            i += 1
+        self.side = flags & 1
+        self.castling = flags >> 1
+        self.en_passant = None
+        if en_passant != NO_EN_PASSANT:
+            self.en_passant = en_passant
+        self.halfmoves = halfmoves
+        self.fullmoves = fullmoves
+        self.hash = self.compute_hash()
@@ -7,7 +7,8 @@ from game_board_claim_draw_button import GameBoardClaimDrawButton
 from game_board_ask_for_draw_button import GameBoardAskForDrawButtons
 from game_board_quit_button import GameBoardQuitButton
 from game_board_pause_button import GameBoardPauseButton
-from player import Player, Human
+from player import Player
+from human import Human
 from piece import PieceColor
 from pygame import mixer
 
@@ -88,6 +89,9 @@ class GameBoard():
                 PieceColor.WHITE: player_white,
                 PieceColor.BLACK: player_black
                 }
+        if self.settings['timer']:
+            for player in self.players.values():
+                player.time_left_func = self.timer.time_left.get
         # if both players are humans, draw can be requested
         self.both_are_human = False
         if isinstance(self.players[PieceColor.BLACK], Human) and isinstance(self.players[PieceColor.WHITE], Human):
@@ -3,11 +3,34 @@ import threading
 
 from piece import Piece, PieceColor, PieceCode, MoveNotification
 from piece import piece_class_from_code
+from bitboard import BitboardPosition, COLORS, COLOR_INDEXES, CODE_KINDS
+from bitboard import KIND_CODES, PIECE_INFO
+from bitboard import SQUARE_POS, castling_to_bits, castling_to_str
+from bitboard import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN
+from attack_tables import KNIGHT_ATTACKS, bishop_attacks, rook_attacks
+
+
+# pawns up to two rows away and one column away from a tile may push or
+# capture into it
+def _pawn_neighbourhoods():
+    table = []
+    for sq in range(64):
+        row, column = SQUARE_POS[sq]
+        bb = 0
+        for r in range(row - 2, row + 3):
+            for c in range(column - 1, column + 2):
+                if 0 <= r <= 7 and 0 <= c <= 7:
+                    bb |= 1 << (r * 8 + c)
+        table.append(bb)
+    return table
+
+
+PAWN_NEIGHBOURHOODS = _pawn_neighbourhoods()
 
 
 # controls the logic and board state using the FEN code
 class GameBoardController():
-    def __init__(self):
+    def __init__(self, debug_attack_maps: bool = False):
         # fen code attributes
         self._turn: PieceColor = PieceColor.WHITE
         self._turn_lock = threading.Lock()
@@ -23,16 +46,6 @@ class GameBoardController():
         self.threefold_draw = False
         self.insufficent_cmr_draw = False
         self.stalemate_draw = False
-        self.white_threefold = []
-        self.white_last_moved_piece = None
-        self.white_before_last_moved_piece = None
-        self.white_moved_times = 1
-        self.black_threefold = []
-        self.black_last_moved_piece = None
-        self.black_before_last_moved_piece = None
-        self.black_moved_times = 1
-        self.black_last_old_and_new = None
-        self.white_last_old_and_new = None
 
         self.pieces_by_color = {
             PieceColor.WHITE: set(),
@@ -43,11 +56,44 @@ class GameBoardController():
             PieceColor.WHITE: set(),
             PieceColor.BLACK: set()
         }
+        # how many pieces of each color attack each tile, and the tiles
+        # each piece contributed, so a piece's attacks can be removed
+        # without rebuilding the whole map
+        self.attack_counts = {
+            PieceColor.WHITE: {},
+            PieceColor.BLACK: {}
+        }
+        self._attacks_from = {}
+        self._attack_maps_valid = False
+        # check every incremental update against a full rebuild
+        self.debug_attack_maps = debug_attack_maps
+
+        # bitboard mirror of 'self.pieces', used for move generation and
+        # attack queries. It is rebuilt lazily after the pieces change
+        self.position = BitboardPosition()
+        self._position_dirty = True
+        self._legal_moves_cache = {}
+
+        # information needed by 'unmake_move' to take back each move
+        # done with 'make_move'
+        self._undo_stack = []
+
+        # zobrist hashes of the positions since the last irreversible move
+        # (capture, pawn move or castling rights change) and how many times
+        # each of them was reached
+        self.hash_history = []
+        self._hash_counts = {}
+
+        # fen string of the current position, built again only after
+        # something changed
+        self._fen = None
         self.set_initial_fen()
 
     def copy(self):
-        controller = GameBoardController()
-        controller.fen = self.fen
+        controller = GameBoardController(self.debug_attack_maps)
+        controller.from_bytes(self.to_bytes())
+        controller.hash_history = self.hash_history.copy()
+        controller._hash_counts = self._hash_counts.copy()
         return controller
 
     def move_piece(
@@ -56,9 +102,21 @@ class GameBoardController():
             new: (int, int),
             promotion: PieceCode):
 
+        # tiles whose content changed, so only the pieces that can see
+        # them need their moves recomputed
+        changed = {old, new}
+        if self.en_passant is not None:
+            changed.add(self.en_passant)
+        self._fen = None
+
+        position = self.sync_position()
+        castling = position.castling
+        piece = self.pieces[old[0]][old[1]]
+        irreversible = piece.type == PieceCode.PAWN or \
+            self.pieces[new[0]][new[1]] is not None
+
         # notify piece of the move, so it can update its internal state
         # and return additional information
-        piece = self.pieces[old[0]][old[1]]
         notification, data = piece.notify_move(
             new,
             self.piece_info,
@@ -78,11 +136,39 @@ class GameBoardController():
         self.pieces_by_color[piece.color].add(new)
 
         self.process_move_notification(piece, notification, data, new)
+        if notification == MoveNotification.EN_PASSANT_DONE:
+            changed.add(data)
+        elif notification in [
+                MoveNotification.QUEEN_CASTLING,
+                MoveNotification.KING_CASTLING]:
+            changed.add(data['old'])
+            changed.add(data['new'])
+        if self.en_passant is not None:
+            changed.add(self.en_passant)
 
         # handle promotion
         self.promote(piece, promotion)
 
-        self.update_pseudo_legal_moves()
+        # keep the bitboard mirror in step instead of rebuilding it
+        promotion_kind = 0
+        promoted = self.pieces[new[0]][new[1]]
+        if promoted is not piece:
+            promotion_kind = CODE_KINDS[promoted.type]
+        position.make(
+                old[0] * 8 + old[1]
+                | (new[0] * 8 + new[1]) << 6
+                | promotion_kind << 12)
+        # moves played with move_piece can't be unmade
+        position.history.clear()
+        # the turn only passes on 'finish_turn', but the position (and its
+        # hash) is already the one the opponent has to move in
+        position.set_state(
+                position.side,
+                castling_to_bits(self.castling),
+                self._en_passant_square())
+        self._legal_moves_cache = {}
+        self._record_position(irreversible or position.castling != castling)
+        self.update_pseudo_legal_moves(changed)
 
     def is_promotion_valid(
             self,
@@ -178,66 +264,58 @@ class GameBoardController():
                 self.insufficent_cmr_draw = True
 
     def threefold_repetition_rule(self, old: (int, int), new: (int, int)):
-        piece = self.pieces[new[0]][new[1]]
-        if(self._turn == PieceColor.WHITE):
+        self.threefold_draw = self.repetitions() >= 3
 
-            self.white_before_last_moved_piece = self.white_last_moved_piece
-            self.white_last_moved_piece = piece
-            if self.white_before_last_moved_piece is None:
-                self.white_last_old_and_new = old, new
-            else:
-                if(self.white_before_last_moved_piece.type == piece.type and self.white_last_old_and_new[0] == new and self.white_last_old_and_new[1] == old):
-                    self.white_moved_times += 1
-                else:
-                    self.white_moved_times = 1
-            self.white_last_old_and_new = old, new
-            self.white_threefold.append(new)
-            if len(self.white_threefold) >= 5 and self.white_moved_times >= 5:
-                if((self.white_threefold[0] == self.white_threefold[2] and self.white_threefold[2] == self.white_threefold[4]) and
-                   (self.white_threefold[3] == self.white_threefold[1])):
-                    self.threefold_draw = True
-                    self.white_threefold.pop(0)
-                else:
-                    self.threefold_draw = False
-                    self.white_threefold.pop(0)
-            elif len(self.white_threefold) >= 5:
-                self.white_threefold.pop(0)
-                self.threefold_draw = False
+    # how many times the current position was reached since the last
+    # irreversible move
+    def repetitions(self) -> int:
+        return self._hash_counts.get(self.hash_history[-1], 0)
+
+    @property
+    def zobrist_hash(self) -> int:
+        return self.sync_position().hash
+
+    # add the position's hash to the repetition history. An irreversible
+    # move starts a new history, the old one is returned so it can be
+    # restored when the move is taken back
+    def _record_position(self, irreversible: bool):
+        h = self.position.hash
+        if irreversible:
+            previous = (self.hash_history, self._hash_counts)
+            self.hash_history = [h]
+            self._hash_counts = {h: 1}
+            return previous
+        self.hash_history.append(h)
+        self._hash_counts[h] = self._hash_counts.get(h, 0) + 1
+        return None
+
+    def _forget_position(self, previous):
+        if previous is not None:
+            self.hash_history, self._hash_counts = previous
+            return
+        h = self.hash_history.pop()
+        count = self._hash_counts[h] - 1
+        if count:
+            self._hash_counts[h] = count
         else:
-            self.black_before_last_moved_piece = self.black_last_moved_piece
-            self.black_last_moved_piece = piece
+            del self._hash_counts[h]
 
-            if self.black_before_last_moved_piece is None:
-                self.black_last_old_and_new = old, new
-            else:
-                if(self.black_before_last_moved_piece.type == piece.type and self.black_last_old_and_new[0] == new and self.black_last_old_and_new[1] == old):
-                    self.black_moved_times += 1
-                else:
-                    self.black_moved_times = 1
-            self.black_last_old_and_new = old, new
-            self.black_threefold.append(new)
-            if len(self.black_threefold) >= 5 and self.black_moved_times >= 5:
-
-                if((self.black_threefold[0] == self.black_threefold[2] and self.black_threefold[2] == self.black_threefold[4]) and
-                   (self.black_threefold[3] == self.black_threefold[1])):
-                    self.threefold_draw = True
-                    self.black_threefold.pop(0)
-                else:
-                    self.threefold_draw = False
-                    self.black_threefold.pop(0)
-            elif len(self.black_threefold) >= 5:
-                self.black_threefold.pop(0)
-                self.threefold_draw = False
+    def _reset_hash_history(self):
+        h = self.sync_position().hash
+        self.hash_history = [h]
+        self._hash_counts = {h: 1}
+
+    # 'hashes' are the positions of the game before this one, oldest
+    # first, for the repetition count. Setting a FEN forgets them
+    def set_game_history(self, hashes: [int]):
+        self.hash_history = list(hashes) + [self.sync_position().hash]
+        self._hash_counts = {}
+        for h in self.hash_history:
+            self._hash_counts[h] = self._hash_counts.get(h, 0) + 1
 
     def stalemate_rule(self):
-        if self._turn == PieceColor.WHITE:
-            positions = self.pieces_by_color[PieceColor.WHITE]
-        else:
-            positions = self.pieces_by_color[PieceColor.BLACK]
-        for position in positions:
-            valid_moves = self.get_legal_moves(position)
-            if len(valid_moves) > 0:
-                return False
+        if self.has_legal_moves(self._turn):
+            return False
         self.stalemate_draw = True
         return True
 
@@ -257,33 +335,127 @@ class GameBoardController():
     def is_checkmate_valid(self, new: (int, int)):
 
         piece = self.pieces[new[0]][new[1]]
-        for pos in self.pieces_by_color[self.opposite_color(piece.color)]:
-            enemy_piece = self.pieces[pos[0]][pos[1]]
-            if len(self.get_legal_moves(enemy_piece.pos)) >= 1:
-                return False
-        return True
+        return not self.has_legal_moves(self.opposite_color(piece.color))
+
+    def has_legal_moves(self, color: PieceColor) -> bool:
+        return len(self._legal_moves_by_piece(color)) > 0
+
+    # without 'changed' every piece is recomputed. Otherwise only the
+    # pieces affected by the tiles in 'changed' are
+    def update_pseudo_legal_moves(self, changed: {(int, int)} = None):
+        # make_move leaves the maps behind until every move is unmade
+        incremental = changed is not None and self._attack_maps_valid
+        incremental = incremental and not self._undo_stack
+        if incremental:
+            self._update_attack_maps(changed)
+        else:
+            self._rebuild_attack_maps()
+        self._update_castlings()
+        self._attack_maps_valid = True
+
+        if incremental and self.debug_attack_maps:
+            self._check_attack_maps()
 
-    def update_pseudo_legal_moves(self):
+    def _rebuild_attack_maps(self):
         self.attackable_tiles_from = {
             PieceColor.WHITE: set(),
             PieceColor.BLACK: set()
         }
+        self.attack_counts = {
+            PieceColor.WHITE: {},
+            PieceColor.BLACK: {}
+        }
+        self._attacks_from = {}
         for color in PieceColor:
             for piece_idx in self.pieces_by_color[color]:
-                piece = self.pieces[piece_idx[0]][piece_idx[1]]
-                piece.update_pseudo_legal_moves(
-                    self.piece_info,
-                    self.en_passant,
-                    self.get_color_castlings(piece.color))
-
-                for attack_tile in piece.get_pseudo_legal_moves():
-                    piece_type, _ = self.piece_info(piece_idx)
-                    is_pawn = piece_type == PieceCode.PAWN
-                    forward_attack = attack_tile[1] == piece_idx[1]
-                    if is_pawn and forward_attack:
-                        continue
-                    self.attackable_tiles_from[color].add(attack_tile)
+                self._add_piece_attacks(piece_idx)
+
+    def _update_attack_maps(self, changed: {(int, int)}):
+        affected = set()
+        for tile in changed:
+            self._remove_piece_attacks(tile)
+            if self.pieces[tile[0]][tile[1]] is not None:
+                affected.add(tile)
+            affected |= self._pieces_reaching(tile)
+        # castling depends on every enemy attack, so kings are always
+        # recomputed
+        affected |= self._king_positions()
+
+        for piece_idx in affected:
+            self._remove_piece_attacks(piece_idx)
+            self._add_piece_attacks(piece_idx)
+
+    def _add_piece_attacks(self, piece_idx: (int, int)):
+        piece = self.pieces[piece_idx[0]][piece_idx[1]]
+        piece.update_pseudo_legal_moves(
+            self.piece_info,
+            self.en_passant,
+            self.get_color_castlings(piece.color))
 
+        attack_tiles = piece.get_pseudo_legal_moves()
+        if piece.type == PieceCode.PAWN:
+            # pawns don't attack the tiles in front of them
+            attack_tiles = tuple(
+                tile for tile in attack_tiles if tile[1] != piece_idx[1])
+        elif piece.type == PieceCode.KING:
+            # update_castling removes tiles from the king's own set
+            attack_tiles = tuple(attack_tiles)
+        self._attacks_from[piece_idx] = (piece.color, attack_tiles)
+
+        counts = self.attack_counts[piece.color]
+        tiles = self.attackable_tiles_from[piece.color]
+        for attack_tile in attack_tiles:
+            count = counts.get(attack_tile, 0)
+            if count == 0:
+                tiles.add(attack_tile)
+            counts[attack_tile] = count + 1
+
+    def _remove_piece_attacks(self, piece_idx: (int, int)):
+        entry = self._attacks_from.pop(piece_idx, None)
+        if entry is None:
+            return
+        color, attack_tiles = entry
+        counts = self.attack_counts[color]
+        tiles = self.attackable_tiles_from[color]
+        for attack_tile in attack_tiles:
+            count = counts[attack_tile] - 1
+            if count == 0:
+                del counts[attack_tile]
+                tiles.discard(attack_tile)
+            else:
+                counts[attack_tile] = count
+
+    # pieces whose moves may change when the content of 'tile' changes:
+    # sliders with a clear line to it, knights and pawns that could move
+    # there and pawns that could have their way blocked or opened
+    def _pieces_reaching(self, tile: (int, int)) -> {(int, int)}:
+        position = self.sync_position()
+        bbs = position.bitboards
+        sq = tile[0] * 8 + tile[1]
+        queens = bbs[QUEEN] | bbs[6 + QUEEN]
+        reaching = bishop_attacks(sq, position.occupied) \
+            & (bbs[BISHOP] | bbs[6 + BISHOP] | queens)
+        reaching |= rook_attacks(sq, position.occupied) \
+            & (bbs[ROOK] | bbs[6 + ROOK] | queens)
+        reaching |= KNIGHT_ATTACKS[sq] & (bbs[KNIGHT] | bbs[6 + KNIGHT])
+        reaching |= PAWN_NEIGHBOURHOODS[sq] & (bbs[PAWN] | bbs[6 + PAWN])
+
+        pieces = set()
+        while reaching:
+            bit = reaching & -reaching
+            pieces.add(SQUARE_POS[bit.bit_length() - 1])
+            reaching ^= bit
+        return pieces
+
+    def _king_positions(self) -> {(int, int)}:
+        position = self.sync_position()
+        return {
+            SQUARE_POS[sq] for sq in (
+                position.king_square(WHITE),
+                position.king_square(BLACK))
+            if sq is not None}
+
+    def _update_castlings(self):
         # get both kings and ask them gently to make sure if castling is
         # seen as possible in this turn even though there are attackable_tiles
         # in the way
@@ -298,6 +470,31 @@ class GameBoardController():
                         self.get_color_castlings(piece_color),
                         self.attackable_tiles_from[enemy_color])
 
+    def _check_attack_maps(self):
+        attackable_tiles_from = {
+            color: set(tiles)
+            for color, tiles in self.attackable_tiles_from.items()}
+        attack_counts = {
+            color: dict(counts)
+            for color, counts in self.attack_counts.items()}
+        pseudo_legal_moves = {
+            piece_idx: set(self.get_pseudo_legal_moves(piece_idx))
+            for color in PieceColor
+            for piece_idx in self.pieces_by_color[color]}
+
+        self._rebuild_attack_maps()
+        self._update_castlings()
+
+        rebuilt_pseudo_legal_moves = {
+            piece_idx: set(self.get_pseudo_legal_moves(piece_idx))
+            for piece_idx in pseudo_legal_moves}
+        if attackable_tiles_from != self.attackable_tiles_from or \
+                attack_counts != self.attack_counts or \
+                pseudo_legal_moves != rebuilt_pseudo_legal_moves:
+            raise Exception(
+                "Incremental attack maps differ from a full rebuild:",
+                self.fen)
+
     def process_move_notification(self, piece, notification, data, new_pos):
 
         self.en_passant = None
@@ -369,46 +566,249 @@ class GameBoardController():
         piece_info = self.piece_info(pos)
         if piece_info is None:
             return set()
-        piece_type, piece_color = piece_info
-        piece = self.pieces[pos[0]][pos[1]]
-        if piece.legal_moves is not None:
-            return piece.legal_moves
-        legal_moves = set()
-        # every possible pseudo-legal move you can make from this piece
-        for move in self.get_pseudo_legal_moves(pos):
-            for promotion in "QN":
-                # check if we should skip the first promotion
-                if promotion == "Q":
-                    # if this piece is not a pawn, not reason to iterate twice
-                    if piece_type != PieceCode.PAWN:
-                        continue
-                    # if this piece is a pawn, not reason to go over promotion
-                    # if not reaching edge of board
-                    if piece_type == PieceCode.PAWN and ((move[1] != 7 and piece_color == PieceColor.WHITE) or (move[1] != 0 and piece_color == PieceColor.BLACK)):
-                        continue
-                promotion = PieceCode(promotion)
-                # create a new controller for each move
-                tmp_board: GameBoardController = self.copy()
-                # make the move in this temporary controller
-                tmp_board.move_piece(pos, move, promotion)
-                tmp_board.finish_turn()
-                # iterate over every possible enemy move in this temporary
-                # controller, and add this move if no enemy move can kill
-                # our king
-                enemy_color = self.opposite_color(piece_color)
-                enemy_attack_tiles = tmp_board.attackable_tiles_from[enemy_color]
-                legal_move = True
-                for enemy_attack_tile in enemy_attack_tiles:
-                    attack_info = tmp_board.piece_info(enemy_attack_tile)
-                    if attack_info == (PieceCode.KING, piece_color):
-                        legal_move = False
-                del tmp_board
-                if legal_move:
-                    legal_moves.add(move)
-
-        piece.legal_moves = legal_moves
+        legal_moves = self._legal_moves_by_piece(piece_info[1]).get(pos)
+        if legal_moves is None:
+            return set()
         return legal_moves
 
+    # every legal move of a side, as (old, new, promotion) tuples. Pawns
+    # reaching the last row show up once for each promotion
+    def generate_legal_moves(
+            self,
+            color: PieceColor) -> [((int, int), (int, int), PieceCode)]:
+        position = self.sync_position()
+        legal_moves = []
+        for move in position.legal_moves(COLOR_INDEXES[color]):
+            promotion = move >> 12
+            legal_moves.append((
+                SQUARE_POS[move & 63],
+                SQUARE_POS[(move >> 6) & 63],
+                KIND_CODES[promotion] if promotion else None))
+        return legal_moves
+
+    # legal destinations of every piece of a side, generated in one pass
+    # and kept until the position changes
+    def _legal_moves_by_piece(
+            self,
+            color: PieceColor) -> {(int, int): {(int, int)}}:
+        position = self.sync_position()
+        by_piece = self._legal_moves_cache.get(color)
+        if by_piece is not None:
+            return by_piece
+        by_piece = {}
+        for move in position.legal_moves(COLOR_INDEXES[color]):
+            old = SQUARE_POS[move & 63]
+            legal_moves = by_piece.get(old)
+            if legal_moves is None:
+                legal_moves = by_piece[old] = set()
+            legal_moves.add(SQUARE_POS[(move >> 6) & 63])
+        self._legal_moves_cache[color] = by_piece
+        return by_piece
+
+    # plays a move and finishes the turn, keeping enough information to
+    # take it back with 'unmake_move'. Piece objects, castling, en passant,
+    # turn and counters are kept up to date, but the pieces' pseudo-legal
+    # moves and 'attackable_tiles_from' are only valid again once every
+    # move was unmade (or after 'update_pseudo_legal_moves')
+    def make_move(
+            self,
+            old: (int, int),
+            new: (int, int),
+            promotion: PieceCode = None):
+
+        self._fen = None
+        position = self.sync_position()
+        castling = position.castling
+        piece = self.pieces[old[0]][old[1]]
+
+        # a pawn reaching the last row always promotes, to a queen
+        # if nothing valid was chosen
+        promoted = None
+        if piece.type == PieceCode.PAWN and new[0] in (0, 7):
+            if not self.is_promotion_valid(
+                    new,
+                    piece.type,
+                    piece.color,
+                    promotion):
+                promotion = PieceCode.QUEEN
+            promoted = piece_class_from_code(promotion)(piece.color, new)
+
+        captured_pos = new
+        if piece.type == PieceCode.PAWN and new == self.en_passant and \
+                self.pieces[new[0]][new[1]] is None:
+            captured_pos = (old[0], new[1])
+        captured = self.pieces[captured_pos[0]][captured_pos[1]]
+
+        rook = None
+        if piece.type == PieceCode.KING and abs(new[1] - old[1]) == 2:
+            rook_old = (old[0], [0, 7][new[1] > old[1]])
+            rook_new = (old[0], (old[1] + new[1]) // 2)
+            rook = (
+                    self.pieces[rook_old[0]][rook_old[1]],
+                    rook_old,
+                    rook_new)
+
+        undo = (
+            old,
+            new,
+            piece,
+            getattr(piece, 'first_move', None),
+            promoted,
+            captured,
+            captured_pos,
+            rook,
+            rook[0].first_move if rook is not None else None,
+            self.castling,
+            self.en_passant,
+            self.halfmoves,
+            self.fullmoves)
+
+        if captured is not None:
+            self.pieces[captured_pos[0]][captured_pos[1]] = None
+            self.pieces_by_color[captured.color].remove(captured_pos)
+
+        self.pieces[old[0]][old[1]] = None
+        self.pieces_by_color[piece.color].remove(old)
+        if promoted is None:
+            piece.pos = new
+            if hasattr(piece, 'first_move'):
+                piece.first_move = False
+            self.pieces[new[0]][new[1]] = piece
+        else:
+            self.pieces[new[0]][new[1]] = promoted
+        self.pieces_by_color[piece.color].add(new)
+
+        if rook is not None:
+            rook_piece, rook_old, rook_new = rook
+            self.pieces[rook_old[0]][rook_old[1]] = None
+            self.pieces[rook_new[0]][rook_new[1]] = rook_piece
+            self.pieces_by_color[piece.color].remove(rook_old)
+            self.pieces_by_color[piece.color].add(rook_new)
+            rook_piece.pos = rook_new
+            rook_piece.first_move = False
+
+        promotion_kind = 0
+        if promoted is not None:
+            promotion_kind = CODE_KINDS[promotion]
+        position.make(
+                old[0] * 8 + old[1]
+                | (new[0] * 8 + new[1]) << 6
+                | promotion_kind << 12)
+        self._sync_from_position()
+        irreversible = piece.type == PieceCode.PAWN or captured is not None \
+            or position.castling != castling
+        self._undo_stack.append(undo + (self._record_position(irreversible),))
+
+    def unmake_move(self):
+        old, new, piece, first_move, promoted, captured, captured_pos, \
+            rook, rook_first_move, castling, en_passant, halfmoves, \
+            fullmoves, hash_history = self._undo_stack.pop()
+        self._fen = None
+        self._forget_position(hash_history)
+
+        self.pieces[new[0]][new[1]] = None
+        self.pieces_by_color[piece.color].remove(new)
+        piece.pos = old
+        if first_move is not None:
+            piece.first_move = first_move
+        self.pieces[old[0]][old[1]] = piece
+        self.pieces_by_color[piece.color].add(old)
+
+        if captured is not None:
+            self.pieces[captured_pos[0]][captured_pos[1]] = captured
+            self.pieces_by_color[captured.color].add(captured_pos)
+
+        if rook is not None:
+            rook_piece, rook_old, rook_new = rook
+            self.pieces[rook_new[0]][rook_new[1]] = None
+            self.pieces[rook_old[0]][rook_old[1]] = rook_piece
+            self.pieces_by_color[piece.color].remove(rook_new)
+            self.pieces_by_color[piece.color].add(rook_old)
+            rook_piece.pos = rook_old
+            rook_piece.first_move = rook_first_move
+
+        self.position.unmake()
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmoves = halfmoves
+        self.fullmoves = fullmoves
+        with self._turn_lock:
+            self._turn = piece.color
+        self._legal_moves_cache = {}
+
+    # passes the turn, for the search's null-move pruning. Only the
+    # bitboard core and the fen attributes change, the pieces stay put
+    def make_null_move(self):
+        self._fen = None
+        self.sync_position().make_null()
+        self._sync_from_position()
+
+    def unmake_null_move(self):
+        self._fen = None
+        self.position.unmake_null()
+        self._sync_from_position()
+
+    # copy the fen attributes the bitboard core just updated, so both
+    # stay in sync without a rebuild
+    def _sync_from_position(self):
+        position = self.position
+        self.castling = castling_to_str(position.castling)
+        self.en_passant = None
+        if position.en_passant is not None:
+            self.en_passant = SQUARE_POS[position.en_passant]
+        self.halfmoves = position.halfmoves
+        self.fullmoves = position.fullmoves
+        with self._turn_lock:
+            self._turn = COLORS[position.side]
+        self._legal_moves_cache = {}
+
+    def sync_position(self) -> BitboardPosition:
+        if not self._position_dirty:
+            return self.position
+        position = self.position
+        position.clear()
+        for i, row in enumerate(self.pieces):
+            for j, piece in enumerate(row):
+                if piece is not None:
+                    position.put_piece(
+                            i * 8 + j,
+                            COLOR_INDEXES[piece.color] * 6
+                            + CODE_KINDS[piece.type])
+        self._copy_state_to_position()
+        self._position_dirty = False
+        return position
+
+    # copy turn, castling, en passant and counters to the bitboard core
+    def _copy_state_to_position(self):
+        position = self.position
+        position.set_state(
+                COLOR_INDEXES[self._turn],
+                castling_to_bits(self.castling),
+                self._en_passant_square())
+        position.halfmoves = self.halfmoves
+        position.fullmoves = self.fullmoves
+        self._legal_moves_cache = {}
+
+    def _en_passant_square(self):
+        if self.en_passant is None:
+            return None
+        return self.en_passant[0] * 8 + self.en_passant[1]
+
+    def is_attacked(self, pos: (int, int), by_color: PieceColor) -> bool:
+        position = self.sync_position()
+        return position.is_square_attacked(
+                pos[0] * 8 + pos[1],
+                COLOR_INDEXES[by_color])
+
+    def in_check(self, color: PieceColor) -> bool:
+        return self.sync_position().in_check(COLOR_INDEXES[color])
+
+    # material and piece-square score from 'color''s point of view, kept
+    # up to date move by move
+    def evaluate(self, color: PieceColor) -> int:
+        score = self.sync_position().evaluate()
+        return score if color == PieceColor.WHITE else -score
+
     def get_pseudo_legal_moves(self, pos: (int, int)):
         piece = self.pieces[pos[0]][pos[1]]
         if piece is not None:
@@ -423,6 +823,9 @@ class GameBoardController():
             self._turn = PieceColor.WHITE
         self._turn_lock.release()
         self.halfmoves += 1
+        self._fen = None
+        if not self._position_dirty:
+            self._copy_state_to_position()
 
     def piece_info(self, idxs: (int, int)):
         piece = self.pieces[idxs[0]][idxs[1]]
@@ -443,6 +846,8 @@ class GameBoardController():
     def turn(self, t: PieceColor):
         with self._turn_lock:
             self._turn = t
+        self._position_dirty = True
+        self._fen = None
 
     def get_color_castlings(self, color: PieceColor) -> str:
         if self.castling == "-":
@@ -481,6 +886,15 @@ class GameBoardController():
             PieceColor.BLACK: set(),
             PieceColor.WHITE: set()
         }
+        self.attack_counts = {
+            PieceColor.BLACK: {},
+            PieceColor.WHITE: {}
+        }
+        self._attacks_from = {}
+        self._attack_maps_valid = False
+        self._undo_stack = []
+        self._position_dirty = True
+        self._fen = None
 
     @classmethod
     def opposite_color(cls, color: PieceColor):
@@ -490,6 +904,8 @@ class GameBoardController():
 
     @property
     def fen(self):
+        if self._fen is not None:
+            return self._fen
         fen = ""
         for row in self.pieces:
             empty = 0
@@ -517,6 +933,7 @@ class GameBoardController():
         fen += " " + self.convert_to_idx(self.en_passant)
         fen += " " + str(self.halfmoves)
         fen += " " + str(self.fullmoves)
+        self._fen = fen
         return fen
 
     @fen.setter
@@ -563,4 +980,30 @@ class GameBoardController():
         self.halfmoves = int(attrs[3])
         self.fullmoves = int(attrs[4])
 
+        self._position_dirty = True
+        self._reset_hash_history()
+        self.update_pseudo_legal_moves()
+
+    # fixed size binary form of the position, see 'BitboardPosition'
+    def to_bytes(self) -> bytes:
+        position = self.sync_position()
+        if position.side != COLOR_INDEXES[self.turn]:
+            # between 'move_piece' and 'finish_turn'
+            self._copy_state_to_position()
+        return position.to_bytes()
+
+    def from_bytes(self, data: bytes):
+        self.clear_board()
+        position = self.position
+        position.from_bytes(data)
+        for sq, piece_idx in enumerate(position.board):
+            if piece_idx is not None:
+                code, color = PIECE_INFO[piece_idx]
+                pos = SQUARE_POS[sq]
+                self.pieces[pos[0]][pos[1]] = \
+                    piece_class_from_code(code)(color, pos)
+                self.pieces_by_color[color].add(pos)
+        self._sync_from_position()
+        self._position_dirty = False
+        self._reset_hash_history()
         self.update_pseudo_legal_moves()
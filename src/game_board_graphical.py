@@ -1,5 +1,6 @@
 from tile import Tile
-from piece import PieceDrawer, PieceColor
+from piece import PieceColor
+from piece_drawer import PieceDrawer
 
 
 class GameBoardGraphical():
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+from piece import PieceCode
+
+# piece values for ordering captures: most valuable victim first, then
+# least valuable attacker
+ORDER_VALUES = {
+        PieceCode.PAWN: 1,
+        PieceCode.KNIGHT: 3,
+        PieceCode.BISHOP: 3,
+        PieceCode.ROOK: 5,
+        PieceCode.QUEEN: 9,
+        PieceCode.KING: 10}
+MAX_PLY = 128
+KILLERS_PER_PLY = 2
+
+
+# orders the moves of a search node in stages: the transposition table
+# (or principal variation) move, captures and promotions by MVV-LVA, the
+# killer moves of the ply and then the quiet moves by their history
+# score. Killers and history are learned from the beta cutoffs of the
+# search
+class MoveOrderer():
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.killers = [[None] * KILLERS_PER_PLY for _ in range(MAX_PLY)]
+        # (color, old, new) -> score
+        self.history = {}
+
+    # called before each search: killers belong to the old plies, the
+    # history is kept but weighs less than what the new search learns
+    def new_search(self):
+        self.killers = [[None] * KILLERS_PER_PLY for _ in range(MAX_PLY)]
+        self.history = {
+                move: score // 2
+                for move, score in self.history.items()
+                if score > 1}
+
+    # MVV-LVA score of a capture or promotion, None for a quiet move.
+    # Must be called before the move is played
+    def noisy_score(self, controller, move) -> int:
+        old, new, promotion = move
+        attacker = controller.piece_info(old)[0]
+        victim = controller.piece_info(new)
+        if victim is not None:
+            victim_value = ORDER_VALUES[victim[0]]
+        elif attacker == PieceCode.PAWN and old[1] != new[1]:
+            # en passant
+            victim_value = ORDER_VALUES[PieceCode.PAWN]
+        elif promotion is None:
+            return None
+        else:
+            victim_value = 0
+        if promotion is not None:
+            victim_value += ORDER_VALUES[promotion]
+        return victim_value * 16 - ORDER_VALUES[attacker]
+
+    # yields (move, is_quiet). Each stage is only sorted when the search
+    # gets to it, and the controller must be back on the node's position
+    # whenever the next move is asked for
+    def order(self, controller, moves, color, ply: int, first=None):
+        noisy = []
+        quiet = []
+        for move in moves:
+            if move == first:
+                continue
+            score = self.noisy_score(controller, move)
+            if score is None:
+                quiet.append(move)
+            else:
+                noisy.append((score, move))
+
+        if first is not None and first in moves:
+            yield first, self.noisy_score(controller, first) is None
+
+        noisy.sort(key=lambda scored: scored[0], reverse=True)
+        for _, move in noisy:
+            yield move, False
+
+        if ply < MAX_PLY:
+            for killer in self.killers[ply]:
+                if killer in quiet:
+                    quiet.remove(killer)
+                    yield killer, True
+
+        history = self.history
+        quiet.sort(
+                key=lambda move: history.get((color, move[0], move[1]), 0),
+                reverse=True)
+        for move in quiet:
+            yield move, True
+
+    # a quiet move refuted the opponent's previous move
+    def cutoff(self, move, color, ply: int, depth: int):
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers.pop()
+                killers.insert(0, move)
+        key = (color, move[0], move[1])
+        self.history[key] = self.history.get(key, 0) + depth * depth
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from multiprocessing import Pool
+
+from game_board_controller import GameBoardController
+
+# standard perft positions and their node counts for depth 1, 2, ...
+REFERENCE_POSITIONS = [
+    (
+        "start",
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        [20, 400, 8902, 197281, 4865609]),
+    (
+        "kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603]),
+    (
+        "position3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624]),
+    (
+        "position4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333]),
+    (
+        "position5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487]),
+    (
+        "position6",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890, 3894594]),
+]
+
+
+# counts the leaf nodes of the legal move tree, counting the moves of the
+# last ply instead of playing them
+def perft(controller: GameBoardController, depth: int) -> int:
+    if depth == 0:
+        return 1
+    moves = controller.generate_legal_moves(controller.turn)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        controller.make_move(*move)
+        nodes += perft(controller, depth - 1)
+        controller.unmake_move()
+    return nodes
+
+
+# move in coordinate notation, like 'e2e4' or 'a7a8q'
+def move_name(old: (int, int), new: (int, int), promotion) -> str:
+    name = "".join(
+            chr(col + ord('a')) + str(8 - row) for row, col in (old, new))
+    if promotion is not None:
+        name += promotion.value.lower()
+    return name
+
+
+def _divide_move(args) -> (str, int):
+    position, move, depth = args
+    controller = GameBoardController()
+    controller.from_bytes(position)
+    controller.make_move(*move)
+    return move_name(*move), perft(controller, depth - 1)
+
+
+# node count under each root move, optionally splitting the root moves
+# between worker processes
+def divide(fen: str, depth: int, processes: int = 1) -> {str: int}:
+    controller = GameBoardController()
+    controller.fen = fen
+    position = controller.to_bytes()
+    jobs = [
+        (position, move, depth)
+        for move in controller.generate_legal_moves(controller.turn)]
+    if processes > 1:
+        with Pool(processes) as pool:
+            return dict(pool.map(_divide_move, jobs))
+    return dict(map(_divide_move, jobs))
+
+
+def run(fen: str, depth: int, processes: int = 1) -> (int, float, {str: int}):
+    start = time.perf_counter()
+    if depth == 0:
+        moves = {}
+        nodes = 1
+    else:
+        moves = divide(fen, depth, processes)
+        nodes = sum(moves.values())
+    return nodes, time.perf_counter() - start, moves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description="Count the leaf nodes of the legal move tree.")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument(
+            "--fen",
+            default=REFERENCE_POSITIONS[0][1],
+            help="position to search (default: start position)")
+    parser.add_argument(
+            "--divide",
+            action="store_true",
+            help="print the node count under each root move")
+    parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="worker processes to split the root moves between")
+    parser.add_argument(
+            "--check",
+            action="store_true",
+            help="check the reference positions up to 'depth'")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failed = False
+        for name, fen, counts in REFERENCE_POSITIONS:
+            for depth, expected in enumerate(counts[:args.depth], 1):
+                nodes, elapsed, _ = run(fen, depth, args.processes)
+                status = "ok" if nodes == expected else "FAIL"
+                failed = failed or nodes != expected
+                print("{} {} depth {}: {} (expected {}) {:.0f} nps".format(
+                    status,
+                    name,
+                    depth,
+                    nodes,
+                    expected,
+                    nodes / max(elapsed, 1e-9)))
+        return 1 if failed else 0
+
+    nodes, elapsed, moves = run(args.fen, args.depth, args.processes)
+    if args.divide:
+        for name in sorted(moves):
+            print("{}: {}".format(name, moves[name]))
+        print()
+    print("nodes: {}".format(nodes))
+    print("time: {:.3f}s".format(elapsed))
+    print("nps: {:.0f}".format(nodes / max(elapsed, 1e-9)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
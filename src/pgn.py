@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+import re
+
+from game_board_controller import GameBoardController
+from piece import PieceCode
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+SAN_PIECES = {
+        'N': PieceCode.KNIGHT,
+        'B': PieceCode.BISHOP,
+        'R': PieceCode.ROOK,
+        'Q': PieceCode.QUEEN,
+        'K': PieceCode.KING}
+
+_HEADER = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# comments, escaped lines, numeric annotations and move numbers
+_NOISE = re.compile(r'\{[^}]*\}|;[^\n]*|^%[^\n]*|\$\d+|\d+\.(?:\.\.)?', re.M)
+_SAN = re.compile(
+        r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+
+
+def _strip_variations(text: str) -> str:
+    depth = 0
+    kept = []
+    for c in text:
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            kept.append(c)
+    return "".join(kept)
+
+
+# (headers, moves in SAN, result) for each game of a PGN text. Comments,
+# variations and annotations are skipped
+def read_games(text: str):
+    headers = {}
+    movetext = []
+    for line in text.splitlines() + [""]:
+        stripped = line.strip()
+        if stripped.startswith('['):
+            if movetext:
+                yield _make_game(headers, movetext)
+                headers = {}
+                movetext = []
+            match = _HEADER.match(stripped)
+            if match:
+                headers[match.group(1)] = match.group(2).replace('\\"', '"')
+        elif stripped:
+            movetext.append(line)
+    if movetext or headers:
+        yield _make_game(headers, movetext)
+
+
+def _make_game(headers: dict, movetext: [str]):
+    text = _NOISE.sub(' ', _strip_variations("\n".join(movetext)))
+    moves = []
+    result = headers.get("Result", "*")
+    for token in text.split():
+        if token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return headers, moves, result
+
+
+# the (old, new, promotion) legal move a SAN string stands for, like
+# 'Nbd7', 'exd5', 'e8=Q+' or 'O-O'. None if it isn't a legal move
+def parse_san(controller: GameBoardController, san: str):
+    san = san.rstrip('+#!?')
+    moves = controller.generate_legal_moves(controller.turn)
+    if san.replace('0', 'O') in ('O-O', 'O-O-O'):
+        new_column = 6 if len(san) == 3 else 2
+        for old, new, promotion in moves:
+            if controller.piece_info(old)[0] == PieceCode.KING \
+                    and old[1] == 4 and new == (old[0], new_column):
+                return old, new, promotion
+        return None
+
+    match = _SAN.match(san)
+    if match is None:
+        return None
+    piece, from_file, from_rank, target, promotion = match.groups()
+    piece_type = SAN_PIECES[piece] if piece else PieceCode.PAWN
+    promotion = SAN_PIECES[promotion] if promotion else None
+    new = (8 - int(target[1]), ord(target[0]) - ord('a'))
+    found = None
+    for move in moves:
+        old, move_new, move_promotion = move
+        if move_new != new or move_promotion != promotion \
+                or controller.piece_info(old)[0] != piece_type:
+            continue
+        if from_file and old[1] != ord(from_file) - ord('a'):
+            continue
+        if from_rank and old[0] != 8 - int(from_rank):
+            continue
+        if found is not None:
+            # ambiguous
+            return None
+        found = move
+    return found
+
+
+# the SAN string of a legal move, like 'Nbd7', 'exd5', 'e8=Q+' or 'O-O#'
+def write_san(controller: GameBoardController, move) -> str:
+    old, new, promotion = move
+    piece_type = controller.piece_info(old)[0]
+    if piece_type == PieceCode.KING and abs(new[1] - old[1]) == 2:
+        san = "O-O" if new[1] > old[1] else "O-O-O"
+    else:
+        target = "{}{}".format(chr(ord('a') + new[1]), 8 - new[0])
+        capture = controller.piece_info(new) is not None
+        if piece_type == PieceCode.PAWN:
+            # en passant lands on an empty square
+            capture = capture or old[1] != new[1]
+            san = chr(ord('a') + old[1]) + "x" + target if capture else target
+            if new[0] in (0, 7):
+                # make_move promotes to a queen when none is given
+                san += "=" + (promotion or PieceCode.QUEEN).value
+        else:
+            others = {
+                other
+                for other, other_new, _ in controller.generate_legal_moves(controller.turn)
+                if other_new == new and other != old
+                and controller.piece_info(other)[0] == piece_type}
+            origin = ""
+            if others:
+                if all(other[1] != old[1] for other in others):
+                    origin = chr(ord('a') + old[1])
+                elif all(other[0] != old[0] for other in others):
+                    origin = str(8 - old[0])
+                else:
+                    origin = chr(ord('a') + old[1]) + str(8 - old[0])
+            san = piece_type.value + origin + ("x" if capture else "") + target
+    controller.make_move(*move)
+    try:
+        if controller.in_check(controller.turn):
+            san += "+" if controller.generate_legal_moves(controller.turn) else "#"
+    finally:
+        controller.unmake_move()
+    return san
+
+
+# a game as PGN text: the seven tag roster first, then the other
+# 'headers', and the SAN 'moves' numbered from the "FEN" header's position
+def write_game(headers: dict, moves: [str], result: str) -> str:
+    headers = dict(headers, Result=result)
+    tags = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+    tags += [tag for tag in headers if tag not in tags]
+    lines = [
+        '[{} "{}"]'.format(tag, str(headers.get(tag, "?")).replace('"', '\\"'))
+        for tag in tags]
+    lines.append("")
+
+    number, black = 1, False
+    if "FEN" in headers:
+        fields = headers["FEN"].split()
+        black = len(fields) > 1 and fields[1] == 'b'
+        if len(fields) > 5 and fields[5].isdigit():
+            number = max(int(fields[5]), 1)
+    tokens = []
+    for i, san in enumerate(moves):
+        if not black:
+            tokens.append("{}.".format(number))
+        elif i == 0:
+            tokens.append("{}...".format(number))
+        tokens.append(san)
+        if black:
+            number += 1
+        black = not black
+    tokens.append(result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = line + " " + token if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
@@ -1,9 +1,9 @@
-import pygame
 from abc import ABC, abstractmethod
 from enum import Enum
 from pathlib import Path
 
-from utils import resource_path, ASSETS_FOLDER
+from attack_tables import KNIGHT_TARGETS, KING_TARGETS, PAWN_CAPTURE_TARGETS
+from attack_tables import ROOK_TARGETS, BISHOP_TARGETS, QUEEN_TARGETS
 
 
 class PieceColor(Enum):
@@ -32,56 +32,20 @@ class MoveNotification(Enum):
     BREAK_CASTLING = 'KQ'
 
 
-class PieceDrawer:
-
-    @classmethod
-    def load_images(cls):
-        # assets_folder = Path(__file__).parent.parent.joinpath("assets")
-        assets_folder = ASSETS_FOLDER
-        imgs = dict()
-        for color in PieceColor:
-            imgs[color] = dict()
-            for piece_code in PieceCode:
-                filename = color.name.lower()
-                filename += "_"
-                filename += piece_code.name.lower()
-                filename += ".png"
-                filepath = assets_folder.joinpath(filename)
-                img = pygame.image.load(resource_path(filepath)).convert_alpha()
-                imgs[color][piece_code] = {
-                        'filepath': filepath,
-                        'img': img
-                    }
-        cls.imgs = imgs
-
-    @classmethod
-    def resize(cls, dims):
-        cls.load_images()
-        dims = (int(dims[0]), int(dims[1]))
-        for color in PieceColor:
-            for piece_code in PieceCode:
-                img_info = cls.imgs[color][piece_code]
-                filepath = img_info['filepath']
-                img_info['img'] = pygame.image.load(filepath).convert_alpha()
-                img_info['img'] = pygame.transform.scale(img_info['img'], dims)
-
-    @classmethod
-    def draw(
-            cls,
-            surface,
-            piece_code: PieceCode,
-            color: PieceColor,
-            coords=(0, 0)):
-        surface.blit(cls.imgs[color][piece_code]['img'], coords)
+# shared by every piece without moves, instead of an empty set each
+NO_MOVES = frozenset()
 
 
+# pieces declare their attributes in '__slots__', so a piece doesn't carry
+# a '__dict__' (a board holds 32 of them and the AI copies boards)
 class Piece(ABC):
+    __slots__ = ('color', 'pos', 'legal_moves', 'pseudo_legal_moves')
 
     def __init__(self, color: PieceColor, pos: (int, int)):
         self.color = color
         self.pos = pos
         self.legal_moves = None
-        self.pseudo_legal_moves = set()
+        self.pseudo_legal_moves = NO_MOVES
 
     @property
     @abstractmethod
@@ -101,6 +65,28 @@ class Piece(ABC):
     def get_pseudo_legal_moves(self):
         return self.pseudo_legal_moves
 
+    # targets that are empty or hold an enemy piece
+    def leaper_moves(self, targets, piece_info_func) -> {(int, int)}:
+        moves = set()
+        for target in targets:
+            piece = piece_info_func(target)
+            if piece is None or piece[1] != self.color:
+                moves.add(target)
+        return moves
+
+    # squares along each ray up to, and including, the first enemy piece
+    def slider_moves(self, rays, piece_info_func) -> {(int, int)}:
+        moves = set()
+        for ray in rays:
+            for target in ray:
+                piece = piece_info_func(target)
+                if piece is not None:
+                    if piece[1] != self.color:
+                        moves.add(target)
+                    break
+                moves.add(target)
+        return moves
+
     # called before the move actually happens
     # used to update internal piece state and
     # return additional information about this move
@@ -119,6 +105,7 @@ class Piece(ABC):
 
 
 class Pawn(Piece):
+    __slots__ = ('direction', 'first_move')
 
     def __init__(self, color: PieceColor, pos: (int, int)):
         super(Pawn, self).__init__(color, pos)
@@ -200,23 +187,18 @@ class Pawn(Piece):
                 if abs(en_passant[1] - self.pos[1]) == 1:
                     pseudo_legal_moves.add(en_passant)
 
-        # eat diagonals
-        diagonal_1 = (self.pos[0] + self.direction, self.pos[1] + 1)
-        diagonal_2 = (self.pos[0] + self.direction, self.pos[1] - 1)
-        diagonals = (diagonal_1, diagonal_2)
-
         # check if pieces from the other color are in a frontal
         # diagonal, ready to be captured
-        for diagonal in diagonals:
-            if 0 <= diagonal[0] <= 7 and 0 <= diagonal[1] <= 7:
-                piece = piece_info_func(diagonal)
-                if piece is not None and piece[1] != self.color:
-                    pseudo_legal_moves.add(diagonal)
+        for diagonal in PAWN_CAPTURE_TARGETS[self.direction][self.pos]:
+            piece = piece_info_func(diagonal)
+            if piece is not None and piece[1] != self.color:
+                pseudo_legal_moves.add(diagonal)
 
-        self.pseudo_legal_moves = pseudo_legal_moves
+        self.pseudo_legal_moves = pseudo_legal_moves or NO_MOVES
 
 
 class Knight(Piece):
+    __slots__ = ()
 
     @property
     def type(self):
@@ -231,32 +213,13 @@ class Knight(Piece):
                 piece_info_func,
                 en_passant,
                 castling)
-        pseudo_legal_moves = set()
-        directions = [
-                (2, 1),
-                (2, -1),
-                (-2, -1),
-                (-2, 1),
-                (1, 2),
-                (-1, 2),
-                (1, -2),
-                (-1, -2)]
-        for direction in directions:
-            row = self.pos[0] + direction[0]
-            column = self.pos[1] + direction[1]
-            if not (0 <= row <= 7 and 0 <= column <= 7):
-                continue
-
-            piece = piece_info_func((row, column))
-            if piece is not None:
-                if piece[1] != self.color:
-                    pseudo_legal_moves.add((row, column))
-            else:
-                pseudo_legal_moves.add((row, column))
-        self.pseudo_legal_moves = pseudo_legal_moves
+        self.pseudo_legal_moves = self.leaper_moves(
+                KNIGHT_TARGETS[self.pos],
+                piece_info_func) or NO_MOVES
 
 
 class Queen(Piece):
+    __slots__ = ()
 
     @property
     def type(self):
@@ -271,36 +234,13 @@ class Queen(Piece):
                 piece_info_func,
                 en_passant,
                 castling)
-        pseudo_legal_moves = set()
-        directions = [
-                (-1, 0),
-                (0, 1),
-                (1, 0),
-                (0, -1),
-                (1, 1),
-                (1, -1),
-                (-1, 1),
-                (-1, -1)]
-        distance = 1
-        while len(directions) > 0:
-            for direction in directions.copy():
-                row = self.pos[0] + direction[0] * distance
-                column = self.pos[1] + direction[1] * distance
-                if not (0 <= row <= 7 and 0 <= column <= 7):
-                    directions.remove(direction)
-                    continue
-                piece = piece_info_func((row, column))
-                if piece is not None:
-                    directions.remove(direction)
-                    if piece[1] != self.color:
-                        pseudo_legal_moves.add((row, column))
-                else:
-                    pseudo_legal_moves.add((row, column))
-            distance += 1
-        self.pseudo_legal_moves = pseudo_legal_moves
+        self.pseudo_legal_moves = self.slider_moves(
+                QUEEN_TARGETS[self.pos],
+                piece_info_func) or NO_MOVES
 
 
 class King(Piece):
+    __slots__ = ('first_move',)
 
     def __init__(self, color: PieceColor, pos: (int, int)):
         super(King, self).__init__(color, pos)
@@ -392,27 +332,9 @@ class King(Piece):
                 piece_info_func,
                 en_passant,
                 castling)
-        pseudo_legal_moves = set()
-        directions = [
-                (-1, 0),
-                (0, 1),
-                (1, 0),
-                (0, -1),
-                (1, 1),
-                (1, -1),
-                (-1, 1),
-                (-1, -1)]
-        for direction in directions:
-            row = self.pos[0] + direction[0]
-            column = self.pos[1] + direction[1]
-            if not (0 <= row <= 7 and 0 <= column <= 7):
-                continue
-            piece = piece_info_func((row, column))
-            if piece is not None:
-                if piece[1] != self.color:
-                    pseudo_legal_moves.add((row, column))
-            else:
-                pseudo_legal_moves.add((row, column))
+        pseudo_legal_moves = self.leaper_moves(
+                KING_TARGETS[self.pos],
+                piece_info_func)
 
         # check if castling is available
         if self.first_move:
@@ -437,10 +359,11 @@ class King(Piece):
                     pseudo_legal_moves.add(
                             (self.pos[0], self.pos[1] + 2 * direction))
 
-        self.pseudo_legal_moves = pseudo_legal_moves
+        self.pseudo_legal_moves = pseudo_legal_moves or NO_MOVES
 
 
 class Rook(Piece):
+    __slots__ = ('first_move', 'castling_type')
 
     def __init__(self, color: PieceColor, pos: (int, int)):
         super(Rook, self).__init__(color, pos)
@@ -484,28 +407,13 @@ class Rook(Piece):
                 piece_info_func,
                 en_passant,
                 castling)
-        pseudo_legal_moves = set()
-        directions = [(-1, 0), (0, 1), (1, 0), (0, -1)]
-        distance = 1
-        while len(directions) > 0:
-            for direction in directions.copy():
-                row = self.pos[0] + direction[0] * distance
-                column = self.pos[1] + direction[1] * distance
-                if not (0 <= row <= 7 and 0 <= column <= 7):
-                    directions.remove(direction)
-                    continue
-                piece = piece_info_func((row, column))
-                if piece is not None:
-                    directions.remove(direction)
-                    if piece[1] != self.color:
-                        pseudo_legal_moves.add((row, column))
-                else:
-                    pseudo_legal_moves.add((row, column))
-            distance += 1
-        self.pseudo_legal_moves = pseudo_legal_moves
+        self.pseudo_legal_moves = self.slider_moves(
+                ROOK_TARGETS[self.pos],
+                piece_info_func) or NO_MOVES
 
 
 class Bishop(Piece):
+    __slots__ = ()
 
     @property
     def type(self):
@@ -520,25 +428,9 @@ class Bishop(Piece):
                 piece_info_func,
                 en_passant,
                 castling)
-        pseudo_legal_moves = set()
-        directions = [(1, 1), (-1, -1), (-1, 1), (1, -1)]
-        distance = 1
-        while len(directions) > 0:
-            for direction in directions.copy():
-                row = self.pos[0] + direction[0] * distance
-                column = self.pos[1] + direction[1] * distance
-                if not (0 <= row <= 7 and 0 <= column <= 7):
-                    directions.remove(direction)
-                    continue
-                piece = piece_info_func((row, column))
-                if piece is not None:
-                    directions.remove(direction)
-                    if piece[1] != self.color:
-                        pseudo_legal_moves.add((row, column))
-                else:
-                    pseudo_legal_moves.add((row, column))
-            distance += 1
-        self.pseudo_legal_moves = pseudo_legal_moves
+        self.pseudo_legal_moves = self.slider_moves(
+                BISHOP_TARGETS[self.pos],
+                piece_info_func) or NO_MOVES
 
 
 def piece_class_from_code(code: PieceCode):
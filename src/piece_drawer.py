@@ -0,0 +1,47 @@
+import pygame
+
+from utils import resource_path, ASSETS_FOLDER
+from piece import PieceColor, PieceCode
+
+
+class PieceDrawer:
+
+    @classmethod
+    def load_images(cls):
+        # assets_folder = Path(__file__).parent.parent.joinpath("assets")
+        assets_folder = ASSETS_FOLDER
+        imgs = dict()
+        for color in PieceColor:
+            imgs[color] = dict()
+            for piece_code in PieceCode:
+                filename = color.name.lower()
+                filename += "_"
+                filename += piece_code.name.lower()
+                filename += ".png"
+                filepath = assets_folder.joinpath(filename)
+                img = pygame.image.load(resource_path(filepath)).convert_alpha()
+                imgs[color][piece_code] = {
+                        'filepath': filepath,
+                        'img': img
+                    }
+        cls.imgs = imgs
+
+    @classmethod
+    def resize(cls, dims):
+        cls.load_images()
+        dims = (int(dims[0]), int(dims[1]))
+        for color in PieceColor:
+            for piece_code in PieceCode:
+                img_info = cls.imgs[color][piece_code]
+                filepath = img_info['filepath']
+                img_info['img'] = pygame.image.load(filepath).convert_alpha()
+                img_info['img'] = pygame.transform.scale(img_info['img'], dims)
+
+    @classmethod
+    def draw(
+            cls,
+            surface,
+            piece_code: PieceCode,
+            color: PieceColor,
+            coords=(0, 0)):
+        surface.blit(cls.imgs[color][piece_code]['img'], coords)
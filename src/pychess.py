@@ -8,8 +8,9 @@ from game_board import GameBoard
 from main_menu import MainMenu
 from pause_menu import PauseMenu
 from game_over_menu import GameOverMenu
-from piece import PieceDrawer, PieceColor
-from player import Human
+from piece import PieceColor
+from piece_drawer import PieceDrawer
+from human import Human
 from ai import MinMaxAI
 
 class GameState(Enum):
@@ -41,7 +42,13 @@ class PyChess():
                     'piece_selection': (250, 12, 12),
                     'valid_move': (32, 255, 32)
                     },
-                'timer': 10 * 60  # seconds
+                'timer': 10 * 60,  # seconds
+                'hash_mb': 16,  # transposition table size of each AI
+                'search_workers': 1,  # processes each AI searches with
+                'opening_book': None,  # Polyglot .bin file for the AIs
+                'tablebases': None,  # endgame tables directory for the AIs
+                'ponder': False,  # AIs search on the opponent's time
+                'search_log': None  # JSON lines file of the AIs' search stats
                 }
 
         # load piece images
@@ -154,6 +161,9 @@ class PyChess():
         self.state = GameState.PAUSE
 
     def set_state_game_over(self, title, message):
+        # the game is over, stop the AIs pondering
+        for player in self.board.players.values():
+            player.pause()
         if hasattr(self, "main_menu"):
             del self.main_menu
         self.game_over_menu = GameOverMenu(
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+
+
+# how far a search may go: it ends at the first limit reached, or when
+# it is stopped. Without any limit it ends at the search_depth setting
+class SearchLimits():
+    def __init__(
+            self,
+            depth: int = None,
+            nodes: int = None,
+            move_time: float = None,
+            infinite: bool = False):
+        self.depth = depth
+        # nodes of the main and quiescence search together
+        self.nodes = nodes
+        # seconds
+        self.move_time = move_time
+        # only a stop ends the search
+        self.infinite = infinite
+
+    def __repr__(self):
+        return "SearchLimits(depth={}, nodes={}, move_time={}, infinite={})".format(
+                self.depth,
+                self.nodes,
+                self.move_time,
+                self.infinite)
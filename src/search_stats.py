@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import json
+
+from bitboard import CODE_KINDS, PIECE_CHARS
+
+
+# (old, new, promotion) in long algebraic notation, like 'e2e4' or
+# 'e7e8q'
+def long_algebraic(move) -> str:
+    (old_row, old_col), (new_row, new_col), promotion = move
+    text = "{}{}{}{}".format(
+            chr(ord('a') + old_col),
+            8 - old_row,
+            chr(ord('a') + new_col),
+            8 - new_row)
+    if promotion is not None:
+        text += PIECE_CHARS[6 + CODE_KINDS[promotion]]
+    return text
+
+
+# what a search did: how far it got, how fast and how well the moves were
+# ordered, to see where the time of a move goes
+class SearchStats():
+    def __init__(self):
+        self.depth = 0
+        self.score = None
+        # best line found, from the transposition table
+        self.pv = []
+        self.nodes = 0
+        self.qnodes = 0
+        self.time = 0.0
+        self.qsearch_time = 0.0
+        # nodes searched by each completed depth
+        self.iteration_nodes = []
+        # beta cutoffs, and those made by the first move searched
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.table_hit_rate = 0.0
+
+    @property
+    def nps(self) -> float:
+        return (self.nodes + self.qnodes) / max(self.time, 1e-9)
+
+    # how many times more nodes the last depth took than the one before
+    @property
+    def effective_branching_factor(self) -> float:
+        if len(self.iteration_nodes) < 2 or not self.iteration_nodes[-2]:
+            return None
+        return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+
+    # the share of cutoffs the first move made, a measure of the move
+    # ordering
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'depth': self.depth,
+            'score': self.score,
+            'pv': [long_algebraic(move) for move in self.pv],
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'time': round(self.time, 6),
+            'qsearch_time': round(self.qsearch_time, 6),
+            'nps': round(self.nps),
+            'effective_branching_factor': self.effective_branching_factor,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'table_hit_rate': self.table_hit_rate}
+
+    # appends the stats, and 'extra' fields, to a JSON lines file
+    def write(self, path: str, **extra):
+        record = dict(extra, **self.to_dict())
+        with open(path, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(record) + "\n")
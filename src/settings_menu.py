@@ -1,7 +1,7 @@
 import pygame_menu
 
 
-from player import Human
+from human import Human
 from ai import RandomAI, MinMaxAI
 from piece import PieceColor
 
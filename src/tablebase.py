@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from batch_movegen import PositionBatch, BITS, batch_legal_moves, batch_in_check
+from bitboard import BitboardPosition, WHITE, BLACK, PAWN, KING, PIECE_CHARS
+from bitboard import SQUARE_POS, move_to
+from game_board_controller import GameBoardController
+
+# endgame tables built by retrograde analysis: every position of a
+# material balance gets the distance to mate, in plies, for the side to
+# move. A table is named after its material, the stronger side first as
+# white ("KQvK", "KRvKN"); a position where black has the stronger pieces
+# is looked up with the colors swapped and the board flipped.
+#
+# Positions are indexed without any symmetry: the side to move, then the
+# square of each piece, white king first, white pieces by kind from queen
+# to pawn, then black the same way:
+#     index = side * 64^n + sq_0 * 64^(n - 1) + ... + sq_(n - 1)
+# so a table holds 2 * 64^n values. Castling rights and en passant are
+# left out: positions with either can't be probed.
+#
+# A value is one signed byte for the side to move: win in d plies is
+# d + 1, loss in d plies is -(d + 1) (mated is -1), 0 for a draw or for a
+# position that can't happen (two pieces on a square, a pawn on the first
+# or last rank, the side that just moved in check)
+
+TABLE_SUFFIX = ".tbl"
+# 2 * 64^4 positions and their moves still fit in memory, five pieces
+# need an index with symmetries
+MAX_PIECES = 4
+MAX_VALUE = 127
+# positions whose moves are generated together
+CHUNK_SIZE = 1 << 16
+KIND_CHARS = PIECE_CHARS[:6]
+
+
+def win_value(plies: int) -> int:
+    return plies + 1
+
+
+def loss_value(plies: int) -> int:
+    return -(plies + 1)
+
+
+# plies to mate for a value that isn't a draw
+def value_plies(value: int) -> int:
+    return abs(value) - 1
+
+
+# white kinds and black kinds, kings included, both sorted strongest
+# first
+def parse_material(name: str) -> ([int], [int]):
+    white, _, black = name.upper().partition('V')
+    sides = []
+    for text in (white, black):
+        kinds = sorted((KIND_CHARS.index(c) for c in text), reverse=True)
+        if kinds.count(KING) != 1:
+            raise ValueError("{}: each side needs one king".format(name))
+        sides.append(kinds)
+    if len(sides[0]) + len(sides[1]) > MAX_PIECES:
+        raise ValueError("{}: more than {} pieces".format(name, MAX_PIECES))
+    return sides[0], sides[1]
+
+
+def material_name(white: [int], black: [int]) -> str:
+    return "v".join(
+            "".join(KIND_CHARS[kind] for kind in sorted(kinds, reverse=True))
+            for kinds in (white, black))
+
+
+# the table name of a material balance and whether its colors are
+# swapped in that table
+def canonical_material(white: [int], black: [int]) -> (str, bool):
+    white = sorted(white, reverse=True)
+    black = sorted(black, reverse=True)
+    if black > white:
+        return material_name(black, white), True
+    return material_name(white, black), False
+
+
+# table slot order of the pieces: by color, then strongest kind first
+def _slot_order(pieces: [int]) -> [int]:
+    return sorted(
+            range(len(pieces)),
+            key=lambda slot: (pieces[slot] // 6, -(pieces[slot] % 6)))
+
+
+def _weights(count: int):
+    return 64 ** np.arange(count - 1, -1, -1, dtype=np.int64)
+
+
+def _material_pieces(name: str) -> [int]:
+    white, black = parse_material(name)
+    return white + [6 + kind for kind in black]
+
+
+# no mate can be forced or helped with a lone minor piece
+def _dead_material(pieces: [int]) -> bool:
+    extra = [piece % 6 for piece in pieces if piece % 6 != KING]
+    return len(extra) == 0 or len(extra) == 1 and extra[0] in (1, 2)
+
+
+def table_path(directory: str, name: str) -> str:
+    return os.path.join(directory, name + TABLE_SUFFIX)
+
+
+# values of a batch of positions ('pieces', (m, n) squares and sides)
+# read from the already generated table of their material
+class _TableReader():
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables = {}
+
+    def table(self, name: str):
+        if name not in self.tables:
+            self.tables[name] = np.memmap(
+                    table_path(self.directory, name),
+                    dtype=np.int8,
+                    mode='r')
+        return self.tables[name]
+
+    def values(self, pieces: [int], squares, sides):
+        white = [piece for piece in pieces if piece < 6]
+        black = [piece - 6 for piece in pieces if piece >= 6]
+        name, swapped = canonical_material(white, black)
+        if swapped:
+            pieces = [(piece + 6) % 12 for piece in pieces]
+            squares = squares ^ 56
+            sides = sides ^ 1
+        order = _slot_order(pieces)
+        index = sides.astype(np.int64) * 64 ** len(pieces) \
+            + squares[:, order] @ _weights(len(pieces))
+        return np.asarray(self.table(name)[index])
+
+
+# (m, n) piece squares and sides of table indexes
+def _unindex(indexes, count: int):
+    squares = (indexes[:, None] // _weights(count)) % 64
+    return squares, indexes // 64 ** count
+
+
+# the tables reached from 'name' by a capture or a promotion
+def sub_materials(name: str) -> [str]:
+    pieces = _material_pieces(name)
+    names = set()
+    for slot, piece in enumerate(pieces):
+        if piece % 6 == KING:
+            continue
+        rest = pieces[:slot] + pieces[slot + 1:]
+        variants = [rest]
+        if piece % 6 == PAWN:
+            base = piece - PAWN
+            variants += [
+                    pieces[:slot] + [base + kind] + pieces[slot + 1:]
+                    for kind in range(1, KING)]
+        for variant in variants:
+            names.add(canonical_material(
+                    [p for p in variant if p < 6],
+                    [p - 6 for p in variant if p >= 6])[0])
+    return sorted(names)
+
+
+# moves of the valid positions among 'indexes', as successor indexes:
+# positions of this table, or MAX_VALUE + 1 + value past the end of the
+# table for a capture or promotion, whose value comes from a smaller
+# table. Returns (moves per position, successors, mated)
+def _chunk_successors(pieces: [int], indexes, reader: _TableReader):
+    count = len(pieces)
+    size = 2 * 64 ** count
+    squares, sides = _unindex(indexes, count)
+    valid = np.ones(len(indexes), dtype=bool)
+    for i in range(count):
+        for j in range(i + 1, count):
+            valid &= squares[:, i] != squares[:, j]
+        if pieces[i] % 6 == PAWN:
+            valid &= (squares[:, i] >= 8) & (squares[:, i] < 56)
+    bitboards = np.zeros((12, len(indexes)), dtype=np.uint64)
+    for i, piece in enumerate(pieces):
+        bitboards[piece] |= BITS[squares[:, i]]
+    batch = PositionBatch(
+            bitboards,
+            sides.astype(np.uint8),
+            np.zeros(len(indexes), dtype=np.uint8),
+            np.full(len(indexes), 64, dtype=np.uint8))
+    checks = [batch_in_check(batch, WHITE), batch_in_check(batch, BLACK)]
+    in_check = np.where(sides == WHITE, checks[0], checks[1])
+    valid &= ~np.where(sides == WHITE, checks[1], checks[0])
+
+    positions = np.flatnonzero(valid)
+    position, frm, to, promotion = batch_legal_moves(batch.take(positions))
+    position = positions[position]
+    moves = np.bincount(position, minlength=len(indexes))
+    mated = valid & (moves == 0) & in_check
+
+    before = squares[position]
+    after = before.copy()
+    rows = np.arange(len(position))
+    mover = np.argmax(before == frm[:, None], axis=1)
+    after[rows, mover] = to
+    hit = before == to[:, None]
+    captured = np.where(hit.any(axis=1), np.argmax(hit, axis=1), count)
+    next_sides = sides[position] ^ 1
+    successors = next_sides * 64 ** count + after @ _weights(count)
+
+    external = np.flatnonzero((captured < count) | (promotion != 0))
+    groups = captured[external] * 8 * count \
+        + mover[external] * 8 + promotion[external]
+    for group in np.unique(groups):
+        members = external[groups == group]
+        first = members[0]
+        new_pieces = list(pieces)
+        if promotion[first]:
+            color_base = pieces[mover[first]] - pieces[mover[first]] % 6
+            new_pieces[mover[first]] = color_base + promotion[first]
+        kept = [slot for slot in range(count) if slot != captured[first]]
+        values = reader.values(
+                [new_pieces[slot] for slot in kept],
+                after[members][:, kept],
+                next_sides[members])
+        successors[members] = size + MAX_VALUE + 1 + values.astype(np.int64)
+    return moves, successors, mated
+
+
+# decides the 'positions' (with moves 'starts[i]' to 'starts[i + 1]')
+# won or lost in 'plies'. Returns how many were decided
+def _decide(values, decided, successors, positions, starts, plies) -> int:
+    successor_values = values[successors]
+    offsets = starts[:-1]
+    wins = np.logical_or.reduceat(
+            successor_values == loss_value(plies - 1), offsets)
+    lowest = np.minimum.reduceat(successor_values, offsets)
+    longest = np.maximum.reduceat(successor_values, offsets)
+    losses = (lowest > 0) & (longest == win_value(plies - 1))
+    undecided = ~decided[positions]
+    won = positions[wins & undecided]
+    lost = positions[losses & undecided]
+    values[won] = win_value(plies)
+    values[lost] = loss_value(plies)
+    decided[won] = True
+    decided[lost] = True
+    return len(won) + len(lost)
+
+
+# the values of every position of a table, from the tables of its
+# captures and promotions already in 'directory'
+def solve(name: str, directory: str, log=None):
+    pieces = _material_pieces(name)
+    size = 2 * 64 ** len(pieces)
+    # the table, followed by every possible value for the successors
+    # read from smaller tables
+    values = np.zeros(size + 2 * MAX_VALUE + 2, dtype=np.int8)
+    values[size:] = np.arange(-MAX_VALUE - 1, MAX_VALUE + 1)
+    if _dead_material(pieces):
+        return values[:size]
+
+    reader = _TableReader(directory)
+    decided = np.ones(size, dtype=bool)
+    # for each chunk of positions: the ones with moves, where their moves
+    # start and end in the successors, and the successors
+    chunks = []
+    moves = 0
+    last_external = 0
+    for start in range(0, size, CHUNK_SIZE):
+        indexes = np.arange(start, min(start + CHUNK_SIZE, size))
+        move_counts, successors, mated = _chunk_successors(
+                pieces,
+                indexes,
+                reader)
+        values[indexes[mated]] = loss_value(0)
+        movable = move_counts > 0
+        decided[indexes[movable]] = False
+        starts = np.cumsum(move_counts) - move_counts
+        chunks.append((
+                indexes[movable],
+                np.append(starts[movable], len(successors)),
+                successors.astype(np.int32)))
+        external = successors[successors >= size] - (size + MAX_VALUE + 1)
+        last_external = max(last_external, int(np.abs(external).max(initial=0)))
+        moves += len(successors)
+    if log is not None:
+        log("{}: {} positions, {} moves".format(name, size, moves))
+
+    # positions are decided in order of their distance to mate: a win in
+    # p plies has a move to a loss in p - 1, a loss in p plies only has
+    # moves to wins, the longest in p - 1
+    plies = 1
+    while True:
+        if plies + 1 > MAX_VALUE:
+            raise ValueError("{}: mate too long to store".format(name))
+        changed = 0
+        for positions, starts, successors in chunks:
+            if len(positions):
+                changed += _decide(
+                        values,
+                        decided,
+                        successors,
+                        positions,
+                        starts,
+                        plies)
+        if not changed and plies > last_external:
+            break
+        plies += 1
+    if log is not None:
+        log("{}: longest mate {} plies".format(name, plies - 1))
+    return values[:size]
+
+
+# writes the table of 'name' to 'directory', generating the tables it
+# depends on first. Tables already there are kept
+def generate(name: str, directory: str, log=None) -> str:
+    white, black = parse_material(name)
+    name = canonical_material(white, black)[0]
+    path = table_path(directory, name)
+    if os.path.exists(path):
+        return path
+    for sub_material in sub_materials(name):
+        generate(sub_material, directory, log)
+    start = time.perf_counter()
+    values = solve(name, directory, log)
+    values.tofile(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    if log is not None:
+        log("{} written in {:.1f}s".format(path, time.perf_counter() - start))
+    return path
+
+
+# the tables of a directory, probed with BitboardPositions
+class Tablebases():
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.names = set()
+        for file_name in os.listdir(directory):
+            if file_name.endswith(TABLE_SUFFIX):
+                self.names.add(file_name[:-len(TABLE_SUFFIX)])
+        self.max_pieces = max(
+                (len(name) - 1 for name in self.names),
+                default=0)
+        self.tables = {}
+
+    def table(self, name: str):
+        if name not in self.tables:
+            self.tables[name] = np.memmap(
+                    table_path(self.directory, name),
+                    dtype=np.int8,
+                    mode='r')
+        return self.tables[name]
+
+    # the value of the position for the side to move, None if there is
+    # no table for it
+    def probe(self, position: BitboardPosition) -> int:
+        if bin(position.occupied).count('1') > self.max_pieces \
+                or position.castling:
+            return None
+        if position.en_passant is not None and any(
+                move_to(move) == position.en_passant
+                for sq in _en_passant_pawns(position)
+                for move in position.legal_moves_from(sq)):
+            return None
+        pieces = []
+        squares = []
+        for sq, piece in enumerate(position.board):
+            if piece is not None:
+                pieces.append(piece)
+                squares.append(sq)
+        name, swapped = canonical_material(
+                [piece for piece in pieces if piece < 6],
+                [piece - 6 for piece in pieces if piece >= 6])
+        if name not in self.names:
+            return None
+        side = position.side
+        if swapped:
+            pieces = [(piece + 6) % 12 for piece in pieces]
+            squares = [sq ^ 56 for sq in squares]
+            side ^= 1
+        index = side
+        for slot in _slot_order(pieces):
+            index = index * 64 + squares[slot]
+        return int(self.table(name)[index])
+
+    # the move keeping the best value: the fastest win, a draw, or the
+    # slowest loss. None when the position or a move can't be probed
+    def best_move(self, controller: GameBoardController):
+        if self.probe(controller.sync_position()) is None:
+            return None
+        best = None
+        best_key = None
+        for move in controller.generate_legal_moves(controller.turn):
+            controller.make_move(*move)
+            try:
+                value = self.probe(controller.sync_position())
+            finally:
+                controller.unmake_move()
+            if value is None:
+                return None
+            if value < 0:
+                key = (2, -value_plies(value))
+            elif value == 0:
+                key = (1, 0)
+            else:
+                key = (0, value_plies(value))
+            if best_key is None or key > best_key:
+                best = move
+                best_key = key
+        return best
+
+    def close(self):
+        self.tables = {}
+
+
+# squares of the pawns that could take en passant
+def _en_passant_pawns(position: BitboardPosition) -> [int]:
+    row, column = SQUARE_POS[position.en_passant]
+    pawn_row = row + (1 if position.side == WHITE else -1)
+    pawn = position.side * 6 + PAWN
+    return [
+        pawn_row * 8 + c
+        for c in (column - 1, column + 1)
+        if 0 <= c < 8 and position.board[pawn_row * 8 + c] == pawn]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description="Generate endgame tablebases by retrograde analysis.")
+    parser.add_argument(
+            "materials",
+            nargs="+",
+            help="tables to generate, like KQvK or KRvKN")
+    parser.add_argument("-d", "--directory", default="tablebases")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    for name in args.materials:
+        generate(name, args.directory, print)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from attack_tables import BISHOP_DIRECTIONS, ROOK_DIRECTIONS
+from attack_tables import KNIGHT_TARGETS, KING_TARGETS, PAWN_CAPTURE_TARGETS
+from attack_tables import QUEEN_TARGETS, ROOK_TARGETS
+from attack_tables import bishop_attacks, rook_attacks, slider_attacks
+
+
+class AttackTablesTest(unittest.TestCase):
+    def test_leapers(self):
+        self.assertSetEqual(set(KNIGHT_TARGETS[(7, 7)]), {(5, 6), (6, 5)})
+        self.assertEqual(len(KNIGHT_TARGETS[(4, 4)]), 8)
+        self.assertEqual(len(KING_TARGETS[(0, 0)]), 3)
+        self.assertEqual(PAWN_CAPTURE_TARGETS[-1][(6, 0)], ((5, 1),))
+        self.assertSetEqual(
+                set(PAWN_CAPTURE_TARGETS[1][(1, 4)]),
+                {(2, 3), (2, 5)})
+
+    def test_rays(self):
+        # closest square first, no empty rays
+        self.assertIn(((6, 0), (5, 0), (4, 0), (3, 0), (2, 0), (1, 0), (0, 0)),
+                      ROOK_TARGETS[(7, 0)])
+        self.assertEqual(len(ROOK_TARGETS[(7, 0)]), 2)
+        self.assertEqual(sum(len(ray) for ray in QUEEN_TARGETS[(3, 3)]), 27)
+
+    def test_slider_lookups(self):
+        rng = random.Random(3)
+        for _ in range(100):
+            occupied = rng.getrandbits(64) & rng.getrandbits(64)
+            for sq in range(64):
+                self.assertEqual(
+                        rook_attacks(sq, occupied),
+                        slider_attacks(sq, occupied, ROOK_DIRECTIONS))
+                self.assertEqual(
+                        bishop_attacks(sq, occupied),
+                        slider_attacks(sq, occupied, BISHOP_DIRECTIONS))
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,67 @@
+import random
+import unittest
+
+from batch_movegen import PositionBatch, batch_legal_moves, legal_move_lists
+from bitboard import BitboardPosition
+from game_board_controller import GameBoardController
+from perft import REFERENCE_POSITIONS
+
+
+class BatchMovegenTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+        # positions reached by random games from the perft positions, plus
+        # some en passant and king edge cases
+        rng = random.Random(7)
+        self.fens = [
+            "8/8/8/KPp4r/8/8/8/7k w - c6 0 1",
+            "4k3/8/8/2KpP3/8/8/8/8 w - d6 0 1",
+            "4k3/8/8/8/8/8/8/8 w - - 0 1",
+            "r3k2r/8/8/8/8/8/5r2/R3K2R w KQkq - 0 1"]
+        position = BitboardPosition()
+        for _, fen, _ in REFERENCE_POSITIONS:
+            for _ in range(5):
+                position.fen = fen
+                for _ in range(rng.randint(0, 40)):
+                    moves = position.legal_moves(position.side)
+                    if not moves:
+                        break
+                    position.make(rng.choice(moves))
+                    self.fens.append(position.fen)
+
+    def assert_matches_controller(self, fens, move_lists):
+        self.assertEqual(len(fens), len(move_lists))
+        for fen, moves in zip(fens, move_lists):
+            self.gb.fen = fen
+            with self.subTest(fen=fen):
+                self.assertCountEqual(
+                        moves,
+                        self.gb.generate_legal_moves(self.gb.turn))
+                for old in {old for old, _, _ in moves}:
+                    self.assertSetEqual(
+                            {new for frm, new, _ in moves if frm == old},
+                            self.gb.get_legal_moves(old))
+
+    def test_fens(self):
+        self.assert_matches_controller(
+                self.fens,
+                legal_move_lists(self.fens))
+
+    def test_bytes(self):
+        position = BitboardPosition()
+        packed = []
+        for fen in self.fens:
+            position.fen = fen
+            packed.append(position.to_bytes())
+        self.assertEqual(
+                legal_move_lists(packed),
+                legal_move_lists(PositionBatch.from_fens(self.fens)))
+
+    def test_arrays(self):
+        indexes, frms, tos, promotions = batch_legal_moves(
+                ["4k3/P7/8/8/8/8/8/4K3 w - - 0 1"])
+        self.assertEqual(len(indexes), 9)
+        self.assertSetEqual(set(promotions[frms == 8].tolist()), {1, 2, 3, 4})
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from bitboard import BitboardPosition, WHITE, BLACK, square, move_to
+from game_board_controller import GameBoardController
+from piece import PieceColor, PieceCode
+
+
+class BitboardPositionTest(unittest.TestCase):
+    def setUp(self):
+        self.position = BitboardPosition()
+
+    def count_moves(self, depth):
+        if depth == 0:
+            return 1
+        count = 0
+        for move in self.position.legal_moves(self.position.side):
+            self.position.make(move)
+            count += self.count_moves(depth - 1)
+            self.position.unmake()
+        return count
+
+    def test_fen(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq e3 0 1"
+        self.position.fen = fen
+        self.assertEqual(self.position.fen, fen)
+        self.assertEqual(
+                self.position.piece_info((7, 4)),
+                (PieceCode.KING, PieceColor.WHITE))
+        self.assertIsNone(self.position.piece_info((4, 0)))
+
+    def test_initial_position(self):
+        self.position.fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+        self.assertEqual(self.count_moves(1), 20)
+        self.assertEqual(self.count_moves(3), 8902)
+
+    def test_kiwipete(self):
+        self.position.fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        self.assertEqual(self.count_moves(1), 48)
+        self.assertEqual(self.count_moves(2), 2039)
+
+    def test_pinned_en_passant(self):
+        # taking en passant would leave the king on the fifth rank open
+        self.position.fen = "8/8/8/KPp4r/8/8/8/7k w - c6 0 1"
+        moves = self.position.legal_moves_from(square((3, 1)))
+        self.assertEqual([move_to(m) for m in moves], [square((2, 1))])
+
+    def test_castling_through_check(self):
+        self.position.fen = "4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1"
+        destinations = {
+                move_to(m)
+                for m in self.position.legal_moves_from(square((7, 4)))}
+        self.assertNotIn(square((7, 6)), destinations)
+        self.assertIn(square((7, 2)), destinations)
+
+    def test_attacks(self):
+        self.position.fen = "4k3/8/8/8/8/8/8/R3K3 w - - 0 1"
+        self.assertTrue(self.position.is_square_attacked(square((0, 0)), WHITE))
+        self.assertFalse(self.position.is_square_attacked(square((0, 1)), WHITE))
+        self.assertFalse(self.position.in_check(BLACK))
+
+
+class ControllerBitboardTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def test_legal_moves_after_move(self):
+        self.gb.move_piece((6, 4), (4, 4), None)
+        self.gb.finish_turn()
+        self.assertSetEqual(
+                self.gb.get_legal_moves((0, 5)),
+                set())
+        self.assertSetEqual(
+                self.gb.get_legal_moves((7, 5)),
+                {(6, 4), (5, 3), (4, 2), (3, 1), (2, 0)})
+
+    def test_in_check(self):
+        self.gb.fen = "4k3/8/8/8/8/8/8/4R1K1 b - - 0 1"
+        self.assertTrue(self.gb.in_check(PieceColor.BLACK))
+        self.assertTrue(self.gb.is_attacked((0, 4), PieceColor.WHITE))
+        self.assertFalse(self.gb.in_check(PieceColor.WHITE))
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from piece import PieceColor, Rook
 from game_board_controller import GameBoardController
 from piece import PieceCode
@@ -26,7 +26,8 @@ class BoardUpdatePseudoLegalMovesTest(unittest.TestCase):
                 line.append(None)
             self.gb.pieces.append(line)
         r1 = Rook(PieceColor.BLACK, (7, 0))
-        r1.get_pseudo_legal_moves = MagicMock(return_value = {(7, 1), 
+        moves = {}
+        moves[r1] = {(7, 1), 
                                                               (7, 2), 
                                                               (7, 3), 
                                                               (7, 4), 
@@ -38,10 +39,10 @@ class BoardUpdatePseudoLegalMovesTest(unittest.TestCase):
                                                               (3, 0), 
                                                               (2, 0), 
                                                               (1, 0), 
-                                                              (0, 0)})
+                                                              (0, 0)}
         self.gb.pieces_by_color[PieceColor.BLACK].add((7, 0))
         r2 = Rook(PieceColor.BLACK, (7, 7))
-        r2.get_pseudo_legal_moves = MagicMock(return_value = {(7, 1), 
+        moves[r2] = {(7, 1), 
                                                               (7, 2), 
                                                               (7, 3), 
                                                               (7, 4), 
@@ -53,7 +54,15 @@ class BoardUpdatePseudoLegalMovesTest(unittest.TestCase):
                                                               (3, 7), 
                                                               (2, 7), 
                                                               (1, 7), 
-                                                              (0, 7)})
+                                                              (0, 7)}
+        # pieces use __slots__, so their methods are mocked on the class
+        get_pseudo_legal_moves = patch.object(
+                Rook,
+                'get_pseudo_legal_moves',
+                autospec=True,
+                side_effect=lambda rook: moves[rook])
+        get_pseudo_legal_moves.start()
+        self.addCleanup(get_pseudo_legal_moves.stop)
         self.gb.pieces_by_color[PieceColor.BLACK].add((7, 7))
         self.gb.pieces[7][7] = r2
         self.gb.pieces[7][0] = r1
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from evaluation import tapered, MAX_PHASE
+from game_board_controller import GameBoardController
+from perft import REFERENCE_POSITIONS
+from piece import PieceColor, PieceCode
+
+
+class EvaluationTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def check(self):
+        position = self.gb.sync_position()
+        self.assertEqual(position.evaluate(), position.compute_evaluation())
+
+    def test_start_position(self):
+        self.assertEqual(self.gb.evaluate(PieceColor.WHITE), 0)
+        self.assertEqual(self.gb.sync_position().phase, MAX_PHASE)
+
+    def test_point_of_view(self):
+        self.gb.fen = "4k3/8/8/8/8/8/8/3QK3 w - - 0 1"
+        score = self.gb.evaluate(PieceColor.WHITE)
+        self.assertGreater(score, 900)
+        self.assertEqual(self.gb.evaluate(PieceColor.BLACK), -score)
+
+    def test_mirrored_position(self):
+        self.gb.fen = REFERENCE_POSITIONS[1][1]
+        score = self.gb.evaluate(PieceColor.WHITE)
+        rows = REFERENCE_POSITIONS[1][1].split(' ')[0].split('/')
+        self.gb.fen = "/".join(reversed(rows)).swapcase() + " b kqKQ - 0 1"
+        self.assertEqual(self.gb.evaluate(PieceColor.BLACK), score)
+
+    def test_tapered(self):
+        self.assertEqual(tapered(100, -50, MAX_PHASE), 100)
+        self.assertEqual(tapered(100, -50, 0), -50)
+        self.assertEqual(tapered(100, -50, MAX_PHASE // 2), 25)
+        # promotions can take the phase past the start position
+        self.assertEqual(tapered(100, -50, MAX_PHASE + 4), 100)
+
+    def test_incremental_make_unmake(self):
+        rng = random.Random(17)
+        for _, fen, _ in REFERENCE_POSITIONS:
+            self.gb.fen = fen
+            start = self.gb.evaluate(PieceColor.WHITE)
+            played = 0
+            for _ in range(40):
+                moves = self.gb.generate_legal_moves(self.gb.turn)
+                if not moves:
+                    break
+                self.gb.make_move(*rng.choice(moves))
+                played += 1
+                self.check()
+            for _ in range(played):
+                self.gb.unmake_move()
+            self.assertEqual(self.gb.evaluate(PieceColor.WHITE), start)
+
+    def test_promotion(self):
+        self.gb.fen = "4k3/P7/8/8/8/8/8/4K3 w - - 0 1"
+        before = self.gb.evaluate(PieceColor.WHITE)
+        self.gb.make_move((1, 0), (0, 0), PieceCode.QUEEN)
+        self.check()
+        self.assertGreater(self.gb.evaluate(PieceColor.WHITE), before + 600)
+        self.gb.unmake_move()
+        self.assertEqual(self.gb.evaluate(PieceColor.WHITE), before)
+
+    def test_move_piece(self):
+        self.gb.move_piece((6, 4), (4, 4), None)
+        self.gb.finish_turn()
+        self.check()
+        self.assertGreater(self.gb.evaluate(PieceColor.WHITE), 0)
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from game_board_controller import GameBoardController
+from piece import PieceCode, PieceColor
+
+
+class GenerateLegalMovesTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def moves_from(self, pos, color=PieceColor.WHITE):
+        return {
+            new for old, new, _ in self.gb.generate_legal_moves(color)
+            if old == pos}
+
+    def test_initial_position(self):
+        moves = self.gb.generate_legal_moves(PieceColor.WHITE)
+        self.assertEqual(len(moves), 20)
+        self.assertEqual(len(self.gb.generate_legal_moves(PieceColor.BLACK)), 20)
+
+    def test_double_check(self):
+        # only the king may move
+        self.gb.fen = "4k3/8/8/8/8/5n2/8/3QKr2 w - - 0 1"
+        moves = self.gb.generate_legal_moves(PieceColor.WHITE)
+        self.assertTrue(all(old == (7, 4) for old, _, _ in moves))
+        self.assertSetEqual(self.moves_from((7, 4)), {(6, 4), (7, 5)})
+
+    def test_check_evasion(self):
+        # the rook and the bishop can only block, the king must step aside
+        self.gb.fen = "4r1k1/8/8/8/1B6/8/3R4/4K3 w - - 0 1"
+        self.assertSetEqual(self.moves_from((6, 3)), {(6, 4)})
+        self.assertSetEqual(self.moves_from((4, 1)), {(1, 4)})
+        self.assertSetEqual(self.moves_from((7, 4)), {(7, 3), (7, 5), (6, 5)})
+
+    def test_pin(self):
+        # the knight is pinned, the bishop may only slide along its pin
+        self.gb.fen = "4k3/4r3/8/b7/4N3/2B5/8/4K3 w - - 0 1"
+        self.assertSetEqual(self.moves_from((4, 4)), set())
+        self.assertSetEqual(self.moves_from((5, 2)), {(4, 1), (3, 0), (6, 3)})
+
+    def test_promotions(self):
+        self.gb.fen = "4k3/P7/8/8/8/8/8/4K3 w - - 0 1"
+        promotions = {
+            promotion
+            for old, _, promotion in self.gb.generate_legal_moves(PieceColor.WHITE)
+            if old == (1, 0)}
+        self.assertSetEqual(promotions, {
+            PieceCode.QUEEN,
+            PieceCode.ROOK,
+            PieceCode.BISHOP,
+            PieceCode.KNIGHT})
+
+    def test_matches_get_legal_moves(self):
+        self.gb.fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        moves = self.gb.generate_legal_moves(PieceColor.WHITE)
+        self.assertEqual(len(moves), 48)
+        for pos in self.gb.pieces_by_color[PieceColor.WHITE]:
+            self.assertSetEqual(self.gb.get_legal_moves(pos), self.moves_from(pos))
+
+    def test_stalemate(self):
+        self.gb.fen = "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+        self.assertTrue(self.gb.stalemate_rule())
+        self.assertTrue(self.gb.stalemate_draw)
+
+    if __name__ == "__main__":
+        unittest.main()
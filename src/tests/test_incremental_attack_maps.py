@@ -0,0 +1,60 @@
+import unittest
+
+from game_board_controller import GameBoardController
+from piece import PieceCode, PieceColor
+
+
+class IncrementalAttackMapsTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController(debug_attack_maps=True)
+
+    def play(self, moves):
+        # debug mode raises if an incremental update differs from a
+        # full rebuild
+        for old, new, promotion in moves:
+            self.assertIn(new, self.gb.get_legal_moves(old))
+            self.gb.move_piece(old, new, promotion)
+            self.gb.finish_turn()
+
+    def test_opening(self):
+        self.play([
+            ((6, 4), (4, 4), None),
+            ((1, 4), (3, 4), None),
+            ((7, 6), (5, 5), None),
+            ((0, 1), (2, 2), None),
+            ((7, 5), (4, 2), None),
+            ((0, 6), (2, 5), None),
+            ((7, 4), (7, 6), None),
+            ((2, 5), (4, 4), None)])
+        # only the knight on e4 attacks f2, only the bishop on c4 attacks f7
+        self.assertEqual(self.gb.attack_counts[PieceColor.BLACK][(6, 5)], 1)
+        self.assertEqual(self.gb.attack_counts[PieceColor.WHITE][(1, 5)], 1)
+        # the rook castled to f1 and can move back to the empty e1
+        self.assertIn((7, 4), self.gb.get_pseudo_legal_moves((7, 5)))
+
+    def test_en_passant_and_promotion(self):
+        self.gb.fen = "1n2k3/P7/8/8/5p2/8/4P3/4K3 w - - 0 1"
+        self.play([
+            ((6, 4), (4, 4), None),
+            ((4, 5), (5, 4), None),
+            ((1, 0), (0, 1), PieceCode.QUEEN)])
+        self.assertIsNone(self.gb.piece_info((4, 4)))
+        self.assertEqual(
+                self.gb.attack_counts[PieceColor.WHITE][(0, 4)],
+                1)
+        self.assertIn((0, 4), self.gb.attackable_tiles_from[PieceColor.WHITE])
+
+    def test_counts_match_tiles(self):
+        self.play([
+            ((6, 3), (4, 3), None),
+            ((1, 2), (3, 2), None),
+            ((4, 3), (3, 2), None)])
+        for color in PieceColor:
+            self.assertSetEqual(
+                    set(self.gb.attack_counts[color]),
+                    self.gb.attackable_tiles_from[color])
+            self.assertTrue(all(
+                count > 0 for count in self.gb.attack_counts[color].values()))
+
+    if __name__ == "__main__":
+        unittest.main()
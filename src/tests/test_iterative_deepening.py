@@ -0,0 +1,48 @@
+import time
+import unittest
+
+from ai import MinMaxAI, DEFAULT_DEPTH, time_budget
+from piece import PieceColor
+
+FEN = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+
+
+class IterativeDeepeningTest(unittest.TestCase):
+    def setUp(self):
+        self.ai = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+
+    def test_time_budget(self):
+        self.assertAlmostEqual(time_budget(40000, 0), 1.0)
+        # fewer moves to go later in the game
+        self.assertGreater(time_budget(40000, 20), time_budget(40000, 0))
+        self.assertAlmostEqual(time_budget(10000, 100), 1.0)
+        self.assertEqual(time_budget(-5, 0), 0)
+
+    def test_fixed_depth_without_clock(self):
+        move = self.ai.make_move(None, None, None, None, FEN)
+        self.assertIn(move, self.ai.controller.generate_legal_moves(PieceColor.WHITE))
+        self.assertEqual(self.ai.completed_depth, DEFAULT_DEPTH)
+
+    def test_stops_on_budget(self):
+        # 0.1 seconds for this move
+        self.ai.time_left_func = lambda color: 3700
+        start = time.perf_counter()
+        move = self.ai.make_move(None, None, None, None, FEN)
+        elapsed = time.perf_counter() - start
+        self.assertIn(move, self.ai.controller.generate_legal_moves(PieceColor.WHITE))
+        self.assertGreaterEqual(self.ai.completed_depth, 1)
+        self.assertLess(elapsed, 0.5)
+
+    def test_empty_clock_still_moves(self):
+        self.ai.time_left_func = lambda color: 0
+        move = self.ai.make_move(None, None, None, None, FEN)
+        self.assertIn(move, self.ai.controller.generate_legal_moves(PieceColor.WHITE))
+        self.assertEqual(self.ai.completed_depth, 1)
+
+    def test_deeper_with_more_time(self):
+        self.ai.time_left_func = lambda color: 37 * 1000
+        self.ai.make_move(None, None, None, None, FEN)
+        self.assertGreater(self.ai.completed_depth, 1)
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from game_board_controller import GameBoardController
+from piece import PieceCode, PieceColor
+
+
+class MakeUnmakeMoveTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def assert_round_trip(self, fen, old, new, promotion=None):
+        self.gb.fen = fen
+        pieces = [row.copy() for row in self.gb.pieces]
+        self.gb.make_move(old, new, promotion)
+        self.assertNotEqual(self.gb.fen, fen)
+        self.gb.unmake_move()
+        self.assertEqual(self.gb.fen, fen)
+        self.assertEqual(self.gb.pieces, pieces)
+        for color in PieceColor:
+            for pos in self.gb.pieces_by_color[color]:
+                self.assertEqual(self.gb.pieces[pos[0]][pos[1]].pos, pos)
+
+    def test_simple_move(self):
+        self.gb.make_move((6, 4), (4, 4))
+        self.assertEqual(
+                self.gb.fen,
+                "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 1 0")
+        self.assertFalse(self.gb.pieces[4][4].first_move)
+        self.gb.unmake_move()
+        self.assertTrue(self.gb.pieces[6][4].first_move)
+        self.assertEqual(
+                self.gb.fen,
+                "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0")
+
+    def test_castling(self):
+        fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+        self.assert_round_trip(fen, (7, 4), (7, 6))
+        self.gb.make_move((7, 4), (7, 2))
+        self.assertEqual(self.gb.piece_info((7, 3)), (PieceCode.ROOK, PieceColor.WHITE))
+        self.assertEqual(self.gb.castling, "kq")
+
+    def test_en_passant(self):
+        fen = "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1"
+        self.assert_round_trip(fen, (3, 4), (2, 3))
+        self.gb.make_move((3, 4), (2, 3))
+        self.assertIsNone(self.gb.piece_info((3, 3)))
+        self.assertEqual(len(self.gb.pieces_by_color[PieceColor.BLACK]), 1)
+
+    def test_promotion_capture(self):
+        fen = "1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1"
+        self.assert_round_trip(fen, (1, 0), (0, 1), PieceCode.KNIGHT)
+        self.gb.make_move((1, 0), (0, 1), PieceCode.KNIGHT)
+        self.assertEqual(self.gb.piece_info((0, 1)), (PieceCode.KNIGHT, PieceColor.WHITE))
+
+    def test_checkmate(self):
+        self.gb.fen = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+        self.gb.make_move((7, 0), (0, 0))
+        self.assertTrue(self.gb.is_checkmate_valid((0, 0)))
+        self.gb.unmake_move()
+        self.assertTrue(self.gb.has_legal_moves(PieceColor.BLACK))
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from ai import MinMaxAI
+from game_board_controller import GameBoardController
+from move_ordering import MoveOrderer
+from piece import PieceColor, PieceCode
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+# keeps the move generator's order and learns nothing
+class UnorderedMoves(MoveOrderer):
+    def order(self, controller, moves, color, ply, first=None):
+        for move in moves:
+            yield move, True
+
+    def cutoff(self, move, color, ply, depth):
+        pass
+
+
+class MoveOrderingTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+        self.orderer = MoveOrderer()
+
+    def order(self, fen, ply=0, first=None):
+        self.gb.fen = fen
+        moves = self.gb.generate_legal_moves(self.gb.turn)
+        return list(self.orderer.order(self.gb, moves, self.gb.turn, ply, first))
+
+    def test_mvv_lva(self):
+        # the pawn and the knight can both take the queen, the pawn can
+        # also take the rook
+        ordered = self.order("4k3/8/8/3q1r2/4P3/2N5/8/4K3 w - - 0 1")
+        captures = [move for move, quiet in ordered if not quiet]
+        self.assertEqual(captures, [
+            ((4, 4), (3, 3), None),
+            ((5, 2), (3, 3), None),
+            ((4, 4), (3, 5), None)])
+        # captures come before every quiet move
+        self.assertEqual([quiet for _, quiet in ordered[:3]], [False] * 3)
+        self.assertTrue(all(quiet for _, quiet in ordered[3:]))
+
+    def test_promotion_and_en_passant_are_noisy(self):
+        ordered = self.order("4k3/P7/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        noisy = {move for move, quiet in ordered if not quiet}
+        self.assertIn(((1, 0), (0, 0), PieceCode.QUEEN), noisy)
+        self.assertIn(((3, 4), (2, 3), None), noisy)
+        self.assertEqual(ordered[0][0], ((1, 0), (0, 0), PieceCode.QUEEN))
+
+    def test_first_move(self):
+        first = ((6, 0), (5, 0), None)
+        ordered = self.order(KIWIPETE, first=first)
+        self.assertEqual(ordered[0], (first, True))
+        self.assertEqual([move for move, _ in ordered].count(first), 1)
+        self.assertEqual(len(ordered), 48)
+
+    def test_killers_and_history(self):
+        killer = ((6, 0), (4, 0), None)
+        liked = ((6, 6), (5, 6), None)
+        self.orderer.cutoff(killer, PieceColor.WHITE, 2, 3)
+        self.orderer.cutoff(liked, PieceColor.WHITE, 5, 4)
+        self.orderer.cutoff(liked, PieceColor.WHITE, 5, 4)
+        ordered = self.order(KIWIPETE, ply=2)
+        quiet = [move for move, is_quiet in ordered if is_quiet]
+        self.assertEqual(quiet[:2], [killer, liked])
+        # killers only apply to their ply
+        ordered = self.order(KIWIPETE, ply=3)
+        quiet = [move for move, is_quiet in ordered if is_quiet]
+        self.assertEqual(quiet[:2], [liked, killer])
+        self.assertEqual(self.orderer.killers[5][:1], [liked])
+
+    def test_new_search(self):
+        move = ((6, 0), (4, 0), None)
+        self.orderer.cutoff(move, PieceColor.WHITE, 1, 4)
+        self.orderer.new_search()
+        self.assertEqual(self.orderer.killers[1], [None, None])
+        self.assertEqual(self.orderer.history[(PieceColor.WHITE, move[0], move[1])], 8)
+
+    def test_fewer_nodes(self):
+        ordered = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+        unordered = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+        unordered.move_orderer = UnorderedMoves()
+        for ai in (ordered, unordered):
+            # static leaves: the unordered quiescence search of kiwipete
+            # takes minutes
+            ai.quiescence = lambda alpha, beta, is_max, ply=0, ai=ai: ai.board_state_score()
+            ai.make_move(None, None, None, None, KIWIPETE)
+        self.assertEqual(ordered.completed_depth, unordered.completed_depth)
+        self.assertLess(ordered.nodes * 4, unordered.nodes)
+
+    if __name__ == "__main__":
+        unittest.main()
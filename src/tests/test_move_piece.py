@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from piece import PieceColor, Rook
 from game_board_controller import GameBoardController
 from piece import PieceCode
@@ -21,11 +21,16 @@ class MovePiecesTest(unittest.TestCase):
             for j in range(8):
                 line.append(None)
             self.gb.pieces.append(line)
+        # pieces use __slots__, so their methods are mocked on the class
+        notify_move = patch.object(
+                Rook,
+                'notify_move',
+                return_value=(None, None))
+        notify_move.start()
+        self.addCleanup(notify_move.stop)
         self.r1 = Rook(PieceColor.BLACK, (7, 0))
-        self.r1.notify_move = MagicMock(return_value=(None, None))
         self.gb.pieces_by_color[PieceColor.BLACK].add((7, 0))
         self.r2 = Rook(PieceColor.BLACK, (7, 7))
-        self.r2.notify_move = MagicMock(return_value=(None, None))
         self.gb.pieces_by_color[PieceColor.BLACK].add((7, 7))
         self.gb.pieces[7][7] = self.r2
         self.gb.pieces[7][0] = self.r1
@@ -0,0 +1,46 @@
+import unittest
+
+import bench
+from ai import MinMaxAI
+from piece import PieceColor
+
+FENS = [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1"]
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def search(self, fen, workers):
+        ai = MinMaxAI(PieceColor.WHITE, {
+            'hash_mb': 1,
+            'search_depth': 2,
+            'search_workers': workers})
+        self.addCleanup(ai.close)
+        ai.controller.fen = fen
+        return ai, ai.iterative_deepening()
+
+    def test_same_score_as_sequential(self):
+        for fen in FENS:
+            _, sequential = self.search(fen, 1)
+            ai, parallel = self.search(fen, 2)
+            self.assertEqual(parallel[1], sequential[1])
+            self.assertEqual(ai.completed_depth, 2)
+            self.assertGreater(ai.nodes, 0)
+
+    def test_make_move(self):
+        ai, _ = self.search(FENS[0], 2)
+        move = ai.make_move(None, None, None, None, FENS[0])
+        self.assertIn(move, ai.controller.generate_legal_moves(PieceColor.WHITE))
+
+    def test_paused(self):
+        ai, _ = self.search(FENS[0], 2)
+        ai.pause()
+        self.assertIsNone(ai.make_move(None, None, None, None, FENS[0]))
+
+    def test_bench(self):
+        nodes, elapsed = bench.run(FENS[1:], 2, 2)
+        self.assertGreater(nodes, 0)
+        self.assertGreater(elapsed, 0)
+
+    if __name__ == "__main__":
+        unittest.main()
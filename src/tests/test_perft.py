@@ -0,0 +1,33 @@
+import unittest
+
+from game_board_controller import GameBoardController
+from perft import REFERENCE_POSITIONS, divide, move_name, perft
+from piece import PieceCode
+
+
+class PerftTest(unittest.TestCase):
+    def test_reference_positions(self):
+        controller = GameBoardController()
+        for name, fen, counts in REFERENCE_POSITIONS:
+            controller.fen = fen
+            for depth, expected in enumerate(counts[:2], 1):
+                with self.subTest(name=name, depth=depth):
+                    self.assertEqual(perft(controller, depth), expected)
+            # perft leaves the position as it found it
+            self.assertEqual(controller.fen, fen)
+
+    def test_divide(self):
+        name, fen, counts = REFERENCE_POSITIONS[1]
+        moves = divide(fen, 2)
+        self.assertEqual(len(moves), counts[0])
+        self.assertEqual(sum(moves.values()), counts[1])
+        # castling and en passant edge cases of the reference position
+        self.assertEqual(moves["e1g1"], 43)
+        self.assertEqual(moves["e1c1"], 43)
+
+    def test_move_name(self):
+        self.assertEqual(move_name((6, 4), (4, 4), None), "e2e4")
+        self.assertEqual(move_name((1, 0), (0, 0), PieceCode.QUEEN), "a7a8q")
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,67 @@
+import random
+import unittest
+
+from game_board_controller import GameBoardController
+from pgn import read_games, parse_san, write_san, write_game
+from piece import PieceCode
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class PGNTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def san(self, fen, move):
+        self.gb.fen = fen
+        return write_san(self.gb, move)
+
+    def test_san(self):
+        self.assertEqual(self.san(START, ((6, 4), (4, 4), None)), "e4")
+        self.assertEqual(self.san(START, ((7, 6), (5, 5), None)), "Nf3")
+        fen = "4k3/P7/8/8/8/8/1N3N2/4K2R w K - 0 1"
+        self.assertEqual(self.san(fen, ((6, 1), (5, 3), None)), "Nbd3")
+        self.assertEqual(self.san(fen, ((1, 0), (0, 0), PieceCode.KNIGHT)), "a8=N")
+        self.assertEqual(self.san(fen, ((1, 0), (0, 0), None)), "a8=Q+")
+        self.assertEqual(self.san(fen, ((7, 4), (7, 6), None)), "O-O")
+        # rooks on the same file
+        self.assertEqual(
+                self.san("4k3/8/8/R7/8/8/8/R3K3 w - - 0 1", ((3, 0), (5, 0), None)),
+                "R5a3")
+        self.assertEqual(
+                self.san("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", ((3, 4), (2, 3), None)),
+                "exd6")
+        self.assertEqual(
+                self.san("7k/5Q2/6K1/8/8/8/8/8 w - - 0 1", ((1, 5), (0, 5), None)),
+                "Qf8#")
+
+    def test_san_round_trip(self):
+        rng = random.Random(3)
+        self.gb.fen = START
+        for _ in range(200):
+            moves = self.gb.generate_legal_moves(self.gb.turn)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            self.assertEqual(parse_san(self.gb, write_san(self.gb, move)), move)
+            self.gb.make_move(*move)
+
+    def test_write_game(self):
+        text = write_game(
+                {"White": "A", "Black": "B", "FEN": "4k3/8/8/8/8/8/8/4K2R b K - 0 12"},
+                ["Kd7", "O-O", "Ke6"],
+                "1/2-1/2")
+        self.assertIn('[Result "1/2-1/2"]\n', text)
+        self.assertTrue(text.startswith('[Event "?"]\n'))
+        self.assertIn("12... Kd7 13. O-O Ke6 1/2-1/2", text)
+        headers, moves, result = next(read_games(text))
+        self.assertEqual(headers["White"], "A")
+        self.assertEqual(moves, ["Kd7", "O-O", "Ke6"])
+        self.assertEqual(result, "1/2-1/2")
+
+    def test_long_lines_wrap(self):
+        text = write_game({}, ["Nf3", "Nf6", "Ng1", "Ng8"] * 20, "*")
+        self.assertTrue(all(len(line) < 80 for line in text.splitlines()))
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from piece import Bishop, King, Knight, Pawn, PieceColor, Queen, Rook
+from piece import NO_MOVES
 
 
 class PieceUpdatePseudoLegalMovesTest(unittest.TestCase):
@@ -68,6 +69,13 @@ class PieceUpdatePseudoLegalMovesTest(unittest.TestCase):
         self.king.update_pseudo_legal_moves(self.get_piece, None, None)
         self.assertSetEqual(self.king.pseudo_legal_moves, set())
 
+    def test_compact_pieces(self):
+        self.king.update_pseudo_legal_moves(self.get_piece, None, None)
+        self.assertIs(self.king.pseudo_legal_moves, NO_MOVES)
+        for row in self.pieces:
+            for piece in row:
+                if piece is not None:
+                    self.assertFalse(hasattr(piece, '__dict__'))
 
     if __name__ == "__main__":
         unittest.main()
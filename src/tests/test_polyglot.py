@@ -0,0 +1,153 @@
+import os
+import random
+import tempfile
+import unittest
+
+from ai import MinMaxAI
+from game_board_controller import GameBoardController
+from pgn import read_games, parse_san
+from piece import PieceColor, PieceCode
+from polyglot import (
+        OpeningBook,
+        build_book,
+        write_book,
+        polyglot_hash,
+        encode_book_move,
+        decode_book_move)
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PGN = """[Event "Test"]
+[White "A"]
+[Black "B"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {main line} Nc6 (2... d6 3. d4) 3. Bb5 a6 $1 4. Ba4 Nf6
+5. O-O Be7 1-0
+
+[Event "Test"]
+[Result "0-1"]
+
+1. e4 c5 2. Nf3 d6 3. d4 cxd4 4. Nxd4 Nf6 5. Nc3 a6 0-1
+
+[Event "Test"]
+[Result "1/2-1/2"]
+
+1. d4 d5 2. c4 e6 1/2-1/2
+"""
+
+
+class PolyglotTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+        self.gb.fen = START
+
+    def play(self, moves):
+        for move in moves.split():
+            self.gb.make_move(*parse_san(self.gb, move))
+
+    def key(self):
+        return polyglot_hash(self.gb.sync_position())
+
+    def write(self, entries):
+        fd, path = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        write_book(path, entries)
+        return path
+
+    def test_reference_keys(self):
+        # keys given with the Polyglot format description
+        self.assertEqual(self.key(), 0x463b96181691fc9c)
+        self.play("e4")
+        self.assertEqual(self.key(), 0x823c9b50fd114196)
+        self.play("d5")
+        self.assertEqual(self.key(), 0x0756b94461c50fb0)
+        self.play("e5")
+        self.assertEqual(self.key(), 0x662fafb965db29d4)
+        # en passant possible
+        self.play("f5")
+        self.assertEqual(self.key(), 0x22a48b5a8e47ff78)
+        self.play("Ke2")
+        self.assertEqual(self.key(), 0x652a607ca3f242c1)
+        self.play("Kf7")
+        self.assertEqual(self.key(), 0x00fdd303c946bdd9)
+
+    def test_reference_keys_en_passant(self):
+        self.play("a4 b5 h4 b4 c4")
+        self.assertEqual(self.key(), 0x3c8123ea7b067637)
+        self.play("bxc3 Ra3")
+        self.assertEqual(self.key(), 0x5c3f9b829b279560)
+
+    def test_castling_move(self):
+        self.gb.fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+        position = self.gb.sync_position()
+        for move, book_move in [
+                (((7, 4), (7, 6), None), 0x107),
+                (((7, 4), (7, 2), None), 0x100)]:
+            self.assertEqual(encode_book_move(position, move), book_move)
+            self.assertEqual(decode_book_move(position, book_move), move)
+
+    def test_read_games(self):
+        games = list(read_games(PGN))
+        self.assertEqual(len(games), 3)
+        headers, moves, result = games[0]
+        self.assertEqual(headers["White"], "A")
+        self.assertEqual(result, "1-0")
+        self.assertEqual(moves[:4], ["e4", "e5", "Nf3", "Nc6"])
+        self.assertIn("O-O", moves)
+        self.assertEqual(len(moves), 10)
+
+    def test_parse_san(self):
+        self.gb.fen = "4k3/P7/8/8/8/8/1N3N2/4K3 w - - 0 1"
+        self.assertEqual(parse_san(self.gb, "a8=Q+"), ((1, 0), (0, 0), PieceCode.QUEEN))
+        # two knights can go to d3
+        self.assertIsNone(parse_san(self.gb, "Nd3"))
+        self.assertEqual(parse_san(self.gb, "Nbd3"), ((6, 1), (5, 3), None))
+        self.assertIsNone(parse_san(self.gb, "Qd4"))
+
+    def test_build_and_probe(self):
+        path = self.write(build_book([PGN], plies=6))
+        with OpeningBook(path) as book:
+            moves = dict(book.moves(self.gb))
+            # e4 won one game and lost one, d4 drew
+            self.assertEqual(moves, {
+                ((6, 4), (4, 4), None): 2,
+                ((6, 3), (4, 3), None): 1})
+            self.play("e4")
+            moves = dict(book.moves(self.gb))
+            self.assertEqual(moves, {((1, 2), (3, 2), None): 2})
+            self.play("c5 Nf3 d6 Nc3")
+            self.assertEqual(book.moves(self.gb), [])
+            self.assertIsNone(book.choose(self.gb))
+
+    def test_weighted_choice(self):
+        position = self.gb.sync_position()
+        key = polyglot_hash(position)
+        e4 = ((6, 4), (4, 4), None)
+        d4 = ((6, 3), (4, 3), None)
+        path = self.write([
+            (key, encode_book_move(position, e4), 3),
+            (key, encode_book_move(position, d4), 1)])
+        with OpeningBook(path) as book:
+            rng = random.Random(1)
+            picks = [book.choose(self.gb, rng) for _ in range(400)]
+        self.assertEqual(set(picks), {e4, d4})
+        self.assertGreater(picks.count(e4), 2 * picks.count(d4))
+
+    def test_empty_book(self):
+        with OpeningBook(self.write([])) as book:
+            self.assertEqual(len(book), 0)
+            self.assertIsNone(book.choose(self.gb))
+
+    def test_minmax_plays_book(self):
+        path = self.write(build_book([PGN], plies=1))
+        ai = MinMaxAI(PieceColor.WHITE, {'opening_book': path})
+        self.addCleanup(ai.close)
+        self.assertIn(
+                ai.make_move(None, None, None, None, START),
+                [((6, 4), (4, 4), None), ((6, 3), (4, 3), None)])
+        self.assertEqual(ai.nodes, 0)
+
+    if __name__ == "__main__":
+        unittest.main()
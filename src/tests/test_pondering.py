@@ -0,0 +1,98 @@
+import time
+import unittest
+
+from ai import MinMaxAI
+from game_board_controller import GameBoardController
+from piece import PieceColor
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class PonderingTest(unittest.TestCase):
+    def setUp(self):
+        self.ai = MinMaxAI(
+                PieceColor.WHITE,
+                {'ponder': True, 'search_depth': 2, 'hash_mb': 1})
+        self.addCleanup(self.ai.close)
+        self.gb = GameBoardController()
+        self.gb.fen = START
+
+    # the position after the AI's move and 'reply', None for the reply
+    # the AI expects
+    def answer(self, move, reply=None):
+        self.gb.make_move(*move)
+        if reply is None:
+            reply = self.ai.ponder_move
+        self.gb.make_move(*reply)
+        return self.gb.sync_position().fen
+
+    def legal(self, move):
+        return move in self.gb.generate_legal_moves(self.gb.turn)
+
+    def test_ponder_hit(self):
+        move = self.ai.make_move(None, None, None, None, START)
+        self.assertIsNotNone(self.ai.ponder_move)
+        # let the ponder search run past the depth a move gets
+        time.sleep(0.5)
+        fen = self.answer(move)
+        move = self.ai.make_move(None, None, None, None, fen)
+        self.assertEqual(self.ai.ponder_hits, 1)
+        self.assertEqual(self.ai.ponder_misses, 0)
+        self.assertGreaterEqual(self.ai.completed_depth, 2)
+        self.assertTrue(self.legal(move))
+
+    def test_ponder_miss(self):
+        move = self.ai.make_move(None, None, None, None, START)
+        self.gb.make_move(*move)
+        reply = next(
+                reply
+                for reply in self.gb.generate_legal_moves(self.gb.turn)
+                if reply != self.ai.ponder_move)
+        self.gb.unmake_move()
+        fen = self.answer(move, reply)
+        move = self.ai.make_move(None, None, None, None, fen)
+        self.assertEqual(self.ai.ponder_hits, 0)
+        self.assertEqual(self.ai.ponder_misses, 1)
+        self.assertTrue(self.legal(move))
+
+    def test_table_kept_after_miss(self):
+        self.ai.make_move(None, None, None, None, START)
+        time.sleep(0.2)
+        key = self.ai._ponder_key
+        self.ai.stop_pondering()
+        self.assertIsNotNone(self.ai.transposition_table.probe(key))
+
+    def test_ponder_hit_on_the_clock(self):
+        self.ai.time_left_func = lambda color: 4000
+        move = self.ai.make_move(None, None, None, None, START)
+        fen = self.answer(move)
+        start = time.perf_counter()
+        move = self.ai.make_move(None, None, None, None, fen)
+        # 4 seconds over 40 moves
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(self.ai.ponder_hits, 1)
+        self.assertTrue(self.legal(move))
+
+    def test_pause_stops_pondering(self):
+        self.ai.make_move(None, None, None, None, START)
+        thread = self.ai._ponder_thread
+        self.ai.pause()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_pause_during_ponder_then_hit(self):
+        self.ai.search_depth = 4
+        move = self.ai.make_move(None, None, None, None, START)
+        self.ai.pause()
+        self.ai.unpause()
+        fen = self.answer(move)
+        move = self.ai.make_move(None, None, None, None, fen)
+        # searched again to the full depth instead of playing the
+        # stopped ponder search
+        self.assertEqual(self.ai.ponder_hits, 0)
+        self.assertEqual(self.ai.ponder_misses, 1)
+        self.assertEqual(self.ai.stats.depth, 4)
+        self.assertTrue(self.legal(move))
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from bitboard import BitboardPosition, POSITION_BYTES
+from game_board_controller import GameBoardController
+from piece import PieceColor
+
+
+class PositionBytesTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def test_round_trip(self):
+        for fen in [
+                "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0",
+                "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq - 3 41",
+                "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1",
+                "8/8/8/8/8/8/8/8 b - - 0 1"]:
+            position = BitboardPosition()
+            position.fen = fen
+            data = position.to_bytes()
+            self.assertEqual(len(data), POSITION_BYTES)
+            copy = BitboardPosition()
+            copy.from_bytes(data)
+            self.assertEqual(copy.fen, fen)
+            self.assertEqual(copy.hash, position.hash)
+
+    def test_controller(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        self.gb.fen = fen
+        other = GameBoardController()
+        other.from_bytes(self.gb.to_bytes())
+        self.assertEqual(other.fen, fen)
+        self.assertEqual(other.zobrist_hash, self.gb.zobrist_hash)
+        self.assertEqual(
+                len(other.generate_legal_moves(PieceColor.WHITE)),
+                48)
+        self.assertEqual(self.gb.copy().fen, fen)
+
+    def test_between_move_and_finish_turn(self):
+        self.gb.move_piece((6, 4), (4, 4), None)
+        other = GameBoardController()
+        other.from_bytes(self.gb.to_bytes())
+        self.assertEqual(other.fen, self.gb.fen)
+
+    def test_fen_cache(self):
+        fen = self.gb.fen
+        self.assertIs(self.gb.fen, fen)
+        self.gb.make_move((6, 4), (4, 4))
+        self.assertNotEqual(self.gb.fen, fen)
+        self.gb.unmake_move()
+        self.assertEqual(self.gb.fen, fen)
+        self.gb.move_piece((6, 4), (4, 4), None)
+        self.gb.finish_turn()
+        self.assertEqual(
+                self.gb.fen,
+                "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 1 0")
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from ai import MinMaxAI, INFINITE
+from piece import PieceColor
+
+
+class QuiescenceTest(unittest.TestCase):
+    def setUp(self):
+        self.ai = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+
+    def search(self, fen, depth):
+        self.ai.controller.fen = fen
+        self.ai._root_depth = depth
+        return self.ai.minimax(depth, -INFINITE, INFINITE, None, True)
+
+    def test_quiet_position_stands_pat(self):
+        self.ai.controller.fen = "4k3/8/8/8/8/8/8/3QK3 w - - 0 1"
+        score = self.ai.quiescence(-INFINITE, INFINITE, True)
+        self.assertEqual(score, self.ai.board_state_score())
+        self.assertEqual(self.ai.qnodes, 1)
+
+    def test_no_horizon_blunder(self):
+        # the d5 pawn is defended, a plain depth 1 search takes it
+        moves, score = self.search("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1", 1)
+        self.assertNotIn(((7, 3), (3, 3), None), moves)
+        # still a queen against two pawns
+        self.assertGreater(score, 600)
+        self.assertGreater(self.ai.qnodes, 0)
+
+    def test_winning_exchange(self):
+        # the undefended knight is won at the end of a depth 1 search
+        moves, score = self.search("4k3/8/8/3n4/8/8/8/3QK3 w - - 0 1", 1)
+        self.assertEqual(moves, {((7, 3), (3, 3), None)})
+        # a queen against nothing
+        self.assertGreater(score, 900)
+
+    def test_check_evasion(self):
+        # back rank mate: standing pat would miss it
+        fen = "k7/8/8/8/8/8/5PPP/3r2K1 w - - 0 1"
+        self.ai.controller.fen = fen
+        self.assertEqual(self.ai.quiescence(-INFINITE, INFINITE, True), -INFINITE)
+        self.ai.quiescence_evasions = False
+        self.assertEqual(
+                self.ai.quiescence(-INFINITE, INFINITE, True),
+                self.ai.board_state_score())
+
+    def test_node_rates(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        self.ai.make_move(None, None, None, None, fen)
+        self.assertGreater(self.ai.qnodes, 0)
+        self.assertGreater(self.ai.qsearch_time, 0)
+        self.assertLess(self.ai.qsearch_time, self.ai.search_time)
+        self.assertGreater(self.ai.qnps, 0)
+        self.assertGreater(self.ai.nps, 0)
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+
+from ai import MinMaxAI, MAX_DEPTH, STOP_CHECK_NODES
+from game_board_controller import GameBoardController
+from piece import PieceColor
+from search_limits import SearchLimits
+
+MIDDLEGAME = "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"
+
+
+class SearchLimitsTest(unittest.TestCase):
+    def setUp(self):
+        self.ai = MinMaxAI(PieceColor.WHITE, {'search_depth': 2, 'hash_mb': 1})
+        self.addCleanup(self.ai.close)
+        self.ai.controller.fen = MIDDLEGAME
+        self.gb = GameBoardController()
+        self.gb.fen = MIDDLEGAME
+
+    def legal(self, result):
+        self.assertIsNotNone(result)
+        move = next(iter(result[0]))
+        return move in self.gb.generate_legal_moves(self.gb.turn)
+
+    def test_default_depth(self):
+        self.assertTrue(self.legal(self.ai.iterative_deepening()))
+        self.assertEqual(self.ai.completed_depth, 2)
+
+    def test_depth(self):
+        self.assertTrue(self.legal(self.ai.iterative_deepening(SearchLimits(depth=3))))
+        self.assertEqual(self.ai.completed_depth, 3)
+
+    def test_nodes(self):
+        limit = 2000
+        result = self.ai.iterative_deepening(SearchLimits(nodes=limit))
+        self.assertTrue(self.legal(result))
+        self.assertLess(self.ai.nodes + self.ai.qnodes, limit + STOP_CHECK_NODES)
+        self.assertLess(self.ai.completed_depth, MAX_DEPTH)
+
+    def test_stopped_before_first_depth(self):
+        # no depth finished, the move is still legal
+        self.ai.pause()
+        result = self.ai.iterative_deepening(SearchLimits(depth=3))
+        self.assertEqual(self.ai.completed_depth, 0)
+        self.assertTrue(self.legal(result))
+
+    def test_move_time(self):
+        start = time.perf_counter()
+        result = self.ai.iterative_deepening(SearchLimits(move_time=0.3))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertTrue(self.legal(result))
+
+    def test_stop_infinite(self):
+        results = []
+        thread = threading.Thread(
+                target=lambda: results.append(
+                    self.ai.iterative_deepening(SearchLimits(infinite=True))))
+        thread.start()
+        time.sleep(0.5)
+        start = time.perf_counter()
+        self.ai.stop()
+        thread.join()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertGreater(self.ai.completed_depth, 0)
+        self.assertTrue(self.legal(results[0]))
+
+    def test_stop_does_not_outlive_search(self):
+        self.ai.stop()
+        self.ai.iterative_deepening(SearchLimits(depth=2))
+        self.assertEqual(self.ai.completed_depth, 2)
+
+    def test_pause(self):
+        # an hour on the clock
+        self.ai.time_left_func = lambda color: 3600000
+        moves = []
+        thread = threading.Thread(
+                target=lambda: moves.append(
+                    self.ai.make_move(None, None, None, None, MIDDLEGAME)))
+        thread.start()
+        time.sleep(0.5)
+        start = time.perf_counter()
+        self.ai.pause()
+        thread.join()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(moves, [None])
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from ai import MinMaxAI
+from piece import PieceColor, PieceCode
+from search_stats import SearchStats, long_algebraic
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class SearchStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.ai = MinMaxAI(PieceColor.WHITE, {'search_depth': 3, 'hash_mb': 1})
+        self.addCleanup(self.ai.close)
+
+    def test_long_algebraic(self):
+        self.assertEqual(long_algebraic(((6, 4), (4, 4), None)), "e2e4")
+        self.assertEqual(long_algebraic(((1, 0), (0, 0), PieceCode.QUEEN)), "a7a8q")
+        self.assertEqual(long_algebraic(((6, 7), (7, 6), PieceCode.KNIGHT)), "h2g1n")
+
+    def test_stats_of_a_search(self):
+        move = self.ai.make_move(None, None, None, None, KIWIPETE)
+        stats = self.ai.stats
+        self.assertEqual(stats.depth, 3)
+        self.assertEqual(stats.pv[0], move)
+        self.assertLessEqual(len(stats.pv), 3)
+        self.assertEqual(stats.nodes, self.ai.nodes)
+        self.assertEqual(sum(stats.iteration_nodes), stats.nodes + stats.qnodes)
+        self.assertIsNotNone(stats.effective_branching_factor)
+        self.assertGreater(stats.nps, 0)
+        self.assertGreater(stats.cutoffs, 0)
+        self.assertTrue(0 < stats.first_move_cutoff_rate <= 1)
+        self.assertTrue(0 < stats.table_hit_rate < 1)
+
+    def test_empty_stats(self):
+        stats = SearchStats()
+        self.assertIsNone(stats.effective_branching_factor)
+        self.assertEqual(stats.first_move_cutoff_rate, 0.0)
+        self.assertEqual(stats.to_dict()['pv'], [])
+
+    def test_callback(self):
+        reported = []
+        self.ai.stats_callback = reported.append
+        self.ai.make_move(None, None, None, None, START)
+        self.assertEqual(reported, [self.ai.stats])
+
+    def test_log(self):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        self.ai.search_log = path
+        for fen in (START, KIWIPETE):
+            move = self.ai.make_move(None, None, None, None, fen)
+        with open(path) as log:
+            records = [json.loads(line) for line in log]
+        self.assertEqual([record['fen'] for record in records], [START, KIWIPETE])
+        self.assertEqual(records[1]['move'], long_algebraic(move))
+        self.assertEqual(records[1]['pv'][0], long_algebraic(move))
+        self.assertEqual(records[1]['depth'], 3)
+        self.assertIn('first_move_cutoff_rate', records[1])
+
+    if __name__ == "__main__":
+        unittest.main()
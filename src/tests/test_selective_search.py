@@ -0,0 +1,124 @@
+import unittest
+
+from ai import MinMaxAI, INFINITE, SEARCH_TECHNIQUES
+from game_board_controller import GameBoardController
+from perft import REFERENCE_POSITIONS
+from piece import PieceColor
+from tournament import Engine, play_game
+
+NONE = {technique: False for technique in SEARCH_TECHNIQUES}
+
+
+class SelectiveSearchTest(unittest.TestCase):
+    def search(self, fen, depth, settings, table=True):
+        color = PieceColor.WHITE if fen.split(' ')[1] == 'w' else PieceColor.BLACK
+        ai = MinMaxAI(color, dict(settings, search_depth=depth, hash_mb=1))
+        self.addCleanup(ai.close)
+        if not table:
+            # bounds stored by other windows change scores a little
+            ai.transposition_table.probe = lambda key: None
+        ai.controller.fen = fen
+        return ai, ai.iterative_deepening()
+
+    def test_null_move(self):
+        gb = GameBoardController()
+        gb.fen = "rnbqkbnr/pppp1ppp/8/8/3Pp3/8/PPP1PPPP/RNBQKBNR b KQkq d3 0 3"
+        key = gb.zobrist_hash
+        gb.make_null_move()
+        self.assertEqual(gb.turn, PieceColor.WHITE)
+        self.assertIsNone(gb.en_passant)
+        self.assertEqual(gb.zobrist_hash, gb.sync_position().compute_hash())
+        gb.unmake_null_move()
+        self.assertEqual(gb.turn, PieceColor.BLACK)
+        self.assertEqual(gb.en_passant, (5, 3))
+        self.assertEqual(gb.zobrist_hash, key)
+
+    def test_zugzwang_guard(self):
+        ai = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+        ai.controller.fen = "8/8/p1p5/1p5p/1P5p/8/PPP2K1p/7k w - - 0 1"
+        self.assertFalse(ai.has_pieces(PieceColor.WHITE))
+        ai.controller.fen = "8/8/8/8/8/8/PPP2K1p/4N2k w - - 0 1"
+        self.assertTrue(ai.has_pieces(PieceColor.WHITE))
+        self.assertFalse(ai.has_pieces(PieceColor.BLACK))
+
+    def test_pvs_is_exact(self):
+        # without pruning, the null windows only change the node count
+        for _, fen, _ in REFERENCE_POSITIONS[:3]:
+            _, plain = self.search(fen, 3, NONE, False)
+            _, pvs = self.search(fen, 3, dict(NONE, pvs=True), False)
+            self.assertEqual(pvs[1], plain[1])
+
+    def test_aspiration_is_exact(self):
+        for _, fen, _ in REFERENCE_POSITIONS[:3]:
+            _, plain = self.search(fen, 3, NONE, False)
+            _, window = self.search(fen, 3, dict(NONE, aspiration_windows=True), False)
+            self.assertEqual(window[1], plain[1])
+
+    def test_fewer_nodes(self):
+        fen = REFERENCE_POSITIONS[1][1]
+        selective, _ = self.search(fen, 4, {})
+        full, _ = self.search(fen, 4, NONE)
+        self.assertLess(selective.nodes * 2, full.nodes)
+        for technique in SEARCH_TECHNIQUES:
+            ai, _ = self.search(fen, 3, {technique: False})
+            self.assertFalse(getattr(ai, technique))
+
+    def test_finds_mates(self):
+        # back rank mates the reductions must not hide. Mates score
+        # INFINITE minus their distance in plies
+        _, result = self.search("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", 4, {})
+        self.assertEqual(result, ({((7, 3), (0, 3), None)}, INFINITE - 1))
+        _, result = self.search("k7/8/1K6/8/8/8/8/6R1 w - - 0 1", 4, {})
+        self.assertEqual(result, ({((7, 6), (0, 6), None)}, INFINITE - 1))
+        # Kb8 Rg8#
+        _, result = self.search("k7/8/1K6/8/8/8/8/6R1 b - - 0 1", 4, {})
+        self.assertEqual(result[1], -(INFINITE - 2))
+
+    def test_repetition_is_a_draw(self):
+        ai = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+        self.addCleanup(ai.close)
+        gb = ai.controller
+        gb.fen = "4k3/8/8/8/8/8/8/RN2K3 w - - 0 1"
+        for move in [
+                ((7, 1), (5, 2), None),
+                ((0, 4), (0, 3), None),
+                ((5, 2), (7, 1), None),
+                ((0, 3), (0, 4), None)]:
+            gb.make_move(*move)
+        self.assertEqual(gb.repetitions(), 2)
+        ai._root_depth = 3
+        self.assertEqual(ai.negamax(2, -INFINITE, INFINITE, 1), 0)
+        # the root itself is searched
+        self.assertGreater(ai.negamax(2, -INFINITE, INFINITE, 0), 300)
+
+    def test_game_history(self):
+        ai = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+        self.addCleanup(ai.close)
+        fen = "4k3/8/8/8/8/8/8/RN2K3 w - - 0 1"
+        move = ai.make_move(None, None, None, None, fen)
+        self.assertEqual(len(ai.game_hashes), 2)
+        # a reply continues the game
+        controller = GameBoardController()
+        controller.fen = fen
+        controller.make_move(*move)
+        controller.make_move(*controller.generate_legal_moves(PieceColor.BLACK)[0])
+        ai.make_move(None, None, None, None, controller.fen)
+        self.assertEqual(len(ai.game_hashes), 4)
+        self.assertEqual(ai.controller.hash_history[:3], ai.game_hashes[:3])
+        # any other position starts a new one
+        ai.make_move(None, None, None, None, fen)
+        self.assertEqual(len(ai.game_hashes), 2)
+
+    def test_shortest_mate_is_played(self):
+        # without distances and repetitions the queen went round in
+        # circles until a threefold repetition
+        engine = Engine.parse("d4=MinMaxAI:search_depth=4,hash_mb=1")
+        record = play_game(engine, engine, "8/8/8/4k3/8/8/8/3QK3 w - - 0 1", seed=1)
+        self.assertEqual((record['result'], record['termination']), ("1-0", "checkmate"))
+
+    def test_stalemate_is_a_draw(self):
+        _, result = self.search("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", 2, {})
+        self.assertEqual(result, (None, 0))
+
+    if __name__ == "__main__":
+        unittest.main()
@@ -0,0 +1,140 @@
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ai import MinMaxAI, INFINITE, TABLEBASE_WIN
+from bitboard import BitboardPosition
+from game_board_controller import GameBoardController
+from piece import PieceColor
+from tablebase import (
+        Tablebases,
+        generate,
+        parse_material,
+        canonical_material,
+        sub_materials,
+        table_path,
+        value_plies)
+
+
+class TablebaseTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        for name in ("KQvK", "KRvK", "KPvK"):
+            generate(name, cls.directory)
+        cls.tablebases = Tablebases(cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebases.close()
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def probe(self, fen):
+        self.gb.fen = fen
+        return self.tablebases.probe(self.gb.sync_position())
+
+    def test_materials(self):
+        self.assertEqual(parse_material("KBNvK"), ([5, 2, 1], [5]))
+        self.assertEqual(canonical_material([5], [5, 4]), ("KQvK", True))
+        self.assertEqual(
+                sub_materials("KPvK"),
+                ["KBvK", "KNvK", "KQvK", "KRvK", "KvK"])
+        with self.assertRaises(ValueError):
+            parse_material("KQQ")
+        with self.assertRaises(ValueError):
+            parse_material("KQRBvK")
+
+    def test_longest_mates(self):
+        # mate in 10 for the queen, 16 for the rook, from the weaker side
+        # to move that is one more ply
+        for name, plies in (("KQvK", 20), ("KRvK", 32)):
+            values = np.fromfile(table_path(self.directory, name), np.int8)
+            self.assertEqual(value_plies(int(values.min())), plies)
+            self.assertEqual(value_plies(int(values.max())), plies - 1)
+
+    def test_known_positions(self):
+        self.assertEqual(value_plies(self.probe("7k/5Q2/6K1/8/8/8/8/8 w - - 0 1")), 1)
+        self.assertEqual(self.probe("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"), 0)
+        # mated
+        self.assertEqual(self.probe("7k/7Q/6K1/8/8/8/8/8 b - - 0 1"), -1)
+        # the opposition holds the draw
+        self.assertEqual(self.probe("4k3/8/8/8/8/8/4P3/4K3 b - - 0 1"), 0)
+        self.assertGreater(self.probe("4k3/8/4K3/4P3/8/8/8/8 w - - 0 1"), 0)
+        self.assertIsNone(self.probe("4k3/8/8/8/8/8/4P3/R3K3 w Q - 0 1"))
+        self.assertIsNone(self.probe("4k3/8/8/8/8/8/3PP3/4K3 w - - 0 1"))
+
+    def test_colors_swapped(self):
+        white = self.probe("8/8/8/8/8/k7/8/K6Q w - - 0 1")
+        self.assertGreater(white, 0)
+        self.assertEqual(self.probe("k6q/8/K7/8/8/8/8/8 b - - 0 1"), white)
+
+    def test_en_passant(self):
+        # the square doesn't matter when no pawn can take on it
+        self.assertEqual(
+                self.probe("4k3/8/8/4P3/8/8/8/K7 b - e3 0 1"),
+                self.probe("4k3/8/8/4P3/8/8/8/K7 b - - 0 1"))
+
+    def test_consistent_with_moves(self):
+        # KRvK positions: a win has a move to the loss one ply shorter, a
+        # loss only has moves to wins
+        rng = random.Random(5)
+        checked = 0
+        while checked < 100:
+            position = BitboardPosition()
+            for sq, piece in zip(rng.sample(range(64), 3), (5, 11, 3)):
+                position.put_piece(sq, piece)
+            position.side = rng.choice((0, 1))
+            if position.in_check(position.side ^ 1):
+                continue
+            fen = position.fen
+            value = self.probe(fen)
+            children = []
+            for move in self.gb.generate_legal_moves(self.gb.turn):
+                self.gb.make_move(*move)
+                children.append(self.tablebases.probe(self.gb.sync_position()))
+                self.gb.unmake_move()
+            if value > 0:
+                self.assertIn(-(value - 1), children)
+            elif value < 0 and children:
+                self.assertTrue(all(child > 0 for child in children))
+                self.assertEqual(max(children), -value - 1)
+            elif value == 0:
+                self.assertNotIn(True, [child < 0 for child in children])
+            checked += 1
+
+    def test_best_move_mates(self):
+        self.gb.fen = "8/8/8/3k4/8/8/8/K5Q1 w - - 0 1"
+        plies = value_plies(self.tablebases.probe(self.gb.sync_position()))
+        for _ in range(plies):
+            self.gb.make_move(*self.tablebases.best_move(self.gb))
+        position = self.gb.sync_position()
+        self.assertTrue(position.in_check(position.side))
+        self.assertEqual(self.gb.generate_legal_moves(self.gb.turn), [])
+
+    def test_minmax_root(self):
+        ai = MinMaxAI(PieceColor.WHITE, {'tablebases': self.directory})
+        self.addCleanup(ai.close)
+        move = ai.make_move(None, None, None, None, "7k/5Q2/6K1/8/8/8/8/8 w - - 0 1")
+        self.gb.fen = "7k/5Q2/6K1/8/8/8/8/8 w - - 0 1"
+        self.gb.make_move(*move)
+        self.assertEqual(self.gb.generate_legal_moves(self.gb.turn), [])
+        self.assertEqual(ai.nodes, 0)
+
+    def test_minmax_search(self):
+        # taking the rook goes into the queen tables
+        ai = MinMaxAI(PieceColor.WHITE, {'tablebases': self.directory, 'hash_mb': 1})
+        self.addCleanup(ai.close)
+        ai.controller.fen = "4k3/8/8/8/8/8/4r3/4K2Q w - - 0 1"
+        ai._root_depth = 1
+        moves, score = ai.minimax(1, -INFINITE, INFINITE, None, True)
+        self.assertEqual(moves, {((7, 4), (6, 4), None)})
+        self.assertGreater(score, TABLEBASE_WIN - 30)
+
+    if __name__ == "__main__":
+        unittest.main()
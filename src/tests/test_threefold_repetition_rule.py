@@ -1,72 +1,71 @@
 import unittest
 
 from game_board_controller import GameBoardController
-from piece import Bishop, King, Knight, Pawn, PieceColor, Queen, Rook
 
 
 class ThreefoldRuleTest(unittest.TestCase):
     def setUp(self):
         self.gb = GameBoardController()
-        self.gb.pieces = []
-        for i in range(8):
-            line = []
-            for j in range(8):
-                if i == 0:
-                    if j == 0 or j == 7:
-                        line.append(Rook(PieceColor.WHITE, (i, j)))
-                    elif j == 1 or j == 6:
-                        line.append(Knight(PieceColor.WHITE, (i, j)))
-                    elif j == 2 or j == 5:
-                        line.append(Bishop(PieceColor.WHITE, (i, j)))
-                    elif j == 3:
-                        line.append(Queen(PieceColor.WHITE, (i, j)))
-                    elif j == 4:
-                        line.append(King(PieceColor.WHITE, (i, j)))
-                elif i == 1:
-                    line.append(Pawn(PieceColor.WHITE, (i, j)))
-                elif i == 6:
-                    line.append(Pawn(PieceColor.BLACK, (i, j)))
-                elif i == 7:
-                    if j == 0 or j == 7:
-                        line.append(Rook(PieceColor.BLACK, (i, j)))
-                    elif j == 1 or j == 6:
-                        line.append(Knight(PieceColor.BLACK, (i, j)))
-                    elif j == 2 or j == 5:
-                        line.append(Bishop(PieceColor.BLACK, (i, j)))
-                    elif j == 3:
-                        line.append(Queen(PieceColor.BLACK, (i, j)))
-                    elif j == 4:
-                        line.append(King(PieceColor.BLACK, (i, j)))
-                else:
-                    line.append(None)
-            self.gb.pieces.append(line)
+
+    def play(self, moves):
+        # same order the game board uses
+        for old, new in moves:
+            self.gb.move_piece(old, new, None)
+            self.gb.threefold_repetition_rule(old, new)
+            self.gb.finish_turn()
+
+    def knight_shuffle(self):
+        self.play([
+            ((7, 6), (5, 5)),
+            ((0, 6), (2, 5)),
+            ((5, 5), (7, 6)),
+            ((2, 5), (0, 6))])
 
     def test_initial_board(self):
-        self.gb._turn = PieceColor.BLACK
-        self.gb.threefold_repetition_rule((7, 1), (5, 0))
+        self.play([((7, 1), (5, 0))])
         self.assertFalse(self.gb.threefold_draw)
+        self.assertEqual(self.gb.repetitions(), 1)
 
-    def test_black_threefold(self):
-        self.gb._turn = PieceColor.BLACK
-        self.gb.black_moved_times = 4
-        self.gb.black_threefold = [(5, 0), (7, 1), (5, 0), (7, 1)]
-        self.gb.black_last_moved_piece = self.gb.pieces[7][1]
-        self.gb.pieces[5][0] = self.gb.pieces[7][1]
-        self.gb.pieces[7][1] = None
-        self.gb.black_last_old_and_new = [(5, 0), (7, 1)]
-        self.gb.threefold_repetition_rule((7, 1), (5, 0))
+    def test_knight_shuffle(self):
+        self.knight_shuffle()
+        self.assertEqual(self.gb.repetitions(), 2)
+        self.assertFalse(self.gb.threefold_draw)
+        self.knight_shuffle()
+        self.assertEqual(self.gb.repetitions(), 3)
         self.assertTrue(self.gb.threefold_draw)
 
-    def test_black_not_threefold(self):
-        self.gb._turn = PieceColor.BLACK
-        self.gb.black_moved_times = 4
-        self.gb.black_threefold = [(5, 0), (7, 1), (5, 0), (7, 1)]
-        self.gb.black_last_moved_piece = self.gb.pieces[7][1]
-        self.gb.pieces[5][2] = self.gb.pieces[7][1]
-        self.gb.pieces[7][1] = None
-        self.gb.black_last_old_and_new = [(5, 0), (7, 1)]
-        self.gb.threefold_repetition_rule((7, 1), (5, 2))
-        self.assertFalse(self.gb.threefold_draw)
+    def test_different_route(self):
+        # the position repeats through different moves of different pieces
+        self.play([
+            ((7, 6), (5, 5)),
+            ((0, 6), (2, 5)),
+            ((5, 5), (7, 6)),
+            ((2, 5), (0, 6)),
+            ((7, 1), (5, 2)),
+            ((0, 1), (2, 2)),
+            ((5, 2), (7, 1)),
+            ((2, 2), (0, 1))])
+        self.assertTrue(self.gb.threefold_draw)
+
+    def test_pawn_move_resets_history(self):
+        self.knight_shuffle()
+        self.play([((6, 4), (5, 4)), ((1, 4), (2, 4))])
+        self.assertEqual(len(self.gb.hash_history), 1)
+        self.knight_shuffle()
+        self.knight_shuffle()
+        self.assertEqual(self.gb.repetitions(), 3)
+        self.assertTrue(self.gb.threefold_draw)
+
+    def test_make_unmake_move(self):
+        self.gb.make_move((7, 6), (5, 5))
+        self.gb.make_move((0, 6), (2, 5))
+        self.gb.make_move((5, 5), (7, 6))
+        self.gb.make_move((2, 5), (0, 6))
+        self.assertEqual(self.gb.repetitions(), 2)
+        for _ in range(4):
+            self.gb.unmake_move()
+        self.assertEqual(self.gb.hash_history, [self.gb.zobrist_hash])
+        self.assertEqual(self.gb.repetitions(), 1)
 
     if __name__ == "__main__":
         unittest.main()
@@ -0,0 +1,144 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from ai import RandomAI, MinMaxAI
+from game_board_controller import GameBoardController
+from pgn import read_games
+from piece import PieceColor
+from tournament import (
+        Engine,
+        TimeControl,
+        MatchScore,
+        read_openings,
+        insufficient_material,
+        game_over,
+        play_game,
+        schedule,
+        sprt_bounds,
+        main,
+        START)
+
+
+class TournamentTest(unittest.TestCase):
+    def temp_file(self, suffix, text=""):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_engine(self):
+        engine = Engine.parse("d3=MinMaxAI:search_depth=3,hash_mb=1,search_log=x.jsonl")
+        self.assertEqual(engine.name, "d3")
+        self.assertEqual(
+                engine.settings,
+                {'search_depth': 3, 'hash_mb': 1, 'search_log': "x.jsonl"})
+        player = engine.player(PieceColor.BLACK)
+        self.addCleanup(player.close)
+        self.assertIsInstance(player, MinMaxAI)
+        self.assertEqual(player.search_depth, 3)
+        self.assertIsInstance(Engine.parse("r=RandomAI").player(PieceColor.WHITE), RandomAI)
+        with self.assertRaises(ValueError):
+            Engine.parse("x=Stockfish")
+
+    def test_time_control(self):
+        tc = TimeControl.parse("40/60+0.5")
+        self.assertEqual((tc.moves, tc.base, tc.increment), (40, 60.0, 0.5))
+        self.assertEqual(str(tc), "40/60+0.5")
+        self.assertEqual(str(TimeControl.parse("10")), "10")
+
+    def test_openings(self):
+        epd = self.temp_file(".epd", "# suite\n4k3/8/8/8/8/8/8/4K2R w K - bm O-O;\n"
+                             "4k3/8/8/8/8/8/8/4K2R b - - 3 20\n")
+        self.assertEqual(read_openings(epd), [
+            "4k3/8/8/8/8/8/8/4K2R w K - 0 1",
+            "4k3/8/8/8/8/8/8/4K2R b - - 3 20"])
+        pgn = self.temp_file(".pgn", "[Event \"?\"]\n\n1. e4 e5 2. Nf3 *\n")
+        fen, = read_openings(pgn)
+        self.assertTrue(fen.startswith("rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq -"))
+
+    def test_game_over(self):
+        gb = GameBoardController()
+        for fen, over in [
+                (START, None),
+                ("4k3/8/8/8/8/8/8/4K2R b K - 0 1", None),
+                ("5Q1k/8/6K1/8/8/8/8/8 b - - 0 1", ("1-0", "checkmate")),
+                ("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", ("1/2-1/2", "stalemate")),
+                ("7k/8/6K1/8/8/8/8/5B2 b - - 0 1", ("1/2-1/2", "insufficient material"))]:
+            gb.fen = fen
+            self.assertEqual(game_over(gb, 0, 0), over)
+        gb.fen = "7k/8/6K1/8/8/8/8/4NB2 b - - 0 1"
+        self.assertFalse(insufficient_material(gb))
+        self.assertEqual(game_over(gb, 100, 0), ("1/2-1/2", "fifty move rule"))
+
+    def test_play_game(self):
+        record = play_game(
+                Engine.parse("d1=MinMaxAI:search_depth=1,hash_mb=1"),
+                Engine.parse("random=RandomAI"),
+                START,
+                TimeControl(60),
+                seed=1)
+        self.assertEqual((record['white'], record['black']), ("d1", "random"))
+        self.assertIn(record['result'], ("1-0", "1/2-1/2"))
+        self.assertNotIn(record['termination'], ("illegal move", "time forfeit"))
+        self.assertGreater(len(record['moves']), 0)
+
+    def test_time_forfeit(self):
+        record = play_game(
+                Engine.parse("slow=MinMaxAI:search_depth=2,hash_mb=1"),
+                Engine.parse("random=RandomAI"),
+                START,
+                TimeControl(0.001))
+        self.assertEqual((record['result'], record['termination']), ("0-1", "time forfeit"))
+
+    def test_schedule(self):
+        engines = [Engine.parse("{}=RandomAI".format(name)) for name in "abc"]
+        jobs = schedule(engines, ["x", "y"], 4)
+        self.assertEqual(len(jobs), 12)
+        self.assertEqual(
+                [(white.name, black.name, fen) for white, black, fen in jobs[:4]],
+                [("a", "b", "x"), ("b", "a", "x"), ("a", "b", "y"), ("b", "a", "y")])
+
+    def test_match_score(self):
+        score = MatchScore("a", "b")
+        for result in ["1-0"] * 60 + ["0-1"] * 40 + ["1/2-1/2"] * 100:
+            score.add({'white': "a", 'black': "b", 'result': result})
+        score.add({'white': "b", 'black': "a", 'result': "0-1"})
+        self.assertEqual((score.wins, score.losses, score.draws), (61, 40, 100))
+        elo, margin = score.elo()
+        self.assertAlmostEqual(elo, 36.4, delta=0.5)
+        self.assertGreater(margin, 0)
+        # the result favours the stronger hypothesis
+        self.assertGreater(score.llr(0, 40), 0)
+        self.assertLess(score.llr(40, 80), 0)
+        lower, upper = sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(lower, -2.944, places=3)
+        self.assertAlmostEqual(upper, 2.944, places=3)
+
+    def test_sweep_crosses_bounds(self):
+        lower, upper = sprt_bounds(0.05, 0.05)
+        wins = MatchScore("a", "b")
+        losses = MatchScore("a", "b")
+        self.assertEqual(wins.llr(0, 50), 0.0)
+        for _ in range(4):
+            wins.add({'white': "a", 'black': "b", 'result': "1-0"})
+            losses.add({'white': "a", 'black': "b", 'result': "0-1"})
+        self.assertGreater(wins.llr(0, 50), upper)
+        self.assertLess(losses.llr(0, 50), lower)
+
+    def test_main(self):
+        pgn = self.temp_file(".pgn")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(["-e", "a=RandomAI", "-e", "b=RandomAI", "-n", "2", "-c", "1", "--pgn", pgn])
+        self.assertIn("a vs b:", output.getvalue())
+        with open(pgn) as f:
+            games = list(read_games(f.read()))
+        self.assertEqual(len(games), 2)
+        self.assertEqual({games[0][0]["White"], games[1][0]["White"]}, {"a", "b"})
+
+    if __name__ == "__main__":
+        unittest.main()
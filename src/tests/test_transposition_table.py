@@ -0,0 +1,162 @@
+import unittest
+from multiprocessing import Process
+
+from ai import MinMaxAI, INFINITE, encode_move, decode_move
+from piece import PieceColor, PieceCode
+from transposition_table import (
+        TranspositionTable,
+        SharedTranspositionTable,
+        pack_entry,
+        unpack_entry,
+        EXACT,
+        LOWER,
+        UPPER)
+
+
+def store_entries(name, keys):
+    table = SharedTranspositionTable(1, name)
+    for key in keys:
+        table.store(key, 3, key % 1000, EXACT, 0)
+    table.close()
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = TranspositionTable(1)
+
+    def test_pack_unpack(self):
+        for depth, score, bound, move in [
+                (0, 0, EXACT, 0),
+                (3, -20000, LOWER, 4095),
+                (255, 1000000, UPPER, 0xFFFF),
+                (7, -INFINITE, EXACT, 1 << 12)]:
+            data = pack_entry(depth, score, bound, move, 63)
+            self.assertEqual(unpack_entry(data), (depth, score, bound, move))
+
+    def test_move_encoding(self):
+        for move in [
+                ((6, 4), (4, 4), None),
+                ((1, 0), (0, 0), PieceCode.QUEEN),
+                ((1, 7), (0, 6), PieceCode.KNIGHT)]:
+            self.assertEqual(decode_move(encode_move(move)), move)
+        self.assertIsNone(decode_move(encode_move(None)))
+
+    def test_bounded_size(self):
+        # 1 MB of 16 byte entries
+        self.assertEqual(self.table.buckets * 2, 1 << 16)
+        self.assertEqual(len(self.table.keys), 1 << 16)
+        table = TranspositionTable(3)
+        # rounded down to a power of two
+        self.assertEqual(table.buckets, self.table.buckets * 2)
+        for key in range(1, 200000):
+            self.table.store(
+                    key * 0x9E3779B97F4A7C15 % (1 << 64),
+                    key % 5,
+                    0,
+                    EXACT,
+                    0)
+        self.assertEqual(len(self.table.keys), 1 << 16)
+        self.assertEqual(self.table.usage(), 1000)
+
+    def test_probe_store(self):
+        key = 0x123456789ABCDEF0
+        self.assertIsNone(self.table.probe(key))
+        self.table.store(key, 4, -150, UPPER, 77)
+        self.assertEqual(self.table.probe(key), (4, -150, UPPER, 77))
+        # another key of the same bucket
+        self.assertIsNone(self.table.probe(key ^ (1 << 63)))
+        self.assertEqual(self.table.hits, 1)
+        self.assertEqual(self.table.misses, 2)
+        self.assertAlmostEqual(self.table.hit_rate, 1 / 3)
+
+    def test_replacement(self):
+        key = 42
+        other = key + self.table.buckets
+        newer = key + 2 * self.table.buckets
+        self.table.store(key, 5, 10, EXACT, 0)
+        # a shallower search of another position goes to the second slot
+        self.table.store(other, 2, 20, EXACT, 0)
+        self.assertEqual(self.table.probe(key)[1], 10)
+        self.assertEqual(self.table.probe(other)[1], 20)
+        self.assertEqual(self.table.collisions, 0)
+        # the second slot is always replaced
+        self.table.store(newer, 1, 30, EXACT, 0)
+        self.assertIsNone(self.table.probe(other))
+        self.assertEqual(self.table.probe(key)[1], 10)
+        self.assertEqual(self.table.collisions, 1)
+        # a deeper search takes the first slot
+        self.table.store(other, 6, 40, LOWER, 0)
+        self.assertIsNone(self.table.probe(key))
+        self.assertEqual(self.table.probe(other), (6, 40, LOWER, 0))
+        # entries of an older search are replaced first
+        self.table.new_search()
+        self.table.store(key, 1, 50, EXACT, 0)
+        self.assertEqual(self.table.probe(key)[1], 50)
+        self.assertIsNone(self.table.probe(other))
+
+    def test_clear(self):
+        self.table.store(1, 1, 1, EXACT, 1)
+        self.table.clear()
+        self.assertIsNone(self.table.probe(1))
+        self.assertEqual(self.table.stores, 0)
+        self.assertEqual(self.table.usage(), 0)
+
+    def test_minmax_reuses_table(self):
+        fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+        ai = MinMaxAI(PieceColor.WHITE, {'hash_mb': 1})
+        move = ai.make_move(None, None, None, None, fen)
+        self.assertIn(move, ai.controller.generate_legal_moves(PieceColor.WHITE))
+        first_stores = ai.transposition_table.stores
+        self.assertGreater(first_stores, 0)
+        # the same search again is mostly answered by the table
+        ai.transposition_table.reset_stats()
+        self.assertEqual(ai.make_move(None, None, None, None, fen), move)
+        self.assertGreater(ai.transposition_table.hits, 0)
+        self.assertLess(ai.transposition_table.stores, first_stores)
+
+    def test_torn_entry(self):
+        self.table.store(5, 1, 10, EXACT, 0)
+        self.table.store(6, 2, 20, LOWER, 0)
+        # the data of one store with the key of another
+        self.table.data[5 * 2] = self.table.data[6 * 2]
+        self.assertIsNone(self.table.probe(5))
+        self.assertIsNotNone(self.table.probe(6))
+
+    def test_shared_table(self):
+        table = SharedTranspositionTable(1)
+        self.addCleanup(table.close)
+        attached = SharedTranspositionTable(1, table.name)
+        self.addCleanup(attached.close)
+        self.assertEqual(attached.buckets, table.buckets)
+        table.store(1234, 5, -70, UPPER, 99)
+        self.assertEqual(attached.probe(1234), (5, -70, UPPER, 99))
+        attached.store(4321, 2, 30, LOWER, 0)
+        self.assertEqual(table.probe(4321), (2, 30, LOWER, 0))
+        table.clear()
+        self.assertIsNone(attached.probe(1234))
+        with self.assertRaises(ValueError):
+            attached.resize(2)
+
+    def test_shared_between_processes(self):
+        table = SharedTranspositionTable(1)
+        self.addCleanup(table.close)
+        keys = [key * 0x9E3779B97F4A7C15 % (1 << 64) for key in range(1, 500)]
+        workers = [
+            Process(target=store_entries, args=(table.name, keys[i::2]))
+            for i in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        for key in keys:
+            self.assertEqual(table.probe(key), (3, key % 1000, EXACT, 0))
+
+    def test_shared_memory_freed(self):
+        table = SharedTranspositionTable(1)
+        name = table.name
+        table.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedTranspositionTable(1, name)
+
+    if __name__ == "__main__":
+        unittest.main()
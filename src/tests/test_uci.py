@@ -0,0 +1,113 @@
+import io
+import subprocess
+import sys
+import unittest
+
+from ai import INFINITE, TABLEBASE_WIN
+from game_board_controller import GameBoardController
+from piece import PieceCode
+from uci import UCIEngine, parse_long_algebraic, uci_score, clock_move_time
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+class UCITest(unittest.TestCase):
+    def setUp(self):
+        self.output = io.StringIO()
+        self.engine = UCIEngine(self.output)
+        self.addCleanup(self.engine.quit)
+
+    def run_commands(self, *lines):
+        for line in lines:
+            self.engine.handle(line)
+            if self.engine._search_thread is not None and line != "go infinite":
+                # the search ends by itself
+                self.engine._search_thread.join()
+        return self.output.getvalue().splitlines()
+
+    def best_move(self, lines):
+        bestmoves = [line for line in lines if line.startswith("bestmove")]
+        self.assertEqual(len(bestmoves), 1)
+        return bestmoves[0].split()[1]
+
+    def test_handshake(self):
+        lines = self.run_commands("uci", "isready")
+        self.assertEqual(lines[0], "id name PyChess")
+        self.assertIn("option name Hash type spin default 16 min 1 max 4096", lines)
+        self.assertEqual(lines[-2:], ["uciok", "readyok"])
+
+    def test_parse_long_algebraic(self):
+        gb = GameBoardController()
+        gb.fen = "4k3/P7/8/8/8/8/8/4K2R w K - 0 1"
+        self.assertEqual(parse_long_algebraic(gb, "a7a8q"), ((1, 0), (0, 0), PieceCode.QUEEN))
+        self.assertEqual(parse_long_algebraic(gb, "e1g1"), ((7, 4), (7, 6), None))
+        self.assertIsNone(parse_long_algebraic(gb, "a7a8"))
+        self.assertIsNone(parse_long_algebraic(gb, "e1e3"))
+
+    def test_scores(self):
+        self.assertEqual(uci_score(-35), "cp -35")
+        self.assertEqual(uci_score(INFINITE - 3), "mate 2")
+        self.assertEqual(uci_score(-(INFINITE - 4)), "mate -2")
+        self.assertEqual(uci_score(-INFINITE), "mate 0")
+        self.assertEqual(uci_score(TABLEBASE_WIN - 5), "mate 3")
+
+    def test_clock(self):
+        self.assertAlmostEqual(clock_move_time(20000, 0, 10, 30), 2.0)
+        self.assertAlmostEqual(clock_move_time(30000, 1000, None, 0), 0.75 + 0.75)
+        # never more than what is left on the clock
+        self.assertAlmostEqual(clock_move_time(1000, 4000, None, 0), 0.95)
+
+    def test_position_and_depth(self):
+        lines = self.run_commands(
+                "position startpos moves e2e4 e7e5 g1f3",
+                "go depth 3")
+        infos = [line for line in lines if line.startswith("info depth")]
+        self.assertEqual([line.split()[2] for line in infos], ["1", "2", "3"])
+        self.assertIn(" pv ", infos[-1])
+        # black to move
+        gb = GameBoardController()
+        gb.fen = START
+        for text in ("e2e4", "e7e5", "g1f3"):
+            gb.make_move(*parse_long_algebraic(gb, text))
+        self.assertIsNotNone(parse_long_algebraic(gb, self.best_move(lines)))
+
+    def test_mate(self):
+        lines = self.run_commands(
+                "position fen 7k/5Q2/6K1/8/8/8/8/8 w - - 0 1",
+                "go movetime 2000")
+        self.assertIn("score mate 1", lines[-2])
+        self.assertIn(self.best_move(lines), ("f7f8", "f7e8"))
+
+    def test_nodes(self):
+        lines = self.run_commands("position startpos", "go nodes 1000")
+        self.assertIsNotNone(self.best_move(lines))
+
+    def test_infinite_waits_for_stop(self):
+        self.engine.handle("position fen 7k/5Q2/6K1/8/8/8/8/8 w - - 0 1")
+        self.engine.handle("go infinite")
+        # a mate ends the search, not the command
+        self.engine._search_thread.join(0.5)
+        self.assertNotIn("bestmove", self.output.getvalue())
+        self.engine.handle("stop")
+        lines = self.output.getvalue().splitlines()
+        self.assertIn(self.best_move(lines), ("f7f8", "f7e8"))
+
+    def test_options(self):
+        self.run_commands("setoption name Hash value 2", "position startpos", "go depth 1")
+        self.assertEqual(self.engine.ai.transposition_table.size_mb, 2)
+        self.run_commands("setoption name Threads value 2")
+        self.assertIsNone(self.engine.ai)
+        self.assertEqual(self.engine.settings['search_workers'], 2)
+
+    def test_no_graphics_imports(self):
+        code = "import sys, uci; print(sorted(m for m in sys.modules " \
+            "if m.split('.')[0] in ('pygame', 'pygame_menu', 'memory_profiler')))"
+        output = subprocess.run(
+                [sys.executable, "-c", code],
+                capture_output=True,
+                text=True,
+                check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    if __name__ == "__main__":
+        unittest.main()
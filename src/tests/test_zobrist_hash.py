@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from bitboard import BitboardPosition
+from game_board_controller import GameBoardController
+
+
+class ZobristHashTest(unittest.TestCase):
+    def setUp(self):
+        self.gb = GameBoardController()
+
+    def test_make_unmake(self):
+        position = BitboardPosition()
+        position.fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        rng = random.Random(1)
+        hashes = [position.hash]
+        for _ in range(40):
+            moves = position.legal_moves(position.side)
+            if not moves:
+                break
+            position.make(rng.choice(moves))
+            self.assertEqual(position.hash, position.compute_hash())
+            hashes.append(position.hash)
+        while position.history:
+            hashes.pop()
+            position.unmake()
+            self.assertEqual(position.hash, hashes[-1])
+
+    def test_move_piece(self):
+        rng = random.Random(2)
+        for _ in range(30):
+            moves = self.gb.generate_legal_moves(self.gb.turn)
+            if not moves:
+                break
+            self.gb.move_piece(*rng.choice(moves))
+            self.gb.finish_turn()
+            self.assertEqual(
+                    self.gb.zobrist_hash,
+                    self.gb.position.compute_hash())
+            h = self.gb.zobrist_hash
+            self.gb.fen = self.gb.fen
+            self.assertEqual(self.gb.zobrist_hash, h)
+
+    def test_transposition(self):
+        self.gb.make_move((6, 4), (5, 4))
+        self.gb.make_move((1, 4), (2, 4))
+        self.gb.make_move((6, 3), (5, 3))
+        first = self.gb.zobrist_hash
+        self.gb.fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0"
+        self.gb.make_move((6, 3), (5, 3))
+        self.gb.make_move((1, 4), (2, 4))
+        self.gb.make_move((6, 4), (5, 4))
+        self.assertEqual(self.gb.zobrist_hash, first)
+
+    def test_state(self):
+        fen = "4k3/8/8/3pP3/8/8/8/R3K3 w Q d6 0 1"
+        self.gb.fen = fen
+        h = self.gb.zobrist_hash
+        self.gb.fen = "4k3/8/8/3pP3/8/8/8/R3K3 w - d6 0 1"
+        self.assertNotEqual(self.gb.zobrist_hash, h)
+        self.gb.fen = "4k3/8/8/3pP3/8/8/8/R3K3 b Q d6 0 1"
+        self.assertNotEqual(self.gb.zobrist_hash, h)
+        # an en passant square nobody can take on doesn't change the hash
+        self.gb.fen = "4k3/8/8/3p4/4P3/8/8/R3K3 w Q - 0 1"
+        h = self.gb.zobrist_hash
+        self.gb.fen = "4k3/8/8/3p4/4P3/8/8/R3K3 w Q d6 0 1"
+        self.assertEqual(self.gb.zobrist_hash, h)
+
+    if __name__ == "__main__":
+        unittest.main()
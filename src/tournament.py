@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+import argparse
+import ast
+import datetime
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ai import RandomAI, MinMaxAI
+from bitboard import KNIGHT, BISHOP, WHITE, BLACK
+from game_board_controller import GameBoardController
+from pgn import read_games, parse_san, write_san, write_game
+from piece import PieceColor, PieceCode
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+# the players a configuration can name
+PLAYER_TYPES = {
+        'RandomAI': RandomAI,
+        'MinMaxAI': MinMaxAI}
+# a game still going after this many plies is a draw
+MAX_PLIES = 400
+# the score of a game for white
+RESULT_SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+# a player configuration: 'NAME=TYPE[:setting=value,...]', like
+# 'depth3=MinMaxAI:search_depth=3,hash_mb=8'. Values are Python literals,
+# or strings when they aren't
+class Engine():
+    def __init__(self, name: str, player_type: str, settings: dict):
+        if player_type not in PLAYER_TYPES:
+            raise ValueError("unknown player type {}".format(player_type))
+        self.name = name
+        self.player_type = player_type
+        self.settings = settings
+
+    @classmethod
+    def parse(cls, text: str):
+        name, _, rest = text.partition('=')
+        player_type, _, settings_text = rest.partition(':')
+        if not name or not player_type:
+            raise ValueError("expected NAME=TYPE[:setting=value,...], got {}".format(text))
+        settings = {}
+        for item in filter(None, settings_text.split(',')):
+            key, _, value = item.partition('=')
+            try:
+                settings[key] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                settings[key] = value
+        return cls(name, player_type, settings)
+
+    def player(self, color: PieceColor):
+        return PLAYER_TYPES[self.player_type](color, dict(self.settings))
+
+
+# '[moves/]seconds[+increment]', like '40/60', '10+0.1' or '300'. The
+# base time is given again after every 'moves' moves
+class TimeControl():
+    def __init__(self, base: float, increment: float = 0.0, moves: int = None):
+        self.base = base
+        self.increment = increment
+        self.moves = moves
+
+    @classmethod
+    def parse(cls, text: str):
+        moves = None
+        if '/' in text:
+            moves, text = text.split('/', 1)
+            moves = int(moves)
+        base, _, increment = text.partition('+')
+        return cls(float(base), float(increment or 0), moves)
+
+    def __str__(self):
+        text = "{:g}".format(self.base)
+        if self.moves:
+            text = "{}/{}".format(self.moves, text)
+        if self.increment:
+            text += "+{:g}".format(self.increment)
+        return text
+
+
+# the starting positions of a suite: a PGN file (the position at the end
+# of each game), or one FEN or EPD per line
+def read_openings(path: str) -> [str]:
+    with open(path, encoding='utf-8') as suite:
+        text = suite.read()
+    if path.lower().endswith(".pgn"):
+        fens = []
+        for headers, moves, _ in read_games(text):
+            controller = GameBoardController()
+            controller.fen = headers.get("FEN", START)
+            for san in moves:
+                move = parse_san(controller, san)
+                if move is None:
+                    break
+                controller.make_move(*move)
+            fens.append(controller.sync_position().fen)
+        return fens
+    fens = []
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields or line.startswith('#'):
+            continue
+        if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+            fens.append(" ".join(fields[:6]))
+        else:
+            # EPD: the counters are replaced by operations
+            fens.append(" ".join(fields[:4] + ["0", "1"]))
+    return fens
+
+
+# only kings, or a single knight or bishop besides them
+def insufficient_material(controller: GameBoardController) -> bool:
+    position = controller.sync_position()
+    minors = 0
+    for color in (WHITE, BLACK):
+        for kind, bitboard in enumerate(position.bitboards[color * 6:color * 6 + 5]):
+            if not bitboard:
+                continue
+            if kind not in (KNIGHT, BISHOP):
+                return False
+            minors += bin(bitboard).count('1')
+    return minors <= 1
+
+
+# the (result, termination) of the game at the controller's position,
+# None while it goes on. 'quiet_plies' counts the plies since the last
+# capture or pawn move
+def game_over(controller: GameBoardController, quiet_plies: int, plies: int):
+    turn = controller.turn
+    if not controller.generate_legal_moves(turn):
+        if controller.in_check(turn):
+            return ("0-1" if turn == PieceColor.WHITE else "1-0"), "checkmate"
+        return "1/2-1/2", "stalemate"
+    if insufficient_material(controller):
+        return "1/2-1/2", "insufficient material"
+    if controller.repetitions() >= 3:
+        return "1/2-1/2", "threefold repetition"
+    if quiet_plies >= 100:
+        return "1/2-1/2", "fifty move rule"
+    if plies >= MAX_PLIES:
+        return "1/2-1/2", "adjudication"
+    return None
+
+
+def _loss(color: PieceColor) -> str:
+    return "0-1" if color == PieceColor.WHITE else "1-0"
+
+
+# plays one game and returns its record: the names, the result, why it
+# ended, the opening and the moves in SAN. Runs in a pool process
+def play_game(
+        white: Engine,
+        black: Engine,
+        fen: str,
+        time_control: TimeControl = None,
+        seed: int = None) -> dict:
+    random.seed(seed)
+    controller = GameBoardController()
+    controller.fen = fen
+    players = {
+        PieceColor.WHITE: white.player(PieceColor.WHITE),
+        PieceColor.BLACK: black.player(PieceColor.BLACK)}
+    # milliseconds left, and moves played by each side
+    clock = {}
+    moves_played = {PieceColor.WHITE: 0, PieceColor.BLACK: 0}
+    if time_control is not None:
+        clock = {color: time_control.base * 1000 for color in players}
+        for player in players.values():
+            player.time_left_func = clock.get
+    sans = []
+    fields = fen.split()
+    quiet_plies = int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0
+    try:
+        while True:
+            over = game_over(controller, quiet_plies, len(sans))
+            if over is not None:
+                break
+            color = controller.turn
+            start = time.perf_counter()
+            move = players[color].make_move(
+                    controller.piece_info,
+                    lambda idxs: idxs,
+                    controller.get_legal_moves,
+                    controller.is_promotion_valid,
+                    controller.fen)
+            elapsed = (time.perf_counter() - start) * 1000
+            if move is None or move not in controller.generate_legal_moves(color):
+                over = _loss(color), "illegal move"
+                break
+            if time_control is not None:
+                clock[color] -= elapsed
+                if clock[color] < 0:
+                    over = _loss(color), "time forfeit"
+                    break
+                clock[color] += time_control.increment * 1000
+                moves_played[color] += 1
+                if time_control.moves and moves_played[color] % time_control.moves == 0:
+                    clock[color] += time_control.base * 1000
+            old, new, _ = move
+            irreversible = controller.piece_info(old)[0] == PieceCode.PAWN \
+                or controller.piece_info(new) is not None
+            quiet_plies = 0 if irreversible else quiet_plies + 1
+            sans.append(write_san(controller, move))
+            controller.make_move(*move)
+    finally:
+        for player in players.values():
+            if hasattr(player, 'close'):
+                player.close()
+    result, termination = over
+    return {
+        'white': white.name,
+        'black': black.name,
+        'fen': fen,
+        'moves': sans,
+        'result': result,
+        'termination': termination}
+
+
+def game_pgn(record: dict, round_number: int, time_control: TimeControl = None) -> str:
+    headers = {
+        "Event": "Tournament",
+        "Site": "?",
+        "Date": datetime.date.today().strftime("%Y.%m.%d"),
+        "Round": round_number,
+        "White": record['white'],
+        "Black": record['black']}
+    if record['fen'] != START:
+        headers["SetUp"] = "1"
+        headers["FEN"] = record['fen']
+    headers["TimeControl"] = str(time_control) if time_control else "-"
+    headers["Termination"] = record['termination']
+    headers["PlyCount"] = len(record['moves'])
+    return write_game(headers, record['moves'], record['result'])
+
+
+# the wins, losses and draws of one engine against another, with the Elo
+# difference they give and the log-likelihood ratio of a sequential
+# probability ratio test
+class MatchScore():
+    def __init__(self, name: str, opponent: str):
+        self.name = name
+        self.opponent = opponent
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+
+    def add(self, record: dict):
+        score = RESULT_SCORES[record['result']]
+        if record['black'] == self.name:
+            score = 1 - score
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses + self.draws
+
+    @property
+    def score(self) -> float:
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    # the variance of a single game's score
+    @property
+    def variance(self) -> float:
+        if not self.games:
+            return 0.0
+        score = self.score
+        return (self.wins * (1 - score) ** 2
+                + self.losses * score ** 2
+                + self.draws * (0.5 - score) ** 2) / self.games
+
+    # (Elo difference, half width of its 95% interval), None for a score
+    # of 0 or 1
+    def elo(self):
+        score = self.score
+        if not 0 < score < 1:
+            return None
+        margin = 1.96 * math.sqrt(self.variance / self.games)
+        low = min(max(score - margin, 1e-6), 1 - 1e-6)
+        high = min(max(score + margin, 1e-6), 1 - 1e-6)
+        return score_elo(score), (score_elo(high) - score_elo(low)) / 2
+
+    # the log-likelihood ratio of H1 (the engine is 'elo1' stronger)
+    # against H0 ('elo0' stronger), with the normal approximation. While
+    # every game had the same result the variance is 0, so a draw is
+    # counted in: a sweep then still moves towards a bound
+    def llr(self, elo0: float, elo1: float) -> float:
+        if not self.games:
+            return 0.0
+        score = self
+        if not self.variance:
+            score = MatchScore(self.name, self.opponent)
+            score.wins, score.losses, score.draws = self.wins, self.losses, self.draws + 1
+        score0 = elo_score(elo0)
+        score1 = elo_score(elo1)
+        return (score1 - score0) * (2 * score.score - score0 - score1) \
+            * score.games / (2 * score.variance)
+
+    def __str__(self):
+        text = "{} vs {}: {} - {} - {} [{:.3f}] {}".format(
+                self.name,
+                self.opponent,
+                self.wins,
+                self.losses,
+                self.draws,
+                self.score,
+                self.games)
+        elo = self.elo()
+        if elo is not None:
+            text += ", Elo {:+.1f} +/- {:.1f}".format(*elo)
+        return text
+
+
+def elo_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_elo(score: float) -> float:
+    return -400 * math.log10(1 / score - 1)
+
+
+# (lower, upper) log-likelihood ratio bounds: H0 is accepted below the
+# first, H1 above the second
+def sprt_bounds(alpha: float, beta: float) -> (float, float):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+# every pairing of the engines plays 'games' games, each opening twice
+# with the colors swapped
+def schedule(engines: [Engine], openings: [str], games: int):
+    jobs = []
+    for i, first in enumerate(engines):
+        for second in engines[i + 1:]:
+            for game in range(games):
+                fen = openings[game // 2 % len(openings)]
+                if game % 2:
+                    jobs.append((second, first, fen))
+                else:
+                    jobs.append((first, second, fen))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            description="Play games between player configurations in a process pool.")
+    parser.add_argument(
+            "-e", "--engine",
+            action="append",
+            required=True,
+            help="NAME=TYPE[:setting=value,...], with TYPE one of {}; at "
+            "least two".format(", ".join(PLAYER_TYPES)))
+    parser.add_argument(
+            "-n", "--games",
+            type=int,
+            default=100,
+            help="games per pairing")
+    parser.add_argument("--openings", help="FEN, EPD or PGN file of starting positions")
+    parser.add_argument("--tc", help="time control, [moves/]seconds[+increment]")
+    parser.add_argument("--pgn", help="append the games to this PGN file")
+    parser.add_argument(
+            "-c", "--concurrency",
+            type=int,
+            default=os.cpu_count(),
+            help="games played at once")
+    parser.add_argument(
+            "--sprt",
+            help="ELO0,ELO1: stop once the first engine is shown to be ELO1 "
+            "stronger, or not ELO0 stronger, than the second")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    engines = [Engine.parse(text) for text in args.engine]
+    if len(engines) < 2:
+        parser.error("at least two engines are needed")
+    openings = read_openings(args.openings) if args.openings else [START]
+    time_control = TimeControl.parse(args.tc) if args.tc else None
+    sprt = None
+    if args.sprt:
+        if len(engines) != 2:
+            parser.error("--sprt needs exactly two engines")
+        sprt = [float(elo) for elo in args.sprt.split(',')]
+    lower, upper = sprt_bounds(args.alpha, args.beta)
+
+    scores = {
+        (first.name, second.name): MatchScore(first.name, second.name)
+        for i, first in enumerate(engines)
+        for second in engines[i + 1:]}
+    jobs = schedule(engines, openings, args.games)
+    finished = 0
+    with ProcessPoolExecutor(max_workers=max(args.concurrency, 1)) as executor:
+        pending = {
+            executor.submit(play_game, white, black, fen, time_control, args.seed + number)
+            for number, (white, black, fen) in enumerate(jobs)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                finished += 1
+                names = (record['white'], record['black'])
+                score = scores.get(names) or scores[names[::-1]]
+                score.add(record)
+                print("Game {}/{}: {} vs {} {} ({})".format(
+                    finished,
+                    len(jobs),
+                    record['white'],
+                    record['black'],
+                    record['result'],
+                    record['termination']))
+                print(score)
+                if args.pgn:
+                    with open(args.pgn, 'a', encoding='utf-8') as pgn:
+                        pgn.write(game_pgn(record, finished, time_control) + "\n")
+            if sprt is not None:
+                llr = scores[(engines[0].name, engines[1].name)].llr(*sprt)
+                print("SPRT: llr {:.2f} ({:.2f}, {:.2f})".format(llr, lower, upper))
+                if llr <= lower or llr >= upper:
+                    print("H1 accepted" if llr >= upper else "H0 accepted")
+                    for future in pending:
+                        future.cancel()
+                    break
+            sys.stdout.flush()
+    for score in scores.values():
+        print(score)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+import weakref
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+
+# what a stored score means: the exact value of the position, a lower
+# bound (the search failed high) or an upper bound (it failed low)
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# each entry is a 64-bit key and a 64-bit data word. The key is stored
+# XORed with the data, so an entry whose two words were written by
+# different stores no longer matches its key. A bucket has two entries:
+# the first keeps the deepest search of the current game move, the
+# second is always replaced
+ENTRY_BYTES = 16
+BUCKET_ENTRIES = 2
+
+# data word layout, from the lowest bit: score (32 bits, stored with an
+# offset so it is never negative), move (16 bits), depth (8 bits), bound
+# (2 bits) and the age of the search that stored it (6 bits). A zero
+# data word is an empty entry
+SCORE_BITS = 32
+SCORE_OFFSET = 1 << (SCORE_BITS - 1)
+MAX_SCORE = SCORE_OFFSET - 1
+MOVE_SHIFT = 32
+DEPTH_SHIFT = 48
+BOUND_SHIFT = 56
+AGE_SHIFT = 58
+AGE_MASK = 63
+
+
+def pack_entry(
+        depth: int,
+        score: int,
+        bound: int,
+        move: int,
+        age: int) -> int:
+    score = max(-MAX_SCORE, min(MAX_SCORE, score))
+    return (score + SCORE_OFFSET) \
+        | move << MOVE_SHIFT \
+        | min(depth, 255) << DEPTH_SHIFT \
+        | bound << BOUND_SHIFT \
+        | age << AGE_SHIFT
+
+
+# (depth, score, bound, move)
+def unpack_entry(data: int) -> (int, int, int, int):
+    return (
+        (data >> DEPTH_SHIFT) & 255,
+        (data & 0xFFFFFFFF) - SCORE_OFFSET,
+        (data >> BOUND_SHIFT) & 3,
+        (data >> MOVE_SHIFT) & 0xFFFF)
+
+
+# buckets fitting in 'size_mb' megabytes, rounded down to a power of
+# two so the bucket is just the low bits of the key
+def table_buckets(size_mb: float) -> int:
+    buckets = int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_ENTRIES)
+    return 1 << (max(buckets, 1).bit_length() - 1)
+
+
+# fixed size hash table of search results, indexed by zobrist hash. Its
+# memory never grows past the size it was created with
+class TranspositionTable():
+    def __init__(self, size_mb: float = 16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb: float):
+        self.buckets = table_buckets(size_mb)
+        self.size_mb = size_mb
+        self.clear()
+
+    def clear(self):
+        entries = self.buckets * BUCKET_ENTRIES
+        self.keys = array('Q', bytes(8 * entries))
+        self.data = array('Q', bytes(8 * entries))
+        self.age = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        # entries of another position overwritten by a store
+        self.collisions = 0
+        self.stores = 0
+
+    # called before each search, so entries left by older searches are
+    # the first ones replaced
+    def new_search(self):
+        self.age = (self.age + 1) & AGE_MASK
+
+    def probe(self, key: int) -> (int, int, int, int):
+        i = (key & (self.buckets - 1)) * BUCKET_ENTRIES
+        keys = self.keys
+        data = self.data
+        # each word is read once, another process may be writing them
+        entry = data[i]
+        if entry and keys[i] ^ entry == key:
+            self.hits += 1
+            return unpack_entry(entry)
+        entry = data[i + 1]
+        if entry and keys[i + 1] ^ entry == key:
+            self.hits += 1
+            return unpack_entry(entry)
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int):
+        i = (key & (self.buckets - 1)) * BUCKET_ENTRIES
+        keys = self.keys
+        data = self.data
+        old = data[i]
+        # the depth preferred entry is only taken over by the same
+        # position, a search at least as deep or a newer search
+        if old and keys[i] ^ old != key \
+                and (old >> DEPTH_SHIFT) & 255 > depth \
+                and (old >> AGE_SHIFT) & AGE_MASK == self.age:
+            i += 1
+            old = data[i]
+        if old and keys[i] ^ old != key:
+            self.collisions += 1
+        entry = pack_entry(depth, score, bound, move, self.age)
+        keys[i] = key ^ entry
+        data[i] = entry
+        self.stores += 1
+
+    @property
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    # entries in use, in permille, looking at the first thousand buckets
+    def usage(self) -> int:
+        sample = min(self.buckets, 1000) * BUCKET_ENTRIES
+        used = sum(1 for i in range(sample) if self.data[i])
+        return used * 1000 // sample
+
+
+def _release_memory(memory: SharedMemory, views, owner: bool):
+    for view in views:
+        view.release()
+    memory.close()
+    if owner:
+        memory.unlink()
+
+
+# a transposition table in shared memory, probed and stored into by
+# several processes without locks: a torn entry fails the XOR check and
+# reads as a miss. The table is created without a name and attached to
+# by name in the other processes. The creator's table frees the memory
+# when closed, garbage collected or at exit
+class SharedTranspositionTable(TranspositionTable):
+    def __init__(self, size_mb: float = 16, name: str = None):
+        self.name = name
+        self.memory = None
+        super(SharedTranspositionTable, self).__init__(size_mb)
+
+    def resize(self, size_mb: float):
+        if self.memory is not None:
+            if not self.owner:
+                raise ValueError("only the table's creator can resize it")
+            self.close()
+            self.name = None
+        self.buckets = table_buckets(size_mb)
+        self.size_mb = size_mb
+        entries = self.buckets * BUCKET_ENTRIES
+        self.owner = self.name is None
+        if self.owner:
+            self.memory = SharedMemory(create=True, size=ENTRY_BYTES * entries)
+            self.name = self.memory.name
+        else:
+            self.memory = SharedMemory(name=self.name)
+        words = self.memory.buf[:ENTRY_BYTES * entries].cast('Q')
+        self.keys = words[:entries]
+        self.data = words[entries:]
+        self._finalizer = weakref.finalize(
+                self,
+                _release_memory,
+                self.memory,
+                [self.keys, self.data, words],
+                self.owner)
+        if self.owner:
+            self.clear()
+        else:
+            self.age = 0
+            self.reset_stats()
+
+    # empties the table for every process using it
+    def clear(self):
+        size = ENTRY_BYTES * self.buckets * BUCKET_ENTRIES
+        self.memory.buf[:size] = bytes(size)
+        self.age = 0
+        self.reset_stats()
+
+    def close(self):
+        self._finalizer()
+        self.memory = None
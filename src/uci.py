@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+import sys
+import threading
+
+from ai import (
+        MinMaxAI,
+        INFINITE,
+        TABLEBASE_WIN,
+        WIN_SCORE,
+        DEFAULT_HASH_MB,
+        is_mate_score,
+        time_budget)
+from piece import PieceColor
+from search_limits import SearchLimits
+from search_stats import long_algebraic
+
+ENGINE_NAME = "PyChess"
+ENGINE_AUTHOR = "asimos-bot"
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+MAX_HASH_MB = 4096
+MAX_THREADS = 64
+# kept off the clock for the time it takes to send the move
+MOVE_OVERHEAD = 50
+# 'go' arguments followed by a number
+GO_VALUES = ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes')
+
+
+# the legal move of the controller's side to move written like 'e2e4' or
+# 'e7e8q', None if there isn't one
+def parse_long_algebraic(controller, text: str):
+    for move in controller.generate_legal_moves(controller.turn):
+        if long_algebraic(move) == text:
+            return move
+    return None
+
+
+# a search score as UCI 'cp <centipawns>' or 'mate <moves>', negative
+# when the side to move is mated
+def uci_score(score: int) -> str:
+    if is_mate_score(score):
+        plies = INFINITE - abs(score)
+    elif abs(score) > WIN_SCORE:
+        plies = TABLEBASE_WIN - abs(score)
+    else:
+        return "cp {}".format(score)
+    if score > 0:
+        return "mate {}".format((plies + 1) // 2)
+    return "mate {}".format(-(plies // 2))
+
+
+# seconds to search with 'time_left' and 'increment' (milliseconds) on
+# the clock
+def clock_move_time(
+        time_left: int,
+        increment: int,
+        moves_to_go: int,
+        move_number: int) -> float:
+    if moves_to_go:
+        budget = max(time_left, 0) / 1000 / moves_to_go
+    else:
+        budget = time_budget(time_left, move_number)
+    budget += increment / 1000 * 3 / 4
+    return min(budget, max(time_left - MOVE_OVERHEAD, 0) / 1000)
+
+
+# plays MinMaxAI through the UCI protocol: commands are passed to
+# handle() one line at a time and the answers are written to 'output'.
+# Searches run in a thread, so 'stop' is read while searching
+class UCIEngine():
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self._output_lock = threading.Lock()
+        self.settings = {'hash_mb': DEFAULT_HASH_MB, 'search_workers': 1}
+        # made on the first search, and again after an option changed
+        self.ai = None
+        self.fen = START_FEN
+        self.moves = []
+        self._search_thread = None
+        # ends an infinite search, whose best move waits for 'stop'
+        self._stop = threading.Event()
+
+    def send(self, line: str):
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    # False after 'quit'
+    def handle(self, line: str) -> bool:
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == 'uci':
+            self.send("id name {}".format(ENGINE_NAME))
+            self.send("id author {}".format(ENGINE_AUTHOR))
+            self.send("option name Hash type spin default {} min 1 max {}".format(
+                DEFAULT_HASH_MB,
+                MAX_HASH_MB))
+            self.send("option name Threads type spin default 1 min 1 max {}".format(
+                MAX_THREADS))
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'setoption':
+            self.set_option(args)
+        elif command == 'ucinewgame':
+            self.wait()
+            self.close_ai()
+        elif command == 'position':
+            self.wait()
+            self.set_position(args)
+        elif command == 'go':
+            self.wait()
+            self.go(args)
+        elif command == 'stop':
+            self.wait()
+        elif command == 'quit':
+            self.quit()
+            return False
+        return True
+
+    def set_option(self, args: [str]):
+        if 'name' not in args or 'value' not in args:
+            return
+        name = " ".join(args[args.index('name') + 1:args.index('value')]).lower()
+        value = " ".join(args[args.index('value') + 1:])
+        try:
+            number = int(value)
+        except ValueError:
+            self.send("info string invalid value {}".format(value))
+            return
+        if name == 'hash':
+            key, number = 'hash_mb', min(max(number, 1), MAX_HASH_MB)
+        elif name == 'threads':
+            key, number = 'search_workers', min(max(number, 1), MAX_THREADS)
+        else:
+            self.send("info string unknown option {}".format(name))
+            return
+        self.wait()
+        if self.settings[key] != number:
+            self.settings[key] = number
+            self.close_ai()
+
+    # 'startpos' or 'fen <fen>', and optionally 'moves <move> ...'
+    def set_position(self, args: [str]):
+        if 'moves' in args:
+            moves_at = args.index('moves')
+            args, moves = args[:moves_at], args[moves_at + 1:]
+        else:
+            moves = []
+        if args and args[0] == 'fen':
+            self.fen = " ".join(args[1:])
+        else:
+            self.fen = START_FEN
+        self.moves = moves
+
+    # the AI at the position of the last 'position' command, playing the
+    # side to move
+    def prepare_ai(self) -> MinMaxAI:
+        if self.ai is None:
+            self.ai = MinMaxAI(PieceColor.WHITE, dict(self.settings))
+            self.ai.iteration_callback = self.info
+        controller = self.ai.controller
+        controller.fen = self.fen
+        for text in self.moves:
+            move = parse_long_algebraic(controller, text)
+            if move is None:
+                self.send("info string illegal move {}".format(text))
+                break
+            controller.make_move(*move)
+        self.ai.color = controller.turn
+        return self.ai
+
+    def limits(self, args: [str], ai: MinMaxAI) -> SearchLimits:
+        values = {}
+        for i, token in enumerate(args[:-1]):
+            if token in GO_VALUES:
+                try:
+                    values[token] = int(args[i + 1])
+                except ValueError:
+                    pass
+        limits = SearchLimits(
+                depth=values.get('depth'),
+                nodes=values.get('nodes'),
+                infinite='infinite' in args)
+        if 'movetime' in values:
+            limits.move_time = values['movetime'] / 1000
+        else:
+            side = ('wtime', 'winc') if ai.color == PieceColor.WHITE else ('btime', 'binc')
+            if side[0] in values:
+                limits.move_time = clock_move_time(
+                        values[side[0]],
+                        values.get(side[1], 0),
+                        values.get('movestogo'),
+                        ai.controller.fullmoves)
+        if limits.depth is None and limits.nodes is None \
+                and limits.move_time is None:
+            # 'go' alone searches until 'stop'
+            limits.infinite = True
+        return limits
+
+    def go(self, args: [str]):
+        ai = self.prepare_ai()
+        limits = self.limits(args, ai)
+        self._stop.clear()
+        self._search_thread = threading.Thread(
+                target=self._search,
+                args=(ai, limits),
+                daemon=True)
+        self._search_thread.start()
+
+    def _search(self, ai: MinMaxAI, limits: SearchLimits):
+        ai.transposition_table.new_search()
+        ai.move_orderer.new_search()
+        result = ai.iterative_deepening(limits)
+        if limits.infinite:
+            # the move is only sent once asked for
+            self._stop.wait()
+        if result is None or result[0] is None:
+            self.send("bestmove 0000")
+            return
+        move = next(iter(result[0]))
+        line = "bestmove " + long_algebraic(move)
+        pv = ai.stats.pv
+        if len(pv) > 1 and pv[0] == move:
+            line += " ponder " + long_algebraic(pv[1])
+        self.send(line)
+
+    # an 'info' line for each completed depth
+    def info(self, stats):
+        fields = [
+            "info depth {}".format(stats.depth),
+            "score {}".format(uci_score(stats.score)),
+            "nodes {}".format(stats.nodes + stats.qnodes),
+            "nps {}".format(round(stats.nps)),
+            "time {}".format(round(stats.time * 1000))]
+        if stats.pv:
+            fields.append("pv " + " ".join(long_algebraic(move) for move in stats.pv))
+        self.send(" ".join(fields))
+
+    # stops the running search, if any, and waits for its best move. A
+    # stop that comes before the search cleared its stop event is sent
+    # again
+    def wait(self):
+        thread = self._search_thread
+        if thread is None:
+            return
+        self._stop.set()
+        while thread.is_alive():
+            self.ai.stop()
+            thread.join(0.01)
+        self._search_thread = None
+
+    def close_ai(self):
+        if self.ai is not None:
+            self.ai.close()
+            self.ai = None
+
+    def quit(self):
+        self.wait()
+        self.close_ai()
+
+
+def main():
+    engine = UCIEngine(sys.stdout)
+    # a worker process of the parallel search closes sys.stdin when it
+    # starts, which blocks while the main thread waits for a command on
+    # it: commands are read through another file object
+    commands = open(sys.stdin.fileno(), closefd=False)
+    try:
+        for line in commands:
+            if not engine.handle(line):
+                break
+    finally:
+        engine.quit()
+        commands.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())